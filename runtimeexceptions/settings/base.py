@@ -32,6 +32,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.LoginRequiredMiddleware",
     "django_htmx.middleware.HtmxMiddleware",
     "strava.middleware.NotAuthenticated",
+    "strava.middleware.RateLimited",
 ]
 
 ROOT_URLCONF = "runtimeexceptions.urls"
@@ -93,18 +94,100 @@ LOGOUT_REDIRECT_URL = "/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
-TASKS = {"default": {"BACKEND": "django_tasks.backends.immediate.ImmediateBackend"}}
+# Tasks run in lanes, each a queue with workers of its own (see the Procfile),
+# so a long backfill never holds up work a runner is waiting to see. The lanes
+# and their priorities are in strava.tasks.
+TASK_QUEUES = ["interactive", "webhook", "default", "backfill"]
+
+TASKS = {
+    "default": {
+        "BACKEND": "django_tasks.backends.immediate.ImmediateBackend",
+        "QUEUES": TASK_QUEUES,
+    },
+}
 
 STRAVA_CLIENT_ID = os.environ.get("STRAVA_CLIENT_ID")
 STRAVA_SECRET = os.environ.get("STRAVA_SECRET")
 STRAVA_KEY = os.environ.get("STRAVA_KEY")
 
+# Connection pool for the shared Strava session. The pool size bounds how many
+# connections a single process keeps open to Strava at once.
+STRAVA_HTTP_POOL_CONNECTIONS = int(os.environ.get("STRAVA_HTTP_POOL_CONNECTIONS", "4"))
+STRAVA_HTTP_POOL_MAXSIZE = int(os.environ.get("STRAVA_HTTP_POOL_MAXSIZE", "10"))
+STRAVA_HTTP_POOL_BLOCK = os.environ.get("STRAVA_HTTP_POOL_BLOCK", "True") != "False"
+STRAVA_HTTP_RETRIES = int(os.environ.get("STRAVA_HTTP_RETRIES", "3"))
+STRAVA_HTTP_BACKOFF = float(os.environ.get("STRAVA_HTTP_BACKOFF", "0.5"))
+
+# Tokens are refreshed this many seconds before they expire, so one never runs
+# out part way through a call. renew_tokens renews any expiring within the
+# window ahead of time; Strava only issues a new token inside its last hour.
+STRAVA_TOKEN_REFRESH_SKEW = int(os.environ.get("STRAVA_TOKEN_REFRESH_SKEW", "300"))
+STRAVA_TOKEN_RENEW_WINDOW = int(os.environ.get("STRAVA_TOKEN_RENEW_WINDOW", "3600"))
+
+# The cache that holds state shared between the web and worker processes, such
+# as rate limit usage and cached Strava responses.
+STRAVA_CACHE = "default"
+
+# Strava's published defaults; the limits it reports in response headers take
+# over once we have seen one. Headroom is the share of each budget held back.
+STRAVA_RATE_LIMIT_SHORT = int(os.environ.get("STRAVA_RATE_LIMIT_SHORT", "200"))
+STRAVA_RATE_LIMIT_DAILY = int(os.environ.get("STRAVA_RATE_LIMIT_DAILY", "2000"))
+STRAVA_RATE_LIMIT_HEADROOM = float(os.environ.get("STRAVA_RATE_LIMIT_HEADROOM", "0.05"))
+# The share of each budget backfills leave for webhooks and interactive work.
+STRAVA_RATE_LIMIT_BACKFILL_RESERVE = float(os.environ.get("STRAVA_RATE_LIMIT_BACKFILL_RESERVE", "0.3"))
+
+# Seconds each cached Strava endpoint is served without asking Strava; after
+# that it is revalidated by ETag. Entries are kept for STRAVA_RESPONSE_KEEP so
+# there is something to revalidate.
+STRAVA_RESPONSE_TTL = {
+    "athlete": 60 * 60,
+    "activities": 5 * 60,
+    "athlete/activities": 60,
+}
+STRAVA_RESPONSE_KEEP = 24 * 60 * 60
+
+# How long a runner's local activity list is trusted before the next page load
+# checks Strava for anything a missed webhook would have told us about.
+STRAVA_ACTIVITY_SYNC_INTERVAL = int(os.environ.get("STRAVA_ACTIVITY_SYNC_INTERVAL", "3600"))
+
+# A claimed webhook event is left to its worker for STRAVA_EVENT_LEASE seconds,
+# after which another may take it; one that keeps failing is given up on after
+# STRAVA_EVENT_MAX_ATTEMPTS.
+STRAVA_EVENT_LEASE = int(os.environ.get("STRAVA_EVENT_LEASE", "300"))
+STRAVA_EVENT_MAX_ATTEMPTS = int(os.environ.get("STRAVA_EVENT_MAX_ATTEMPTS", "5"))
+
+# An activity's update events are handled STRAVA_EVENT_DEBOUNCE seconds after
+# the first, so a burst of edits costs one enrichment. An update that only
+# repeats what we wrote within STRAVA_EVENT_ECHO_WINDOW seconds is our own
+# write coming back, and is ignored.
+STRAVA_EVENT_DEBOUNCE = int(os.environ.get("STRAVA_EVENT_DEBOUNCE", "30"))
+STRAVA_EVENT_ECHO_WINDOW = int(os.environ.get("STRAVA_EVENT_ECHO_WINDOW", "300"))
+
+# Rendered route images are served with this max-age; a changed route gets a
+# new ETag, so clients that revalidate see it straight away.
+STRAVA_ROUTE_MAX_AGE = int(os.environ.get("STRAVA_ROUTE_MAX_AGE", str(7 * 24 * 60 * 60)))
+
 OWM_API_KEY = os.environ.get("OWM_API_KEY")
+# The class observations are fetched through; see weather.providers.
+WEATHER_PROVIDER = os.environ.get("WEATHER_PROVIDER", "weather.providers.OpenWeatherMap")
+
+# Activities that finish within the same geohash cell share any observation made
+# there within WEATHER_REUSE_WINDOW seconds of their time rather than fetching
+# their own.
+WEATHER_GEOHASH_PRECISION = int(os.environ.get("WEATHER_GEOHASH_PRECISION", "6"))
+WEATHER_REUSE_WINDOW = int(os.environ.get("WEATHER_REUSE_WINDOW", str(60 * 60)))
+
+# Weather for older activities is backfilled this many at a time, with a pause
+# of WEATHER_BACKFILL_THROTTLE seconds between batches to spread the calls.
+WEATHER_BACKFILL_BATCH_SIZE = int(os.environ.get("WEATHER_BACKFILL_BATCH_SIZE", "50"))
+WEATHER_BACKFILL_THROTTLE = float(os.environ.get("WEATHER_BACKFILL_THROTTLE", "60"))
 
 DOMAIN = os.environ.get("DOMAIN", "localhost:8000")
 
 STATIC_ROOT = os.path.join(BASE_DIR, "static")
 
+MEDIA_ROOT = BASE_DIR / "media"
+
 DATABASES: dict[str, dict[str, Any]] = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
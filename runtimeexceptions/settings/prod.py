@@ -4,7 +4,7 @@ import os
 import dj_database_url
 
 from runtimeexceptions.settings.base import *  # noqa
-from runtimeexceptions.settings.base import DATABASES, LOGGING, MIDDLEWARE
+from runtimeexceptions.settings.base import DATABASES, LOGGING, MIDDLEWARE, TASK_QUEUES
 from runtimeexceptions.utils import deep_merge
 
 logger = logging.getLogger(__name__)
@@ -92,8 +92,15 @@ CACHES = {
         "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
         "LOCATION": "renditions",
     },
+    # Shared by gunicorn and db_worker, so it has to live outside the process.
+    "strava": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "strava_cache",
+    },
 }
 
+STRAVA_CACHE = "strava"
+
 LOGGING = deep_merge(
     LOGGING,
     {
@@ -108,5 +115,6 @@ LOGGING = deep_merge(
 TASKS = {
     "default": {
         "BACKEND": "django_tasks.backends.database.DatabaseBackend",
+        "QUEUES": TASK_QUEUES,
     },
 }
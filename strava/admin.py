@@ -20,7 +20,8 @@ class RunnerSettingsAdmin(admin.ModelAdmin):
 @admin.register(models.Event)
 class EventAdmin(admin.ModelAdmin):
     model = models.Event
-    list_display = ("aspect_type", "event_time", "owner")
+    list_display = ("aspect_type", "event_time", "owner", "state", "attempts", "latency")
+    list_filter = ("state", "processed")
     list_per_page = 25
 
 
@@ -30,6 +31,20 @@ class ActivityAdmin(admin.ModelAdmin):
     list_display = ("strava_id", "runner", "weather")
 
 
+@admin.register(models.ActivitySummary)
+class ActivitySummaryAdmin(admin.ModelAdmin):
+    model = models.ActivitySummary
+    list_display = ("strava_id", "runner", "start_date")
+    list_per_page = 25
+
+
+@admin.register(models.Backfill)
+class BackfillAdmin(admin.ModelAdmin):
+    model = models.Backfill
+    list_display = ("runner", "before", "processed", "updated", "completed_at")
+    list_per_page = 25
+
+
 @admin.register(models.Animal)
 class AnimalAdmin(admin.ModelAdmin):
     model = models.Animal
@@ -0,0 +1,127 @@
+"""
+The animals we compare activities against, held in memory sorted by speed.
+
+The table is small and rarely changes, so it is loaded once per process and
+every lookup is a bisect over the sorted speeds rather than a query. Saving or
+deleting an Animal moves on the version of the index kept in the cache shared
+by the web and worker processes, and each process loads the index again the
+next time it finds its copy is out of date.
+"""
+
+import random
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from strava.models import Animal
+
+
+@dataclass(frozen=True)
+class SpeedIndex:
+    """
+    Animals ordered by ``(max_speed, name)``, with their speeds alongside for
+    bisecting.
+    """
+
+    animals: tuple[Animal, ...]
+    speeds: tuple[float, ...]
+
+    @classmethod
+    def load(cls) -> "SpeedIndex":
+        animals = tuple(Animal.objects.order_by("max_speed", "name"))
+        return cls(animals=animals, speeds=tuple(a.max_speed for a in animals))
+
+    def _slower_end(self, kph: float) -> int:
+        # Animals before this index are strictly slower than kph.
+        return bisect_left(self.speeds, kph)
+
+    def _faster_start(self, kph: float) -> int:
+        # Animals from this index on are strictly faster than kph.
+        return bisect_right(self.speeds, kph)
+
+    def nearest_slower(self, kph: float) -> Animal | None:
+        end = self._slower_end(kph)
+        return self.animals[end - 1] if end else None
+
+    def nearest_faster(self, kph: float) -> Animal | None:
+        start = self._faster_start(kph)
+        return self.animals[start] if start < len(self.animals) else None
+
+    def random_slower(self, kph: float, rng: random.Random | None = None) -> Animal | None:
+        end = self._slower_end(kph)
+        return self.animals[(rng or random).randrange(end)] if end else None
+
+    def random_faster(self, kph: float, rng: random.Random | None = None) -> Animal | None:
+        start = self._faster_start(kph)
+        if start >= len(self.animals):
+            return None
+        return self.animals[(rng or random).randrange(start, len(self.animals))]
+
+
+VERSION_KEY = "strava:animals:version"
+
+
+def _cache():
+    return caches[settings.STRAVA_CACHE]
+
+
+@lru_cache(maxsize=1)
+def index_at(version: int) -> SpeedIndex:
+    return SpeedIndex.load()
+
+
+def speed_index() -> SpeedIndex:
+    return index_at(_cache().get(VERSION_KEY, 0))
+
+
+def _bump() -> None:
+    cache = _cache()
+    cache.add(VERSION_KEY, 0, timeout=None)
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, timeout=None)
+
+
+def invalidate() -> None:
+    """
+    Move on to a new version now, and again once the surrounding transaction
+    commits so a reload in between cannot keep rows that were rolled back or
+    not yet visible.
+    """
+    _bump()
+    transaction.on_commit(_bump)
+
+
+_deferred: ContextVar[bool] = ContextVar("deferred", default=False)
+
+
+@contextmanager
+def deferring() -> Iterator[None]:
+    """
+    Hold back the invalidation for every Animal saved or deleted inside the
+    block and invalidate once at the end, so an import moves the version on
+    once rather than twice a row.
+    """
+    token = _deferred.set(True)
+    try:
+        yield
+    finally:
+        _deferred.reset(token)
+        invalidate()
+
+
+@receiver(post_save, sender=Animal)
+@receiver(post_delete, sender=Animal)
+def _animal_changed(**kwargs) -> None:
+    if not _deferred.get():
+        invalidate()
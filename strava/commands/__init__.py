@@ -1,9 +1,21 @@
+from strava.commands.backfill_enrichment import BackfillEnrichment
+from strava.commands.backfill_weather import BackfillWeather
+from strava.commands.enrich_activity import EnrichActivity
 from strava.commands.find_or_create_activity import FindOrCreateActivity
+from strava.commands.process_events import ProcessEvents
+from strava.commands.renew_tokens import RenewTokens
+from strava.commands.sync_activities import SyncActivities
 from strava.commands.update_comparison import UpdateComparison
 from strava.commands.update_triathlon_score import UpdateTriathlonScore
 
 __all__ = [
+    "BackfillEnrichment",
+    "BackfillWeather",
+    "EnrichActivity",
     "FindOrCreateActivity",
+    "ProcessEvents",
+    "RenewTokens",
+    "SyncActivities",
     "UpdateComparison",
     "UpdateTriathlonScore",
 ]
@@ -0,0 +1,182 @@
+import difflib
+import logging
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from itertools import batched
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import Http404
+from django.utils import timezone
+
+from strava import ratelimit
+from strava.commands.enrich_activity import EnrichActivity
+from strava.data_models import UpdatableActivity
+from strava.exceptions import StravaError, StravaRateLimitError
+from strava.models import Backfill, Runner, SummaryActivityTriathlon
+
+logger = logging.getLogger(__name__)
+
+
+class BackfillEnrichment:
+    """
+    Apply the triathlon score and animal comparison to a runner's whole
+    history as one throttled job.
+
+    Activities are taken newest first in batches of ``concurrency``, each batch
+    enriched in parallel. The checkpoint only moves once a whole batch is done,
+    so a stopped run resumes without skipping anything. When Strava's budget
+    runs out, whether for an activity or the next page of the history, the
+    job waits for it to reset rather than failing. It stops short of
+    STRAVA_RATE_LIMIT_BACKFILL_RESERVE of each budget, which is left for
+    webhooks and runners waiting on a page.
+
+    With ``dry_run`` nothing is written to Strava or the checkpoint; the
+    changes that would be made are reported as diffs instead.
+    """
+
+    PER_PAGE = 200
+
+    runner: Runner
+    concurrency: int
+    dry_run: bool
+    restart: bool
+    report: Callable[[str], None]
+
+    def __init__(
+        self,
+        runner: Runner,
+        concurrency: int = 4,
+        dry_run: bool = False,
+        restart: bool = False,
+        report: Callable[[str], None] = logger.info,
+    ):
+        self.runner = runner
+        self.concurrency = max(1, concurrency)
+        self.dry_run = dry_run
+        self.restart = restart
+        self.report = report
+
+    def __call__(self) -> Backfill:
+        checkpoint = self.checkpoint()
+
+        if self.restart or (self.dry_run and checkpoint.completed_at is not None):
+            checkpoint.before = None
+            checkpoint.processed = checkpoint.updated = 0
+            checkpoint.completed_at = None
+        elif checkpoint.completed_at is not None:
+            self.report(f"Backfill for {self.runner} already completed at {checkpoint.completed_at}")
+            return checkpoint
+
+        if checkpoint.before is not None:
+            self.report(f"Resuming backfill for {self.runner} before {checkpoint.before}")
+
+        while True:
+            activities = self.runner.get_activities(before=checkpoint.before, per_page=self.PER_PAGE)
+            try:
+                with ratelimit.reserving(settings.STRAVA_RATE_LIMIT_BACKFILL_RESERVE):
+                    for batch in batched(activities, self.concurrency):
+                        self.enrich_and_checkpoint(batch, checkpoint)
+            except StravaRateLimitError as error:
+                # The next page was refused; once the budget resets, carry on from the checkpoint.
+                self.wait(error.retry_after)
+                continue
+            break
+
+        if not self.dry_run:
+            checkpoint.completed_at = timezone.now()
+            checkpoint.save()
+
+        return checkpoint
+
+    def checkpoint(self) -> Backfill:
+        """
+        The runner's checkpoint. A dry run only reads it, starting afresh when
+        there is none or it has completed, and never saves it.
+        """
+        if not self.dry_run:
+            return Backfill.objects.get_or_create(runner=self.runner)[0]
+        return Backfill.objects.filter(runner=self.runner).first() or Backfill(runner=self.runner)
+
+    def enrich_and_checkpoint(self, batch: tuple[SummaryActivityTriathlon, ...], checkpoint: Backfill) -> None:
+        updated = self.enrich_batch(batch)
+
+        checkpoint.processed += len(batch)
+        checkpoint.updated += updated
+        starts = [a.start_date for a in batch if a.start_date is not None]
+        if starts:
+            checkpoint.before = min(starts)
+        if not self.dry_run:
+            checkpoint.save()
+        self.report(f"Processed {checkpoint.processed} activities, {checkpoint.updated} changed")
+
+    def enrich_batch(self, batch: tuple[SummaryActivityTriathlon, ...]) -> int:
+        """
+        Enrich every activity in the batch, waiting out the rate limit and
+        retrying whichever were refused. Returns how many changed.
+        """
+        pending = [a for a in batch if a.id is not None]
+        changed = 0
+
+        while pending:
+            if len(pending) == 1:
+                outcomes = [self.enrich(pending[0])]
+            else:
+                with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                    outcomes = list(pool.map(self.enrich_in_thread, pending))
+
+            changed += sum(1 for outcome in outcomes if outcome is True)
+            limited = [e for e in outcomes if isinstance(e, StravaRateLimitError)]
+            pending = [
+                a for a, outcome in zip(pending, outcomes, strict=True) if isinstance(outcome, StravaRateLimitError)
+            ]
+
+            if limited:
+                self.wait(max(e.retry_after for e in limited))
+
+        return changed
+
+    def wait(self, seconds: float) -> None:
+        self.report(f"Strava rate limit reached, waiting {seconds:.0f}s")
+        time.sleep(seconds)
+
+    def enrich_in_thread(self, activity: SummaryActivityTriathlon) -> bool | StravaRateLimitError:
+        # Pool threads start from an empty context, so the reserve is set again.
+        try:
+            with ratelimit.reserving(settings.STRAVA_RATE_LIMIT_BACKFILL_RESERVE):
+                return self.enrich(activity)
+        finally:
+            close_old_connections()
+
+    def enrich(self, activity: SummaryActivityTriathlon) -> bool | StravaRateLimitError:
+        assert activity.id is not None
+        enrich = EnrichActivity(self.runner, activity.id)
+        try:
+            if not self.dry_run:
+                return enrich() is not None
+            original, update = enrich.plan()
+        except StravaRateLimitError as error:
+            return error
+        except (StravaError, Http404):
+            logger.exception("Could not enrich activity %d", activity.id)
+            return False
+
+        if update == original:
+            return False
+        self.report(self.diff(activity.id, original, update))
+        return True
+
+    @staticmethod
+    def diff(activity_id: int, before: UpdatableActivity, after: UpdatableActivity) -> str:
+        """
+        The name then the description, as a unified diff.
+        """
+        lines = difflib.unified_diff(
+            [before.name or "", *(before.description or "").splitlines()],
+            [after.name or "", *(after.description or "").splitlines()],
+            fromfile=f"activities/{activity_id}",
+            tofile=f"activities/{activity_id} (enriched)",
+            lineterm="",
+        )
+        return "\n".join(lines)
@@ -0,0 +1,105 @@
+import logging
+import time
+from collections.abc import Callable
+from datetime import datetime
+from itertools import batched
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from strava.models import Activity, ActivitySummary, Runner, SummaryActivityTriathlon
+from weather import providers
+from weather.exceptions import WeatherUnavailableError
+from weather.models import Weather
+
+logger = logging.getLogger(__name__)
+
+
+class BackfillWeather:
+    """
+    Give activities that arrived too late for a live observation the weather
+    at the time and place they finished.
+
+    When and where each activity ended is recorded when it arrives, or else
+    read from the locally held activity list, so nothing is asked of Strava;
+    activities with neither are left alone. Observations are shared through
+    Weather.from_lat_long, so activities that finished together cost one call
+    between them. Work goes in batches with a pause between each, to keep
+    within the weather provider's limits, and activities older than the
+    provider's history reaches are passed over.
+    """
+
+    runner: Runner | None
+    batch_size: int
+    throttle: float
+    report: Callable[[str], None]
+
+    def __init__(
+        self,
+        runner: Runner | None = None,
+        batch_size: int | None = None,
+        throttle: float | None = None,
+        report: Callable[[str], None] = logger.info,
+    ):
+        self.runner = runner
+        self.batch_size = max(1, batch_size or settings.WEATHER_BACKFILL_BATCH_SIZE)
+        self.throttle = settings.WEATHER_BACKFILL_THROTTLE if throttle is None else throttle
+        self.report = report
+
+    def __call__(self) -> int:
+        updated = 0
+        for index, batch in enumerate(batched(self.pending().iterator(), self.batch_size)):
+            if index and self.throttle:
+                time.sleep(self.throttle)
+            updated += self.backfill_batch(batch)
+            self.report(f"Gave weather to {updated} activities")
+        return updated
+
+    def pending(self) -> QuerySet[Activity]:
+        activities = Activity.objects.filter(weather__isnull=True, type__in=Activity.WEATHER_TYPES)
+        if self.runner is not None:
+            activities = activities.filter(runner=self.runner)
+        if (history := providers.provider_class().history) is not None:
+            # Older than the provider's history reaches; asking would only fail.
+            activities = activities.exclude(end_date__lt=timezone.now() - history)
+        return activities.order_by("-strava_id")
+
+    def backfill_batch(self, batch: tuple[Activity, ...]) -> int:
+        summaries = ActivitySummary.objects.in_bulk([a.strava_id for a in batch], field_name="strava_id")
+
+        source = providers.provider_class()
+        changed = []
+        for activity in batch:
+            end = self.end(activity, summaries.get(activity.strava_id))
+            if end is None:
+                continue
+
+            latitude, longitude, end_date = end
+            if not source.reaches(end_date):
+                continue
+            try:
+                activity.weather = Weather.from_lat_long(latitude, longitude, end_date)
+            except WeatherUnavailableError as error:
+                logger.warning("No weather for activity %d: %s", activity.strava_id, error)
+                continue
+            changed.append(activity)
+
+        Activity.objects.bulk_update(changed, ["weather"])
+        return len(changed)
+
+    @staticmethod
+    def end(activity: Activity, summary: ActivitySummary | None) -> tuple[float, float, datetime] | None:
+        """
+        Where and when the activity finished, as recorded when it arrived or
+        else from the activity list.
+        """
+        if activity.end_date and activity.end_latitude is not None and activity.end_longitude is not None:
+            return activity.end_latitude, activity.end_longitude, activity.end_date
+        if summary is None:
+            return None
+
+        data = SummaryActivityTriathlon.model_validate(summary.data)
+        if not data.end_latlng or not data.end_date:
+            return None
+        return data.end_latlng.root[0], data.end_latlng.root[1], data.end_date
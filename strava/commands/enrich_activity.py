@@ -0,0 +1,97 @@
+import logging
+from collections.abc import Callable
+
+from strava import writes
+from strava.commands.find_or_create_activity import FindOrCreateActivity
+from strava.commands.update_comparison import UpdateComparison
+from strava.commands.update_triathlon_score import UpdateTriathlonScore
+from strava.data_models import DetailedActivity, UpdatableActivity
+from strava.models import Activity, DetailedActivityTriathlon, Runner
+from strava.utils import ActivityPatch
+
+logger = logging.getLogger(__name__)
+
+
+class EnrichActivity:
+    """
+    Run every enrichment over one activity with a single fetch and at most one
+    write back to Strava.
+
+    Every stage adds its edits to one patch, which is applied in a single pass
+    over the name and description, so no stage races another with a PUT of
+    its own.
+    """
+
+    runner: Runner
+    activity_id: int
+    weather: bool
+    progress: Callable[[str], None]
+    # What was written back to Strava, if anything.
+    sent: UpdatableActivity | None
+
+    def __init__(
+        self,
+        runner: Runner,
+        activity_id: int,
+        weather: bool = False,
+        progress: Callable[[str], None] = lambda stage: None,
+    ):
+        """
+        ``progress`` is told as each stage completes: "fetched" once the
+        activity is in hand and "enriched" once the update is planned.
+        """
+        self.runner = runner
+        self.activity_id = activity_id
+        self.weather = weather
+        self.progress = progress
+        self.sent = None
+
+    def __call__(self) -> DetailedActivity | None:
+        # What is written back is built on this, so it must not be a cached
+        # copy from before the runner's own latest edit.
+        activity = self.runner.activity(self.activity_id, fresh=True)
+        self.progress("fetched")
+        self.refresh_route(activity)
+        original, update = self.plan(activity)
+        self.progress("enriched")
+
+        if update == original:
+            logger.info("Activity already enriched: %d", self.activity_id)
+            return None
+
+        logger.info("Writing enrichment for activity: %d", self.activity_id)
+        written = self.runner.update_activity(self.activity_id, update)
+        writes.record(int(self.runner.strava_id), self.activity_id, update)
+        self.sent = update
+        return written
+
+    def plan(self, activity: DetailedActivityTriathlon | None = None) -> tuple[UpdatableActivity, UpdatableActivity]:
+        """
+        The activity's name and description as they are, and as enrichment
+        would leave them, without writing anything back.
+        """
+        runner = self.runner
+        logger.info("Enriching activity: %d", self.activity_id)
+        activity = activity or runner.activity(self.activity_id, fresh=True)
+
+        original = UpdatableActivity(name=activity.name or "", description=activity.description or "")
+        patch = ActivityPatch()
+        UpdateComparison(runner, self.activity_id).stage(activity, patch)
+        UpdateTriathlonScore(runner, self.activity_id).stage(activity, patch)
+
+        if self.weather:
+            record = FindOrCreateActivity(runner, self.activity_id, activity)()
+            if record.weather and record.type in Activity.WEATHER_TYPES:
+                record.stage_weather(patch)
+
+        return original, patch.apply(original)
+
+    def refresh_route(self, activity: DetailedActivityTriathlon) -> None:
+        """
+        Redraw the stored route of an activity we hold, if its polyline has
+        changed since it was drawn.
+        """
+        record = Activity.objects.filter(runner=self.runner, strava_id=self.activity_id).first()
+        if record and record.set_route(activity.map.polyline if activity.map else None):
+            record.save(update_fields=["route"])
+            logger.info("Updated route for activity: %d", self.activity_id)
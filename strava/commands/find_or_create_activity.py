@@ -1,7 +1,8 @@
 import datetime
 import logging
 
-from strava.models import Activity, Runner, Weather
+from strava.models import Activity, DetailedActivityTriathlon, Runner, Weather
+from weather.exceptions import WeatherUnavailableError
 
 logger = logging.getLogger(__name__)
 
@@ -11,10 +12,16 @@ class FindOrCreateActivity:
 
     runner: Runner
     activity_id: int
+    activity_data: DetailedActivityTriathlon | None
 
-    def __init__(self, runner: Runner, activity_id: int):
+    def __init__(self, runner: Runner, activity_id: int, activity_data: DetailedActivityTriathlon | None = None):
+        """
+        ``activity_data`` saves fetching the activity again when the caller
+        already has it.
+        """
         self.runner = runner
         self.activity_id = activity_id
+        self.activity_data = activity_data
         logger.debug(f"Initialized FindOrCreateActivity with runner={runner} and activity_id={activity_id}")
 
     def __call__(self) -> Activity:
@@ -25,7 +32,7 @@ class FindOrCreateActivity:
         except Activity.DoesNotExist:
             logger.info(f"Activity not found, fetching from Strava API: strava_id={self.activity_id}")
 
-            activity_data = self.runner.activity(self.activity_id)
+            activity_data = self.activity_data or self.runner.activity(self.activity_id)
             assert activity_data.id is not None, "Activity data should not be None"
 
             weather: Weather | None = None
@@ -42,7 +49,11 @@ class FindOrCreateActivity:
                 lat: float = activity_data.end_latlng.root[0]
                 lng: float = activity_data.end_latlng.root[1]
                 logger.info(f"Fetching weather for lat={lat}, lng={lng}")
-                weather = Weather.from_lat_long(lat, lng)
+                try:
+                    weather = Weather.from_lat_long(lat, lng)
+                except WeatherUnavailableError as error:
+                    # The rest of the enrichment goes ahead; the weather backfill can try again later.
+                    logger.warning(f"No weather for strava_id={self.activity_id}: {error}")
             else:
                 start_date = activity_data.start_date
                 diff = abs((now - start_date).total_seconds()) if start_date else None
@@ -53,12 +64,17 @@ class FindOrCreateActivity:
                     f"diff: {diff}"
                 )
 
-            activity = Activity.objects.create(
+            activity = Activity(
                 strava_id=activity_data.id,
                 type=activity_data.type.value if activity_data.type is not None else "",
                 runner=self.runner,
                 weather=weather,
+                end_date=activity_data.end_date,
             )
+            if activity_data.end_latlng:
+                activity.end_latitude, activity.end_longitude = activity_data.end_latlng.root[:2]
+            activity.set_route(activity_data.map.polyline if activity_data.map else None)
+            activity.save()
             logger.info(f"Created new Activity: {activity}")
 
         if not isinstance(activity, Activity):
@@ -0,0 +1,183 @@
+import logging
+from collections.abc import Callable
+from datetime import timedelta
+from functools import partial
+from itertools import groupby
+from operator import attrgetter
+from typing import ClassVar
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, QuerySet
+from django.utils import timezone
+
+from strava.commands.enrich_activity import EnrichActivity
+from strava.exceptions import StravaRateLimitError
+from strava.models import Event
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessEvents:
+    """
+    Work through webhook events, claiming them in batches so any number of
+    workers can drain the table at once.
+
+    A batch is selected FOR UPDATE SKIP LOCKED and given a lease before the
+    lock is let go, so each event is worked by one worker at a time, and one
+    whose worker died is claimed again once its lease runs out. The events of
+    a batch that are about the same object are handled together, with one
+    enrichment between them.
+
+    Each event moves through the states of the enrichment as it goes, and
+    ends written, or failed to be retried until STRAVA_EVENT_MAX_ATTEMPTS.
+    Updates that only echo our own write back are ignored. Only activities
+    that are created or updated are enriched; see ROUTES.
+    Any other error fails the group it was raised by and the rest of the batch
+    carries on. A rate limit puts what is left of the batch back unclaimed and
+    is raised to the caller.
+    """
+
+    # Which handler each kind of event goes to; anything else is ignored.
+    ROUTES: ClassVar[dict[tuple[str, str], str]] = {
+        ("activity", "create"): "enrich",
+        ("activity", "update"): "enrich",
+        ("activity", "delete"): "delete_activity",
+        ("athlete", "update"): "update_athlete",
+    }
+
+    events: QuerySet[Event]
+    batch_size: int
+    # Whether updates still inside STRAVA_EVENT_DEBOUNCE are left to the job
+    # queued for them, so a burst of edits is still taken together.
+    debounce: bool
+
+    def __init__(self, events: QuerySet[Event] | None = None, batch_size: int = 50):
+        """
+        Without ``events`` every event is drained, as the scheduled command
+        does, and recent updates are left to their own jobs.
+        """
+        self.debounce = events is None
+        self.events = Event.objects.all() if events is None else events
+        self.batch_size = max(1, batch_size)
+
+    def __call__(self) -> int:
+        handled = 0
+        while batch := self.claim():
+            groups = [list(g) for _, g in groupby(batch, key=attrgetter("owner_id", "object_type", "object_id"))]
+            for index, group in enumerate(groups):
+                try:
+                    self.handle(group)
+                except StravaRateLimitError:
+                    # Nothing more can be fetched, so the rest of the batch goes back too.
+                    self.release([event for rest in groups[index:] for event in rest])
+                    raise
+            handled += len(batch)
+        return handled
+
+    def claimable(self) -> QuerySet[Event]:
+        now = timezone.now()
+        expired = now - timedelta(seconds=settings.STRAVA_EVENT_LEASE)
+        claimable = self.events.filter(processed=False).filter(Q(claimed_at__isnull=True) | Q(claimed_at__lt=expired))
+        if self.debounce:
+            settling = now - timedelta(seconds=settings.STRAVA_EVENT_DEBOUNCE)
+            claimable = claimable.exclude(aspect_type=Event.ASPECT_TYPES["update"], received_at__gt=settling)
+        return claimable
+
+    def claim(self) -> list[Event]:
+        with transaction.atomic():
+            batch = list(
+                self.claimable()
+                .select_for_update(skip_locked=True, of=("self",))
+                .select_related("owner")
+                .order_by("owner_id", "object_type", "object_id", "pk")[: self.batch_size]
+            )
+            Event.objects.filter(pk__in=[event.pk for event in batch]).update(
+                claimed_at=timezone.now(), attempts=F("attempts") + 1
+            )
+        return batch
+
+    def handle(self, events: list[Event]) -> None:
+        if echoes := [event for event in events if event.is_echo()]:
+            Event.objects.filter(pk__in=[event.pk for event in echoes]).update(
+                state=Event.STATES["ignored"], processed=True
+            )
+            logger.info(
+                "Ignored %d echoes of our own write to %s %d", len(echoes), echoes[0].object_type, echoes[0].object_id
+            )
+            events = [event for event in events if event not in echoes]
+            if not events:
+                return
+
+        handler = self.route(events)
+        if handler is None:
+            Event.objects.filter(pk__in=[event.pk for event in events]).update(
+                state=Event.STATES["ignored"], processed=True
+            )
+            return
+
+        object_type, object_id = events[0].object_type, events[0].object_id
+        try:
+            handler(events)
+        except StravaRateLimitError:
+            raise
+        except Exception as error:
+            logger.exception("Could not process events for %s %d", object_type, object_id)
+            self.fail(events, error)
+        else:
+            logger.info("Processed %d events for %s %d", len(events), object_type, object_id)
+
+    def route(self, events: list[Event]) -> Callable[[list[Event]], None] | None:
+        """
+        The handler for a group of events about one object. A deleted object
+        is past enriching, and a new one is enriched with its weather, so the
+        group goes where its weightiest aspect sends it.
+        """
+        aspects = {event.aspect_type for event in events}
+        aspect = next(aspect for aspect in ("delete", "create", "update") if aspect in aspects)
+        name = self.ROUTES.get((events[0].object_type, aspect))
+        return getattr(self, name) if name else None
+
+    def enrich(self, events: list[Event]) -> None:
+        runner, object_id = events[0].owner, events[0].object_id
+        aspects = list(dict.fromkeys(event.aspect_type for event in events))
+        for aspect_type in aspects:
+            runner.invalidate_activity(object_id, aspect_type)
+
+        # Weather is captured once, when the activity first arrives.
+        weather = Event.ASPECT_TYPES["create"] in aspects
+        enrich = EnrichActivity(runner, object_id, weather=weather, progress=partial(Event.transition, events))
+        enrich()
+
+        sent = enrich.sent.model_dump(include={"name", "description"}) if enrich.sent else None
+        self.complete(events, sent=sent)
+
+    def delete_activity(self, events: list[Event]) -> None:
+        events[0].owner.invalidate_activity(events[0].object_id, Event.ASPECT_TYPES["delete"])
+        self.complete(events)
+
+    def update_athlete(self, events: list[Event]) -> None:
+        # The only athlete update Strava sends is a deauthorisation.
+        if any((event.updates or {}).get("authorized") == "false" for event in events):
+            logger.info("Runner %s deauthorised us, revoking", events[0].owner)
+            events[0].owner.revoke()
+        self.complete(events)
+
+    @staticmethod
+    def complete(events: list[Event], sent: dict | None = None) -> None:
+        Event.transition(events, Event.STATES["written"], processed=True, error="", sent=sent)
+
+    @staticmethod
+    def release(events: list[Event]) -> None:
+        """
+        Hand the events back without counting the attempt.
+        """
+        Event.objects.filter(pk__in=[event.pk for event in events]).update(claimed_at=None, attempts=F("attempts") - 1)
+
+    @staticmethod
+    def fail(events: list[Event], error: Exception) -> None:
+        # The lease is left in place, so a retry waits for it to run out.
+        Event.transition(events, Event.STATES["failed"], error=str(error))
+        Event.objects.filter(
+            pk__in=[event.pk for event in events], attempts__gte=settings.STRAVA_EVENT_MAX_ATTEMPTS
+        ).update(processed=True)
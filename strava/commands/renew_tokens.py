@@ -0,0 +1,35 @@
+import logging
+
+from django.conf import settings
+
+from strava.exceptions import StravaError
+from strava.models import Runner
+
+logger = logging.getLogger(__name__)
+
+
+class RenewTokens:
+    """
+    Refresh every runner's token that will expire within the window, so a
+    burst of webhooks never has to wait on a refresh.
+    """
+
+    within: int
+
+    def __init__(self, within: int | None = None):
+        self.within = settings.STRAVA_TOKEN_RENEW_WINDOW if within is None else within
+
+    def __call__(self) -> int:
+        renewed = 0
+        for runner in Runner.objects.exclude(refresh_token="").iterator():
+            if not runner.token_expiring(self.within):
+                continue
+            try:
+                runner.refresh_token_if_expiring(self.within)
+            except StravaError:
+                logger.exception("Could not renew token for runner %s", runner)
+                continue
+            renewed += 1
+
+        logger.info("Renewed %d tokens", renewed)
+        return renewed
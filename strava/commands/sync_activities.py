@@ -0,0 +1,116 @@
+import logging
+from typing import ClassVar
+
+from django.db.models import Max
+from django.utils import timezone
+
+from asgiref.sync import sync_to_async
+
+from strava.models import ActivitySummary, Runner, SummaryActivityTriathlon
+
+logger = logging.getLogger(__name__)
+
+
+class SyncActivities:
+    """
+    Bring a runner's local activity list up to date with Strava.
+
+    Only activities that started after the newest one already held are asked
+    for, unless a webhook has moved the cursor back to pick up an edit, so a
+    routine sync is a single short page.
+    """
+
+    PER_PAGE = 200
+    SYNCED_FIELDS: ClassVar[list[str]] = ["activities_synced_at", "activities_resync_after"]
+
+    runner: Runner
+    force: bool
+
+    def __init__(self, runner: Runner, force: bool = False):
+        self.runner = runner
+        self.force = force
+
+    def __call__(self) -> int:
+        runner = self.runner
+
+        if not self.force and not runner.activities_stale():
+            logger.debug("Activities for runner %s are fresh, not syncing", runner)
+            return 0
+
+        after = runner.activities_resync_after or self.newest_start_date()
+        logger.info("Syncing activities for runner %s after %s", runner, after)
+
+        synced = 0
+        batch: list[ActivitySummary] = []
+        for activity in runner.get_activities(after=after, per_page=self.PER_PAGE):
+            if activity.id is None:
+                continue
+            batch.append(self.summary(activity))
+            if len(batch) >= self.PER_PAGE:
+                synced += self.save(batch)
+                batch = []
+        synced += self.save(batch)
+
+        self.mark_synced()
+        runner.save(update_fields=self.SYNCED_FIELDS)
+
+        logger.info("Synced %d activities for runner %s", synced, runner)
+        return synced
+
+    async def acall(self) -> int:
+        """
+        The same sync for async views, with the pages fetched on the event loop.
+        """
+        runner = self.runner
+
+        if not self.force and not runner.activities_stale():
+            logger.debug("Activities for runner %s are fresh, not syncing", runner)
+            return 0
+
+        after = runner.activities_resync_after or await sync_to_async(self.newest_start_date)()
+        logger.info("Syncing activities for runner %s after %s", runner, after)
+
+        synced = 0
+        batch: list[ActivitySummary] = []
+        async for activity in runner.aget_activities(after=after, per_page=self.PER_PAGE):
+            if activity.id is None:
+                continue
+            batch.append(self.summary(activity))
+            if len(batch) >= self.PER_PAGE:
+                synced += await sync_to_async(self.save)(batch)
+                batch = []
+        synced += await sync_to_async(self.save)(batch)
+
+        self.mark_synced()
+        await runner.asave(update_fields=self.SYNCED_FIELDS)
+
+        logger.info("Synced %d activities for runner %s", synced, runner)
+        return synced
+
+    def summary(self, activity: SummaryActivityTriathlon) -> ActivitySummary:
+        assert activity.id is not None
+        return ActivitySummary(
+            runner=self.runner,
+            strava_id=activity.id,
+            start_date=activity.start_date,
+            data=activity.model_dump(mode="json", exclude_none=True),
+        )
+
+    def mark_synced(self) -> None:
+        self.runner.activities_synced_at = timezone.now()
+        self.runner.activities_resync_after = None
+
+    def newest_start_date(self):
+        return ActivitySummary.objects.filter(runner=self.runner).aggregate(newest=Max("start_date"))["newest"]
+
+    @staticmethod
+    def save(batch: list[ActivitySummary]) -> int:
+        if not batch:
+            return 0
+        ActivitySummary.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=["strava_id"],
+            update_fields=["start_date", "data"],
+        )
+        return len(batch)
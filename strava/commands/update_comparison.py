@@ -1,14 +1,16 @@
 import logging
+import random
 
+from strava.animals import SpeedIndex, speed_index
 from strava.data_models import UpdatableActivity
 from strava.models import Animal, DetailedActivityTriathlon, Runner
-from strava.utils import MarkedString
+from strava.utils import MARKERS, ActivityPatch, MarkedString
 
 logger = logging.getLogger(__name__)
 
 
 class UpdateComparison:
-    MARKER_STRING = "\ufe03\ufe04"
+    MARKER_STRING = MARKERS.register("\ufe03\ufe04")
 
     runner: Runner
     activity_id: int
@@ -23,18 +25,32 @@ class UpdateComparison:
         activity = runner.activity(self.activity_id)
         logger.debug("Activity data: %s", activity)
 
-        original_description = activity.description or ""
+        original = UpdatableActivity(description=activity.description or "")
+        patch = ActivityPatch()
+        self.stage(activity, patch)
+        update = patch.apply(original)
 
-        if not runner.enrichment.animal_comparison:
-            description = MarkedString("", self.MARKER_STRING).remove_from_text(original_description)
-            if description == original_description:
-                return
-            runner.update_activity(self.activity_id, UpdatableActivity(description=description))
-            logger.info("Removed comparison for activity: %d", self.activity_id)
+        if update == original:
+            logger.info("Comparison already up to date for activity: %d", self.activity_id)
             return
 
-        slower = self.get_slower(activity)
-        faster = self.get_faster(activity)
+        runner.update_activity(self.activity_id, update)
+        logger.info("Updated comparison for activity: %d", self.activity_id)
+
+    def stage(self, activity: DetailedActivityTriathlon, patch: ActivityPatch) -> None:
+        """
+        The comparison stage of enrichment, added to a pending patch.
+        """
+        if not self.runner.enrichment.animal_comparison:
+            patch.remove("description", self.MARKER_STRING)
+            return
+
+        # Seeded by the activity, so enriching it again picks the same animals
+        # and leaves the description as it was.
+        rng = random.Random(self.activity_id)
+        index = speed_index()
+        slower = self.get_slower(activity, rng, index)
+        faster = self.get_faster(activity, rng, index)
 
         if faster is None or slower is None:
             logger.warning("Could not determine both faster and slower animals.")
@@ -44,24 +60,20 @@ class UpdateComparison:
             f"This was faster than a {slower.name} but slower than a {faster.name}.", self.MARKER_STRING
         )
         logger.debug("Score string: %s", score_string)
-        update = UpdatableActivity(
-            description=score_string.replace_or_append(original_description),
-        )
-        runner.update_activity(self.activity_id, update)
-        logger.info("Updated comparison for activity: %d", self.activity_id)
+        patch.put("description", score_string)
 
-    def get_faster(self, activity: DetailedActivityTriathlon) -> Animal | None:
+    def get_faster(
+        self, activity: DetailedActivityTriathlon, rng: random.Random | None = None, index: SpeedIndex | None = None
+    ) -> Animal | None:
         if kph := self.get_kph(activity):
-            animals = Animal.objects.filter(max_speed__gt=kph).order_by("?")
-            if animals.exists():
-                return animals.first()
+            return (index or speed_index()).random_faster(kph, rng)
         return None
 
-    def get_slower(self, activity: DetailedActivityTriathlon) -> Animal | None:
+    def get_slower(
+        self, activity: DetailedActivityTriathlon, rng: random.Random | None = None, index: SpeedIndex | None = None
+    ) -> Animal | None:
         if kph := self.get_kph(activity):
-            animals = Animal.objects.filter(max_speed__lt=kph).order_by("?")
-            if animals.exists():
-                return animals.first()
+            return (index or speed_index()).random_slower(kph, rng)
         return None
 
     def get_kph(self, activity: DetailedActivityTriathlon) -> float | None:
@@ -1,14 +1,14 @@
 import logging
 
 from strava.data_models import UpdatableActivity
-from strava.models import Runner
-from strava.utils import MarkedString
+from strava.models import DetailedActivityTriathlon, Runner
+from strava.utils import MARKERS, ActivityPatch, MarkedString
 
 logger = logging.getLogger(__name__)
 
 
 class UpdateTriathlonScore:
-    MARKER_STRING = "\ufe01\ufe02"
+    MARKER_STRING = MARKERS.register("\ufe01\ufe02")
 
     runner: Runner
     activity_id: int
@@ -23,26 +23,32 @@ class UpdateTriathlonScore:
         activity = runner.activity(self.activity_id)
         logger.debug("Activity data: %s", activity)
 
+        original = UpdatableActivity(name=activity.name or "", description=activity.description or "")
+        patch = ActivityPatch()
+        self.stage(activity, patch)
+        update = patch.apply(original)
+
+        if update == original:
+            logger.info("Triathlon score already up to date for activity: %d", self.activity_id)
+            return
+
+        runner.update_activity(self.activity_id, update)
+        logger.info("Updated triathlon score for activity: %d", self.activity_id)
+
+    def stage(self, activity: DetailedActivityTriathlon, patch: ActivityPatch) -> None:
+        """
+        The triathlon score stage of enrichment, added to a pending patch.
+        """
         score: float = activity.triathlon_percentage() / 100
         if score == 0:
             return
         score_string = MarkedString(f"tri%: {score:.2f}.", self.MARKER_STRING)
         logger.debug("Score string: %s", score_string)
 
-        original_description = activity.description or ""
-        description = (
-            score_string.replace_or_append(original_description)
-            if runner.enrichment.triathlon_score
-            else score_string.remove_from_text(original_description)
-        )
+        if self.runner.enrichment.triathlon_score:
+            patch.put("description", score_string)
+        else:
+            patch.remove("description", self.MARKER_STRING)
 
         # The score has never belonged in the name; strip it either way.
-        name = score_string.remove_from_text(activity.name or "")
-
-        if description == original_description and name == (activity.name or ""):
-            logger.info("Triathlon score already up to date for activity: %d", self.activity_id)
-            return
-
-        update = UpdatableActivity(name=name, description=description)
-        runner.update_activity(self.activity_id, update)
-        logger.info("Updated triathlon score for activity: %d", self.activity_id)
+        patch.remove("name", self.MARKER_STRING)
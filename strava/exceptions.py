@@ -10,6 +10,12 @@ class StravaPaidFeatureError(StravaError):
     pass
 
 
+class StravaRateLimitError(StravaError):
+    def __init__(self, retry_after: float):
+        super().__init__(f"Strava rate limit reached, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
 class StravaNotFoundError(StravaError):
     def __init__(self, url: str):
         super().__init__(f"Resource not found at URL: {url}")
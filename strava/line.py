@@ -1,6 +1,7 @@
 # Standard Library
 import math
 from dataclasses import dataclass
+from itertools import compress, pairwise, starmap
 
 Number = int | float
 Point = tuple[Number, Number]
@@ -14,26 +15,86 @@ class Line:
 
     @property
     def length(self):
-        lengths = []
-        pc = None
-        for c in self.coordinates:
-            if pc is not None:
-                lengths.append(math.hypot(pc[0] - c[0], pc[1] - c[1]))
-            pc = c
-
-        return sum(lengths)
+        return math.fsum(starmap(math.dist, pairwise(self.coordinates)))
 
     def fit(self, size: Size, padding: Number = 5):
-        self.rotate()
-        self.normalize()
+        """
+        Rotate, normalize, scale and center the line to fill ``size``, less the
+        padding (a percentage of the width).
+
+        The same as calling each step in turn, worked out from the bounds as a
+        single transform so the coordinates are only rebuilt once.
+        """
+        if not self.coordinates:
+            return
+
+        xs, ys = zip(*self.coordinates, strict=True)
+        min_x, max_x = min(xs), max(xs)
+        min_y, max_y = min(ys), max(ys)
 
-        def per(val):
-            return round((val / 100) * padding)
+        # A quarter turn puts y along the width and x, reversed, down the height.
+        width = max_y - min_y
+        height = max_x - min_x
 
-        p = max([per(size[0]), per(size[0])])
+        p = round((size[0] / 100) * padding)
+        to = (size[0] - p, size[1] - p)
 
-        self.scale((size[0] - p, size[1] - p))
-        self.center(size)
+        img_landscape = to[0] > to[1]
+        map_landscape = width > height
+        m_to = min(to) if img_landscape != map_landscape else max(to)
+        extent = max(width, height)
+        mul = m_to / extent if extent else 0
+
+        m_x = (size[0] - round(width * mul)) / 2
+        m_y = (size[1] - round(height * mul)) / 2
+
+        self.coordinates = [
+            (round((y - min_y) * mul) + m_x, round((max_x - x) * mul) + m_y) for x, y in self.coordinates
+        ]
+
+    def simplify(self, tolerance: Number = 0.5):
+        """
+        Drop the points that lie within ``tolerance`` of the line drawn without
+        them (Ramer-Douglas-Peucker). After ``fit`` the tolerance is in pixels,
+        so the default removes only points that would not change the drawing.
+
+        Distances are measured to the segment rather than the infinite line,
+        so the far end of an out-and-back route is kept.
+        """
+        # Consecutive points that land on the same pixel go first; it is cheap
+        # and leaves far fewer for the search below.
+        if not self.coordinates:
+            return
+        points = [self.coordinates[0], *(b for a, b in pairwise(self.coordinates) if a != b)]
+        if len(points) < 3:  # noqa: PLR2004
+            self.coordinates = points
+            return
+
+        keep = [False] * len(points)
+        keep[0] = keep[-1] = True
+        tolerance_sq = tolerance * tolerance
+
+        stack = [(0, len(points) - 1)]
+        while stack:
+            start, end = stack.pop()
+            ax, ay = points[start]
+            dx, dy = points[end][0] - ax, points[end][1] - ay
+            segment_sq = dx * dx + dy * dy
+
+            furthest_sq, furthest = 0.0, 0
+            for i in range(start + 1, end):
+                px, py = points[i][0] - ax, points[i][1] - ay
+                t = min(1, max(0, (px * dx + py * dy) / segment_sq)) if segment_sq else 0
+                ex, ey = px - t * dx, py - t * dy
+                if (distance_sq := ex * ex + ey * ey) > furthest_sq:
+                    furthest_sq, furthest = distance_sq, i
+
+            if furthest_sq > tolerance_sq:
+                keep[furthest] = True
+                stack.append((start, furthest))
+                stack.append((furthest, end))
+
+        self.coordinates = list(compress(points, keep))
 
     def swap(self):
         self.coordinates = [(c[1], c[0]) for c in self.coordinates]
@@ -72,26 +133,23 @@ class Line:
         self.coordinates = [(s(c[0]), s(c[1])) for c in self.coordinates]
 
     def rotate(self):
-        def rotate_point(origin: Point, point: Point, angle: float) -> Point:
-            ox, oy = origin
-            px, py = point
-
-            qx = ox + math.cos(angle) * (px - ox) - math.sin(angle) * (py - oy)
-            qy = oy + math.sin(angle) * (px - ox) + math.cos(angle) * (py - oy)
-            return (qx, qy)
+        ox = max(p[0] for p in self.coordinates) / 2
+        oy = max(p[1] for p in self.coordinates) / 2
 
-        o = (max(p[0] for p in self.coordinates) / 2, max(p[1] for p in self.coordinates) / 2)
+        angle = math.radians(-90)
+        cos, sin = math.cos(angle), math.sin(angle)
 
-        self.coordinates = [rotate_point(o, c, math.radians(-90)) for c in self.coordinates]
+        self.coordinates = [
+            (ox + cos * (px - ox) - sin * (py - oy), oy + sin * (px - ox) + cos * (py - oy))
+            for px, py in self.coordinates
+        ]
 
     def svg_path(self):
-        path = []
-        op = "M"
-        for c in self.coordinates:
-            path.append(f"{op} {round(c[0])} {round(c[1])}")
-            op = "L"
+        if not self.coordinates:
+            return ""
 
-        return " ".join(path)
+        (x, y), *rest = self.coordinates
+        return " ".join([f"M {round(x)} {round(y)}", *(f"L {round(x)} {round(y)}" for x, y in rest)])
 
     def __str__(self) -> str:
         return self.svg_path()
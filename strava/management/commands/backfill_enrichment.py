@@ -0,0 +1,44 @@
+import argparse
+
+from django.core.management.base import BaseCommand, CommandError
+
+from strava.commands import BackfillEnrichment
+from strava.models import Runner
+from strava.tasks.backfill_enrichment import backfill_enrichment
+
+
+class Command(BaseCommand):
+    help: str = "Apply the triathlon score and animal comparison to a runner's whole Strava history"
+
+    def add_arguments(self, parser: argparse.ArgumentParser):
+        parser.add_argument("strava_id", type=str, help="Strava id of the runner to backfill")
+        parser.add_argument("--concurrency", type=int, default=4, help="Activities to enrich at once")
+        parser.add_argument("--dry-run", action="store_true", help="Show the changes without writing them")
+        parser.add_argument("--restart", action="store_true", help="Start again from the newest activity")
+        parser.add_argument("--background", action="store_true", help="Queue the backfill for the worker")
+
+    def handle(self, *args, **options):
+        try:
+            runner = Runner.objects.get(strava_id=options["strava_id"])
+        except Runner.DoesNotExist:
+            raise CommandError(f"No runner with Strava id {options['strava_id']}")
+
+        if options["background"]:
+            if options["dry_run"] or options["restart"]:
+                raise CommandError("--dry-run and --restart cannot be queued")
+            result = backfill_enrichment.enqueue(runner.pk, options["concurrency"])
+            self.stdout.write(self.style.SUCCESS(f"Queued backfill {result.id}"))
+            return
+
+        backfill = BackfillEnrichment(
+            runner,
+            concurrency=options["concurrency"],
+            dry_run=options["dry_run"],
+            restart=options["restart"],
+            report=self.stdout.write,
+        )
+        checkpoint = backfill()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Backfill processed {checkpoint.processed} activities, {checkpoint.updated} changed")
+        )
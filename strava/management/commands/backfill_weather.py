@@ -0,0 +1,40 @@
+import argparse
+
+from django.core.management.base import BaseCommand, CommandError
+
+from strava.commands import BackfillWeather
+from strava.models import Runner
+from strava.tasks.backfill_weather import backfill_weather
+
+
+class Command(BaseCommand):
+    help: str = "Fetch the weather at the time for activities that arrived too late to be given it"
+
+    def add_arguments(self, parser: argparse.ArgumentParser):
+        parser.add_argument("strava_id", type=str, nargs="?", help="Strava id of the runner; all runners if omitted")
+        parser.add_argument("--batch-size", type=int, help="Activities to give weather between pauses")
+        parser.add_argument("--throttle", type=float, help="Seconds to pause between batches")
+        parser.add_argument("--background", action="store_true", help="Queue the backfill for the worker")
+
+    def handle(self, *args, **options):
+        runner = None
+        if options["strava_id"]:
+            try:
+                runner = Runner.objects.get(strava_id=options["strava_id"])
+            except Runner.DoesNotExist:
+                raise CommandError(f"No runner with Strava id {options['strava_id']}")
+
+        if options["background"]:
+            result = backfill_weather.enqueue(runner.pk if runner else None)
+            self.stdout.write(self.style.SUCCESS(f"Queued weather backfill {result.id}"))
+            return
+
+        backfill = BackfillWeather(
+            runner,
+            batch_size=options["batch_size"],
+            throttle=options["throttle"],
+            report=self.stdout.write,
+        )
+        updated = backfill()
+
+        self.stdout.write(self.style.SUCCESS(f"Weather backfill gave weather to {updated} activities"))
@@ -6,6 +6,7 @@ from statistics import mean
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
+from strava import animals
 from strava.models import Animal
 
 
@@ -50,7 +51,7 @@ class Command(BaseCommand):
         self.stdout.write(f"Starting data import from {csv_file_path}...")
 
         try:
-            with open(csv_file_path, encoding="utf-8") as file:
+            with open(csv_file_path, encoding="utf-8") as file, animals.deferring():
                 reader = csv.DictReader(file)
 
                 with transaction.atomic():
@@ -0,0 +1,25 @@
+import argparse
+
+from django.core.management.base import BaseCommand
+
+from strava.commands import ProcessEvents
+from strava.exceptions import StravaRateLimitError
+from strava.models import Event
+
+
+class Command(BaseCommand):
+    help: str = "Process every webhook event still waiting, in claimed batches safe to run from several workers"
+
+    def add_arguments(self, parser: argparse.ArgumentParser):
+        parser.add_argument("--batch-size", type=int, default=50, help="Events to claim at a time")
+
+    def handle(self, *args, **options):
+        process = ProcessEvents(batch_size=options["batch_size"])
+        try:
+            handled = process()
+        except StravaRateLimitError as error:
+            waiting = Event.objects.filter(processed=False).count()
+            self.stdout.write(self.style.WARNING(f"{error}; {waiting} events still waiting"))
+            return
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {handled} events"))
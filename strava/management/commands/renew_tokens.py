@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from strava.tasks.renew_tokens import renew_tokens
+
+
+class Command(BaseCommand):
+    help: str = "Queue a renewal of Strava tokens that are about to expire"
+
+    def handle(self, *args, **options):
+        result = renew_tokens.enqueue()
+        self.stdout.write(self.style.SUCCESS(f"Queued token renewal {result.id}"))
@@ -1,18 +1,26 @@
 from django.contrib.auth import logout
-from django.http import HttpResponseRedirect
+from django.http import HttpResponse, HttpResponseRedirect
 from django.urls import reverse_lazy
+from django.utils.deprecation import MiddlewareMixin
 
-from strava.exceptions import StravaNotAuthenticatedError
+from strava.exceptions import StravaNotAuthenticatedError, StravaRateLimitError
 
 
-class NotAuthenticated:
-    def __init__(self, get_response):
-        self.get_response = get_response
-
-    def __call__(self, request):
-        return self.get_response(request)
-
+class NotAuthenticated(MiddlewareMixin):
     def process_exception(self, request, exception):
         if isinstance(exception, StravaNotAuthenticatedError):
             logout(request)
             return HttpResponseRedirect(reverse_lazy("strava:auth"))
+
+
+class RateLimited(MiddlewareMixin):
+    """
+    Answer with a 503 and a Retry-After when Strava's budget is spent, rather
+    than a server error.
+    """
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, StravaRateLimitError):
+            response = HttpResponse("Strava is busy, please try again shortly.", status=503)
+            response["Retry-After"] = str(round(exception.retry_after))
+            return response
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.16 on 2026-10-18 16:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("strava", "0024_runnersettings"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="runner",
+            name="activities_resync_after",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="runner",
+            name="activities_synced_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="ActivitySummary",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("strava_id", models.BigIntegerField(unique=True)),
+                ("start_date", models.DateTimeField(blank=True, null=True)),
+                ("data", models.JSONField(default=dict)),
+                (
+                    "runner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="activity_summaries",
+                        to="strava.runner",
+                        to_field="strava_id",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "activity summaries",
+                "indexes": [models.Index(fields=["runner", "-start_date"], name="strava_summary_runner_start")],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.16 on 2026-10-18 16:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("strava", "0025_activitysummary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Backfill",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("before", models.DateTimeField(blank=True, null=True)),
+                ("processed", models.PositiveIntegerField(default=0)),
+                ("updated", models.PositiveIntegerField(default=0)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "runner",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="backfill", to="strava.runner"
+                    ),
+                ),
+            ],
+        ),
+    ]
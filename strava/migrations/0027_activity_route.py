@@ -0,0 +1,18 @@
+# Generated by Django 5.2.16 on 2026-10-18 16:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("strava", "0026_backfill"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="activity",
+            name="route",
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
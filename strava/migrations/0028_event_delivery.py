@@ -0,0 +1,32 @@
+# Generated by Django 5.2.16 on 2026-10-18 16:54
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_repeated_deliveries(apps, schema_editor):
+    Event = apps.get_model("strava", "Event")
+    delivery = ("object_id", "aspect_type", "event_time", "subscription_id")
+    first = Event.objects.values(*delivery).annotate(first=Min("pk")).values_list("first", flat=True)
+    Event.objects.exclude(pk__in=list(first)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("strava", "0027_activity_route"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_repeated_deliveries, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(fields=["object_type", "object_id", "processed"], name="strava_event_pending"),
+        ),
+        migrations.AddConstraint(
+            model_name="event",
+            constraint=models.UniqueConstraint(
+                fields=("object_id", "aspect_type", "event_time", "subscription_id"), name="strava_event_delivery"
+            ),
+        ),
+    ]
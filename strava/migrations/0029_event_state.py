@@ -0,0 +1,82 @@
+# Generated by Django 5.2.16 on 2026-10-18 16:58
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def mark_handled(apps, schema_editor):
+    # Events from before they were tracked were handled as they arrived.
+    Event = apps.get_model("strava", "Event")
+    Event.objects.update(processed=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("strava", "0028_event_delivery"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="attempts",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="claimed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="enriched_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="error",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="failed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="fetched_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="received_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="state",
+            field=models.CharField(
+                choices=[
+                    ("received", "received"),
+                    ("fetched", "fetched"),
+                    ("enriched", "enriched"),
+                    ("written", "written"),
+                    ("failed", "failed"),
+                ],
+                default="received",
+                max_length=16,
+            ),
+        ),
+        migrations.AddField(
+            model_name="event",
+            name="written_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_handled, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                condition=models.Q(("processed", False)), fields=["claimed_at"], name="strava_event_unprocessed"
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.16 on 2026-10-18 17:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("strava", "0029_event_state"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="sent",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="event",
+            name="state",
+            field=models.CharField(
+                choices=[
+                    ("received", "received"),
+                    ("fetched", "fetched"),
+                    ("enriched", "enriched"),
+                    ("written", "written"),
+                    ("failed", "failed"),
+                    ("ignored", "ignored"),
+                ],
+                default="received",
+                max_length=16,
+            ),
+        ),
+    ]
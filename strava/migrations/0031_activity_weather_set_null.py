@@ -0,0 +1,26 @@
+# Generated by Django 5.2.16 on 2026-10-18 17:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("strava", "0030_event_echo"),
+        ("weather", "0003_weather_geohash"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="activity",
+            name="weather",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="activities",
+                to="weather.weather",
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.16 on 2026-10-18 17:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("strava", "0031_activity_weather_set_null"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="activity",
+            name="end_date",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="activity",
+            name="end_latitude",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="activity",
+            name="end_longitude",
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
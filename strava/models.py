@@ -1,23 +1,38 @@
 import logging
 import time
-from collections.abc import Iterable
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime, timedelta
 from http import HTTPStatus
+from itertools import count
 from math import atan2, cos, radians, sin, sqrt
 from typing import Any, ClassVar, Literal, Self, TypeVar, cast
+from urllib.parse import urlencode
 
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Q
 from django.http import Http404
 from django.urls import reverse
+from django.utils import timezone
 
+import httpx
 import requests
+from asgiref.sync import sync_to_async
 from pydantic import BaseModel, ValidationError
 
-from strava.data_models import DetailedActivity, SummaryActivity, SummaryAthlete, UpdatableActivity
-from strava.exceptions import StravaError, StravaNotAuthenticatedError, StravaNotFoundError, StravaPaidFeatureError
+from strava import ratelimit, response_cache, routes, writes
+from strava.data_models import ActivityType, DetailedActivity, SummaryActivity, SummaryAthlete, UpdatableActivity
+from strava.exceptions import (
+    StravaError,
+    StravaNotAuthenticatedError,
+    StravaNotFoundError,
+    StravaPaidFeatureError,
+    StravaRateLimitError,
+)
 from strava.mixins import CleanEmptyLatLngMixin, TimeMixin, TriathlonMixin
-from strava.utils import MarkedString
+from strava.session import get_async_client, get_session
+from strava.utils import MARKERS, ActivityPatch, MarkedString
 from weather.models import Weather
 
 logger = logging.getLogger(__name__)
@@ -26,6 +41,9 @@ Point = tuple[float, float]
 
 T = TypeVar("T", bound=BaseModel)
 
+# Strava's own default; its maximum is 200.
+ACTIVITIES_PER_PAGE = 30
+
 
 class SummaryActivityTriathlon(CleanEmptyLatLngMixin, TriathlonMixin, TimeMixin, SummaryActivity):
     pass
@@ -42,6 +60,13 @@ class Runner(models.Model):
     refresh_token = models.CharField(max_length=512)
     user = models.OneToOneField(User, on_delete=models.CASCADE, blank=True, null=True)
 
+    # When the local activity list was last brought up to date, cleared by
+    # webhooks so the next page load syncs again.
+    activities_synced_at = models.DateTimeField(blank=True, null=True)
+    # An older point the next sync should start from, set when an activity we
+    # already hold is edited on Strava.
+    activities_resync_after = models.DateTimeField(blank=True, null=True)
+
     def __str__(self):
         return self.strava_id
 
@@ -112,12 +137,41 @@ class Runner(models.Model):
         self.access_token = data["access_token"]
         self.access_expires = data["expires_at"]
         self.refresh_token = data["refresh_token"]
-        self.save()
+        self.save(update_fields=["access_token", "access_expires", "refresh_token"])
+
+    def token_expiring(self, within: int | None = None) -> bool:
+        """
+        Whether the access token has expired or will within ``within`` seconds,
+        by default the STRAVA_TOKEN_REFRESH_SKEW allowed for slow calls.
+        """
+        within = settings.STRAVA_TOKEN_REFRESH_SKEW if within is None else within
+        return int(self.access_expires) - within < time.time()
+
+    def refresh_token_if_expiring(self, within: int | None = None, force: bool = False) -> None:
+        """
+        Refresh the token once, however many workers ask at the same time.
+
+        The row is locked for the refresh, and whoever gets it second finds the
+        token already renewed and takes that instead of spending the refresh
+        token again. ``force`` refreshes it even so, still under the lock, so it
+        spends the refresh token the first left. A runner with no refresh
+        token, after they deauthorised us, has to connect again.
+        """
+        with transaction.atomic():
+            locked = Runner.objects.select_for_update().get(pk=self.pk)
+            if force or locked.token_expiring(within):
+                if not locked.refresh_token:
+                    raise StravaNotAuthenticatedError()
+                locked.do_refresh_token()
+
+        self.access_token = locked.access_token
+        self.access_expires = locked.access_expires
+        self.refresh_token = locked.refresh_token
 
     @property
     def auth_code(self):
-        if int(self.access_expires) < time.time():
-            self.do_refresh_token()
+        if self.token_expiring():
+            self.refresh_token_if_expiring()
 
         return self.access_token
 
@@ -126,8 +180,62 @@ class Runner(models.Model):
         path: str,
         args: dict[str, Any] = {},
         method: str = "GET",
+        fresh: bool = False,
     ) -> dict[str, Any]:
-        return self._make_call(path, args, method, self.auth_code)
+        """
+        ``fresh`` asks Strava even while a cached GET is within its freshness
+        window, for reads that a write will be built on.
+        """
+        if method == "GET" and not args and (endpoint := response_cache.endpoint(path)):
+            return self._cached_call(path, endpoint, fresh)
+
+        result = self._make_call(path, args, method, self.auth_code)
+        if method != "GET":
+            response_cache.invalidate(self, path)
+        return result
+
+    async def amake_call(self, path: str) -> Any:
+        """
+        make_call for GETs from async views: the request itself is awaited on
+        the event loop, and the token, cache and rate limit bookkeeping either
+        side of it runs in a thread.
+        """
+        endpoint = response_cache.endpoint(path)
+
+        def prepare() -> tuple[str, response_cache.Entry | None]:
+            return self.auth_code, response_cache.lookup(self, path) if endpoint else None
+
+        authentication, entry = await sync_to_async(prepare)()
+        if endpoint and entry is not None and entry.is_fresh(endpoint):
+            return entry.data
+
+        response = await self._arequest(path, authentication, etag=entry.etag if entry else None)
+        if response.status_code == HTTPStatus.NOT_MODIFIED and entry is not None:
+            await sync_to_async(response_cache.store)(self, path, entry.data, entry.etag)
+            return entry.data
+
+        data = response.json()
+        if endpoint:
+            await sync_to_async(response_cache.store)(self, path, data, response.headers.get("ETag"))
+        return data
+
+    def _cached_call(self, path: str, endpoint: str, fresh: bool = False) -> Any:
+        """
+        A GET served from the response cache while fresh, and revalidated with
+        its ETag once it is not, or straight away if ``fresh``.
+        """
+        entry = response_cache.lookup(self, path)
+        if not fresh and entry is not None and entry.is_fresh(endpoint):
+            return entry.data
+
+        response = self._request(path, authentication=self.auth_code, etag=entry.etag if entry else None)
+        if response.status_code == HTTPStatus.NOT_MODIFIED and entry is not None:
+            response_cache.store(self, path, entry.data, entry.etag)
+            return entry.data
+
+        data = response.json()
+        response_cache.store(self, path, data, response.headers.get("ETag"))
+        return data
 
     @staticmethod
     def _strava_api_url(path: str) -> str:
@@ -141,8 +249,10 @@ class Runner(models.Model):
         method: str = "GET",
         authentication: str | None = None,
     ) -> dict[str, Any]:
-        url = cls._strava_api_url(path)
+        return cls._request(path, data, method, authentication).json()
 
+    @staticmethod
+    def _headers(authentication: str | None, etag: str | None) -> dict[str, str]:
         headers = {
             "Accept": "application/json",
             "Cache-Control": "no-cache",
@@ -153,21 +263,66 @@ class Runner(models.Model):
         if authentication is not None:
             headers["Authorization"] = f"Bearer {authentication}"
 
-        response = requests.request(method, url, headers=headers, data=data or {}, timeout=30)
+        if etag is not None:
+            headers["If-None-Match"] = etag
+
+        return headers
+
+    @classmethod
+    def _request(
+        cls,
+        path: str,
+        data: dict[str, Any] | None = None,
+        method: str = "GET",
+        authentication: str | None = None,
+        etag: str | None = None,
+    ) -> requests.Response:
+        url = cls._strava_api_url(path)
+        headers = cls._headers(authentication, etag)
+
+        ratelimit.acquire()
+        response = get_session().request(method, url, headers=headers, data=data or {}, timeout=30)
+        ratelimit.record(response.headers)
+
+        cls._check(url, response.status_code, response.text, etag)
+        return response
+
+    @classmethod
+    async def _arequest(cls, path: str, authentication: str | None = None, etag: str | None = None) -> httpx.Response:
+        url = cls._strava_api_url(path)
+        headers = cls._headers(authentication, etag)
+
+        await sync_to_async(ratelimit.acquire)()
+        response = await get_async_client().get(url, headers=headers)
+        await sync_to_async(ratelimit.record)(response.headers)
+
+        cls._check(url, response.status_code, response.text, etag)
+        return response
+
+    @staticmethod
+    def _check(url: str, status_code: int, text: str, etag: str | None) -> None:
+        """
+        Raise the StravaError for a response that is not a usable answer.
+        """
+        if status_code == HTTPStatus.OK:
+            return
+
+        if status_code == HTTPStatus.NOT_MODIFIED and etag is not None:
+            return
 
-        if response.status_code == HTTPStatus.OK:
-            return response.json()
+        if status_code == HTTPStatus.TOO_MANY_REQUESTS:
+            raise StravaRateLimitError(ratelimit.SHORT.resets_in(time.time()))
 
-        if response.status_code == HTTPStatus.UNAUTHORIZED:
+        if status_code == HTTPStatus.UNAUTHORIZED:
             raise StravaNotAuthenticatedError()
 
-        if response.status_code == HTTPStatus.PAYMENT_REQUIRED:
+        if status_code == HTTPStatus.PAYMENT_REQUIRED:
             raise StravaPaidFeatureError()
 
-        if response.status_code == HTTPStatus.NOT_FOUND:
+        if status_code == HTTPStatus.NOT_FOUND:
             raise StravaNotFoundError(url)
 
-        raise StravaError(f"Got {response.status_code} from strava, {response.text}")
+        raise StravaError(f"Got {status_code} from strava, {text}")
 
     def get_details(self) -> SummaryAthlete:
         try:
@@ -175,17 +330,155 @@ class Runner(models.Model):
         except ValidationError:
             raise Http404("Strava athlete not found or invalid data")
 
-    def get_activities(self) -> Iterable[SummaryActivityTriathlon]:
-        for activity in self.make_call("athlete/activities"):
+    async def aget_details(self) -> SummaryAthlete:
+        try:
+            return SummaryAthlete.model_validate(await self.amake_call("athlete"))
+        except ValidationError:
+            raise Http404("Strava athlete not found or invalid data")
+
+    def get_activities(
+        self,
+        before: datetime | None = None,
+        after: datetime | None = None,
+        per_page: int = ACTIVITIES_PER_PAGE,
+    ) -> Iterator[SummaryActivityTriathlon]:
+        """
+        The runner's activities, newest first, fetched a page at a time.
+
+        Pages are only requested as the caller iterates, and a short page ends
+        the history, so a caller that stops early never pays for the rest.
+        ``before`` and ``after`` are passed to Strava to bound the range
+        server-side.
+        """
+        for page in count(1):
+            data = self.make_call(self._activities_path(page, before, after, per_page))
+            yield from self._validate_activities(data)
+
+            if len(data) < per_page:
+                return
+
+    async def aget_activities(
+        self,
+        before: datetime | None = None,
+        after: datetime | None = None,
+        per_page: int = ACTIVITIES_PER_PAGE,
+    ) -> AsyncIterator[SummaryActivityTriathlon]:
+        for page in count(1):
+            data = await self.amake_call(self._activities_path(page, before, after, per_page))
+            for activity in self._validate_activities(data):
+                yield activity
+
+            if len(data) < per_page:
+                return
+
+    @staticmethod
+    def _activities_path(page: int, before: datetime | None, after: datetime | None, per_page: int) -> str:
+        params: dict[str, int] = {"per_page": per_page}
+        if before is not None:
+            params["before"] = int(before.timestamp())
+        if after is not None:
+            params["after"] = int(after.timestamp())
+        return f"athlete/activities?{urlencode({**params, 'page': page})}"
+
+    @staticmethod
+    def _validate_activities(data: list[dict[str, Any]]) -> Iterator[SummaryActivityTriathlon]:
+        for activity in data:
             try:
                 yield SummaryActivityTriathlon.model_validate(activity)
             except ValidationError:
                 logger.exception("Model %s failed to validate with data %s", SummaryActivityTriathlon, activity)
-                pass
 
-    def activity(self, activity_id: int) -> DetailedActivityTriathlon:
+    def cached_activities(self, after: datetime | None = None) -> Iterator[SummaryActivityTriathlon]:
+        """
+        The runner's activities as last synced, newest first, without calling
+        Strava. SyncActivities keeps them up to date.
+        """
+        summaries = ActivitySummary.objects.filter(runner=self)
+        if after is not None:
+            summaries = summaries.filter(start_date__gte=after)
+
+        for summary in summaries.order_by("-start_date").values_list("data", flat=True).iterator():
+            yield SummaryActivityTriathlon.model_validate(summary)
+
+    def activities_stale(self) -> bool:
+        if self.activities_synced_at is None:
+            return True
+        age = timezone.now() - self.activities_synced_at
+        return age.total_seconds() > settings.STRAVA_ACTIVITY_SYNC_INTERVAL
+
+    def invalidate_activity(self, activity_id: int, aspect_type: str) -> None:
+        """
+        Mark the local activity list out of date after a webhook about one of
+        the runner's activities.
+
+        A new activity is picked up by the next incremental sync; an edited one
+        moves the sync cursor back to just before it, and a deleted one is
+        dropped straight away along with its rendered route images and any
+        weather no other activity shares.
+        """
+        summaries = ActivitySummary.objects.filter(runner=self, strava_id=activity_id)
+        changes: dict[str, Any] = {"activities_synced_at": None}
+
+        if aspect_type == Event.ASPECT_TYPES["delete"]:
+            summaries.delete()
+            self.forget_activities(Activity.objects.filter(runner=self, strava_id=activity_id))
+            routes.discard(activity_id)
+        elif aspect_type == Event.ASPECT_TYPES["update"]:
+            start_date = summaries.values_list("start_date", flat=True).first()
+            if start_date is not None:
+                resync_after = start_date - timedelta(seconds=1)
+                if self.activities_resync_after is not None:
+                    resync_after = min(resync_after, self.activities_resync_after)
+                changes["activities_resync_after"] = resync_after
+
+        response_cache.invalidate_activity(self, activity_id)
+
+        Runner.objects.filter(pk=self.pk).update(**changes)
+        for field, value in changes.items():
+            setattr(self, field, value)
+
+    @staticmethod
+    def forget_activities(activities: "models.QuerySet[Activity]") -> None:
+        weather = list(activities.exclude(weather=None).values_list("weather", flat=True))
+        activities.delete()
+        Weather.objects.filter(pk__in=weather, activities=None).delete()
+
+    def revoke(self) -> None:
+        """
+        Forget the runner's tokens and everything we hold from Strava for them,
+        after they deauthorise us. Their account stays, so they can connect
+        again.
+        """
+        activity_ids = set(self.activity_summaries.values_list("strava_id", flat=True))
+        activity_ids.update(self.activities.values_list("strava_id", flat=True))
+
+        with transaction.atomic():
+            self.forget_activities(self.activities.all())
+            self.activity_summaries.all().delete()
+            Backfill.objects.filter(runner=self).delete()
+
+            self.access_token = self.refresh_token = ""
+            self.access_expires = "0"
+            self.activities_synced_at = self.activities_resync_after = None
+            self.save()
+
+        for activity_id in activity_ids:
+            routes.discard(activity_id)
+            response_cache.invalidate_activity(self, activity_id)
+        response_cache.invalidate(self, response_cache.ATHLETE)
+
+    def activity(self, activity_id: int, fresh: bool = False) -> DetailedActivityTriathlon:
+        """
+        The activity, from the response cache unless ``fresh``; see make_call.
+        """
+        try:
+            return DetailedActivityTriathlon.model_validate(self.make_call(f"activities/{activity_id}", fresh=fresh))
+        except ValidationError as e:
+            raise Http404("Strava activity not found or invalid data") from e
+
+    async def aactivity(self, activity_id: int) -> DetailedActivityTriathlon:
         try:
-            return DetailedActivityTriathlon.model_validate(self.make_call(f"activities/{activity_id}"))
+            return DetailedActivityTriathlon.model_validate(await self.amake_call(f"activities/{activity_id}"))
         except ValidationError as e:
             raise Http404("Strava activity not found or invalid data") from e
 
@@ -245,56 +538,127 @@ class RunnerSettings(models.Model):
 
 
 class Activity(models.Model):
-    MARKER_STRING = "\ufe00\ufe01"
+    MARKER_STRING = MARKERS.register("\ufe00\ufe01")
+
+    # Weather is only worth reporting for activities done outdoors on foot or bike.
+    WEATHER_TYPES: ClassVar[list[str]] = [
+        ActivityType.Run.value,
+        ActivityType.Ride.value,
+        ActivityType.Walk.value,
+    ]
 
     runner = models.ForeignKey(Runner, on_delete=models.CASCADE, related_name="activities", to_field="strava_id")
     strava_id = models.BigIntegerField(unique=True)
     type = models.CharField(max_length=50)
-    weather = models.ForeignKey(Weather, on_delete=models.CASCADE, related_name="activities", null=True, blank=True)
+    weather = models.ForeignKey(Weather, on_delete=models.SET_NULL, related_name="activities", null=True, blank=True)
+    # The route ready to inline in the activity page; see routes.inline.
+    route = models.JSONField(null=True, blank=True, editable=False)
+    # When and where the activity finished, for fetching its weather later.
+    end_date = models.DateTimeField(null=True, blank=True)
+    end_latitude = models.FloatField(null=True, blank=True)
+    end_longitude = models.FloatField(null=True, blank=True)
 
     def __str__(self):
         return f"{self.strava_id} {self.type}"
 
+    def set_route(self, encoded: str | None) -> bool:
+        """
+        Draw the route from ``encoded`` unless the stored one already was.
+        Returns whether it changed; saving is left to the caller.
+        """
+        if routes.is_current(self.route, encoded):
+            return False
+
+        route = routes.inline(encoded)
+        changed = route != self.route
+        self.route = route
+        return changed
+
     def add_weather(self) -> DetailedActivity | Literal[False]:
         """
         Updates the activity description on Strava.
+        """
+        if not self.weather:
+            return False
+
+        runner = cast(Runner, self.runner)
+        data_in: DetailedActivity = runner.activity(self.strava_id)
+
+        original = UpdatableActivity(name=data_in.name or "", description=data_in.description or "")
+        patch = ActivityPatch()
+        self.stage_weather(patch)
+        data = patch.apply(original)
+
+        if data == original:
+            return False
+
+        return runner.update_activity(self.strava_id, data)
+
+    def stage_weather(self, patch: ActivityPatch) -> None:
+        """
+        The weather stage of enrichment, added to a pending patch.
 
         The report and the title emoji are controlled independently, and a
         disabled one is stripped rather than left behind from an earlier run.
         """
         if not self.weather:
-            return False
+            return
 
-        runner = cast(Runner, self.runner)
-        settings = runner.enrichment
+        settings = cast(Runner, self.runner).enrichment
 
-        data_in: DetailedActivity = runner.activity(self.strava_id)
+        if settings.weather_report:
+            patch.put("description", MarkedString(self.weather.long(), self.MARKER_STRING))
+        else:
+            patch.remove("description", self.MARKER_STRING)
 
-        original_description = data_in.description or ""
-        weather = MarkedString(self.weather.long(), self.MARKER_STRING)
-        description = (
-            weather.replace_or_append(original_description)
-            if settings.weather_report
-            else weather.remove_from_text(original_description)
-        )
+        if settings.weather_emoji:
+            patch.put("name", MarkedString(self.weather.emoji(), self.MARKER_STRING))
+        else:
+            patch.remove("name", self.MARKER_STRING)
 
-        original_name = data_in.name or ""
-        emoji = MarkedString(self.weather.emoji(), self.MARKER_STRING)
-        name = (
-            emoji.replace_or_append(original_name) if settings.weather_emoji else emoji.remove_from_text(original_name)
-        )
 
-        if description == original_description and name == original_name:
-            return False
+class ActivitySummary(models.Model):
+    """
+    One entry of a runner's Strava activity list, kept locally so list pages
+    are served from the database rather than a Strava round trip.
 
-        data = UpdatableActivity.model_validate(
-            {
-                "description": description,
-                "name": name,
-            }
-        )
+    ``data`` is the summary payload as Strava sent it, less empty fields.
+    """
 
-        return runner.update_activity(self.strava_id, data)
+    runner = models.ForeignKey(
+        Runner, on_delete=models.CASCADE, related_name="activity_summaries", to_field="strava_id"
+    )
+    strava_id = models.BigIntegerField(unique=True)
+    start_date = models.DateTimeField(blank=True, null=True)
+    data = models.JSONField(default=dict)
+
+    class Meta:
+        verbose_name_plural = "activity summaries"
+        indexes: ClassVar[list[models.Index]] = [
+            models.Index(fields=["runner", "-start_date"], name="strava_summary_runner_start"),
+        ]
+
+    def __str__(self):
+        return f"{self.strava_id} {self.data.get('name', '')}"
+
+
+class Backfill(models.Model):
+    """
+    How far backfill_enrichment has worked back through a runner's history,
+    so an interrupted run picks up where it stopped.
+    """
+
+    runner = models.OneToOneField(Runner, on_delete=models.CASCADE, related_name="backfill")
+    # Start time of the oldest activity done so far; the next run asks Strava
+    # for activities before it.
+    before = models.DateTimeField(blank=True, null=True)
+    processed = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Backfill for {self.runner}"
 
 
 class Event(models.Model):
@@ -309,6 +673,15 @@ class Event(models.Model):
         "athlete": "athlete",
     }
 
+    STATES: ClassVar[dict[str, str]] = {
+        "received": "received",
+        "fetched": "fetched",
+        "enriched": "enriched",
+        "written": "written",
+        "failed": "failed",
+        "ignored": "ignored",
+    }
+
     aspect_type = models.CharField(max_length=128, choices=ASPECT_TYPES)
     event_time = models.DateTimeField()
     object_id = models.BigIntegerField()
@@ -318,9 +691,103 @@ class Event(models.Model):
     updates = models.JSONField(default=dict)
     processed = models.BooleanField(default=False)
 
+    # Where the event has got to, when it got to each stage, and how many times
+    # it has been claimed. It is written once its changes are made, to Strava
+    # or here. See ProcessEvents.
+    state = models.CharField(max_length=16, choices=STATES, default=STATES["received"])
+    received_at = models.DateTimeField(default=timezone.now)
+    fetched_at = models.DateTimeField(null=True, blank=True)
+    enriched_at = models.DateTimeField(null=True, blank=True)
+    written_at = models.DateTimeField(null=True, blank=True)
+    failed_at = models.DateTimeField(null=True, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    # The name and description written back to Strava in handling the event.
+    sent = models.JSONField(null=True, blank=True)
+
+    class Meta:
+        constraints: ClassVar[list[models.BaseConstraint]] = [
+            # Strava retries a delivery until it is acknowledged; a repeat
+            # carries the same fields and is refused here.
+            models.UniqueConstraint(
+                fields=["object_id", "aspect_type", "event_time", "subscription_id"], name="strava_event_delivery"
+            ),
+        ]
+        indexes: ClassVar[list[models.Index]] = [
+            models.Index(fields=["object_type", "object_id", "processed"], name="strava_event_pending"),
+            models.Index(fields=["claimed_at"], condition=Q(processed=False), name="strava_event_unprocessed"),
+        ]
+
     def __str__(self):
         return f"{self.aspect_type} {self.object_type} {self.object_id}"
 
+    def save_once(self) -> bool:
+        """
+        Insert the event unless the same delivery is already held, or it is for
+        a runner we don't have. Returns whether it was saved.
+        """
+        try:
+            with transaction.atomic():
+                self.save(force_insert=True)
+        except IntegrityError:
+            logger.info("Ignoring event %s: already held or for an unknown runner", self)
+            return False
+        return True
+
+    @classmethod
+    def pending(cls, owner_id: int, object_type: str, object_id: int) -> models.QuerySet[Self]:
+        """
+        Events for the object still to be handled, less failed ones, which
+        wait to be retried by the drainer.
+        """
+        return (
+            cls.objects.filter(owner_id=owner_id, object_type=object_type, object_id=object_id, processed=False)
+            .exclude(state=cls.STATES["failed"])
+            .order_by("pk")
+        )
+
+    def is_first_pending(self) -> bool:
+        """
+        Whether no earlier event for the same object is still waiting; if one
+        is, the job already queued for it will take this one too.
+        """
+        return not self.pending(self.owner_id, self.object_type, self.object_id).filter(pk__lt=self.pk).exists()
+
+    def is_echo(self) -> bool:
+        """
+        Whether this update is Strava telling us about our own write back: it
+        follows one within STRAVA_EVENT_ECHO_WINDOW and changes nothing but
+        what was written. Writes are kept by strava.writes, wherever they were
+        made from.
+        """
+        if self.aspect_type != self.ASPECT_TYPES["update"]:
+            return False
+
+        last = writes.last(int(self.owner_id), self.object_id)
+        since = self.received_at - timedelta(seconds=settings.STRAVA_EVENT_ECHO_WINDOW)
+        if last is None or last.written_at < since.timestamp():
+            return False
+
+        # Strava reports a new name as "title"; a new description as nothing.
+        updates = self.updates or {}
+        return set(updates) <= {"title"} and updates.get("title", last.name) == last.name
+
+    @classmethod
+    def transition(cls, events: list[Self], state: str, **changes: Any) -> None:
+        """
+        Move the events on to ``state``, stamping the time they reached it.
+        """
+        changes[f"{state}_at"] = timezone.now()
+        cls.objects.filter(pk__in=[event.pk for event in events]).update(state=state, **changes)
+
+    @property
+    def latency(self) -> timedelta | None:
+        """
+        From receiving the event to writing its enrichment back.
+        """
+        return self.written_at - self.received_at if self.written_at else None
+
 
 class Animal(models.Model):
     name = models.CharField(max_length=100, unique=True)
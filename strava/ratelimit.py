@@ -0,0 +1,163 @@
+"""
+Keeps RuntimeExceptions inside Strava's API rate limits.
+
+Strava counts our calls against a 15-minute and a daily budget, and reports
+both on every response. Those counts are kept in a cache shared by the web and
+worker processes, our own calls are counted against them in between, and a
+call that would overspend either budget is refused before it is made, so
+callers can wait for the window to reset rather than collect a 429.
+"""
+
+import logging
+import time
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from django_tasks import Task
+
+from strava.exceptions import StravaRateLimitError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Window:
+    """
+    One of Strava's budgets. Windows are aligned to the clock: the short one
+    resets on the quarter hour and the daily one at midnight UTC.
+    """
+
+    name: str
+    seconds: int
+
+    def started(self, now: float) -> int:
+        return int(now - now % self.seconds)
+
+    def resets_in(self, now: float) -> float:
+        return self.started(now) + self.seconds - now
+
+    def usage_key(self, now: float) -> str:
+        return f"strava:ratelimit:{self.name}:{self.started(now)}"
+
+    @property
+    def limit_key(self) -> str:
+        return f"strava:ratelimit:{self.name}:limit"
+
+
+SHORT = Window("short", 15 * 60)
+DAILY = Window("daily", 24 * 60 * 60)
+
+# In the order Strava lists them in its headers.
+WINDOWS = (SHORT, DAILY)
+
+
+def _cache():
+    return caches[settings.STRAVA_CACHE]
+
+
+def _default_limit(window: Window) -> int:
+    return settings.STRAVA_RATE_LIMIT_SHORT if window is SHORT else settings.STRAVA_RATE_LIMIT_DAILY
+
+
+def _parse(value: Any) -> list[int] | None:
+    if not isinstance(value, str):
+        return None
+    try:
+        return [int(part) for part in value.split(",")]
+    except ValueError:
+        return None
+
+
+def usage(window: Window, now: float | None = None) -> tuple[int, int]:
+    """
+    ``(used, limit)`` for the window, as far as we know.
+    """
+    now = time.time() if now is None else now
+    cache = _cache()
+    return cache.get(window.usage_key(now), 0), cache.get(window.limit_key, _default_limit(window))
+
+
+# A share of each budget the calls made in this context must leave unspent.
+_reserve: ContextVar[float] = ContextVar("reserve", default=0.0)
+
+
+@contextmanager
+def reserving(share: float) -> Iterator[None]:
+    """
+    Stop calls made inside the block short of ``share`` of each budget, so
+    background work leaves it to webhooks and to runners waiting on a page.
+    """
+    token = _reserve.set(share)
+    try:
+        yield
+    finally:
+        _reserve.reset(token)
+
+
+def acquire(now: float | None = None) -> None:
+    """
+    Take one call from both budgets, or raise StravaRateLimitError if either
+    is spent.
+
+    ``STRAVA_RATE_LIMIT_HEADROOM`` holds back a share of each budget so a burst
+    stops short of the limit rather than at it, and inside ``reserving`` the
+    reserved share is held back too.
+    """
+    now = time.time() if now is None else now
+    cache = _cache()
+
+    for window in WINDOWS:
+        used, limit = usage(window, now)
+        allowed = int(limit * (1 - settings.STRAVA_RATE_LIMIT_HEADROOM - _reserve.get()))
+        if used >= allowed:
+            logger.warning("Strava %s rate limit reached: %d of %d", window.name, used, limit)
+            raise StravaRateLimitError(window.resets_in(now))
+
+    for window in WINDOWS:
+        key = window.usage_key(now)
+        cache.add(key, 0, timeout=window.seconds)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Expired between the add and the incr; this call opens the window.
+            cache.set(key, 1, timeout=window.seconds)
+
+
+def record(headers: Mapping[str, Any], now: float | None = None) -> None:
+    """
+    Replace our counts with the ones Strava reported, which include calls
+    made by anything else sharing the application's quota.
+    """
+    limits = _parse(headers.get("X-RateLimit-Limit"))
+    used = _parse(headers.get("X-RateLimit-Usage"))
+    if not limits or not used:
+        return
+
+    now = time.time() if now is None else now
+    cache = _cache()
+    for window, limit, count in zip(WINDOWS, limits, used, strict=False):
+        cache.set(window.limit_key, limit, timeout=None)
+        cache.set(window.usage_key(now), count, timeout=window.seconds)
+
+
+def defer(task: Task, error: StravaRateLimitError, *args: Any, **kwargs: Any) -> None:
+    """
+    Enqueue ``task`` again for when the budget that stopped it has reset.
+
+    Backends that cannot run a task later (the immediate one used in
+    development) get the error back instead.
+    """
+    if not task.get_backend().supports_defer:
+        raise error
+
+    run_after = timezone.now() + timedelta(seconds=error.retry_after)
+    logger.info("Deferring %s until %s", task.name, run_after)
+    task.using(run_after=run_after).enqueue(*args, **kwargs)
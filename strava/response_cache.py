@@ -0,0 +1,110 @@
+"""
+Strava responses cached per runner and per endpoint.
+
+Only the Strava client uses this; other HTTP traffic in the process is left
+alone. Each endpoint has its own freshness window, after which the cached body
+is revalidated with its ETag rather than fetched again. Our own writes and
+webhooks invalidate exactly the entries they affect.
+"""
+
+import hashlib
+import re
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from django.conf import settings
+from django.core.cache import caches
+
+if TYPE_CHECKING:
+    from strava.models import Runner
+
+ATHLETE = "athlete"
+ACTIVITY = "activities"
+ACTIVITY_LIST = "athlete/activities"
+
+_ACTIVITY_PATH = re.compile(r"^activities/\d+$")
+
+
+@dataclass(frozen=True)
+class Entry:
+    data: Any
+    etag: str | None
+    fetched_at: float
+
+    def is_fresh(self, endpoint: str, now: float | None = None) -> bool:
+        now = time.time() if now is None else now
+        return now - self.fetched_at < settings.STRAVA_RESPONSE_TTL[endpoint]
+
+
+def _cache():
+    return caches[settings.STRAVA_CACHE]
+
+
+def endpoint(path: str) -> str | None:
+    """
+    Which cached endpoint a request path belongs to, or None for paths that
+    are never cached.
+    """
+    if path == ATHLETE:
+        return ATHLETE
+    if path == ACTIVITY_LIST or path.startswith(f"{ACTIVITY_LIST}?"):
+        return ACTIVITY_LIST
+    if _ACTIVITY_PATH.match(path):
+        return ACTIVITY
+    return None
+
+
+def _version_key(runner: "Runner", name: str) -> str:
+    return f"strava:response:{runner.pk}:{name}:version"
+
+
+def _key(runner: "Runner", path: str) -> str:
+    name = endpoint(path)
+    assert name is not None, f"{path} is not a cached endpoint"
+    version = _cache().get(_version_key(runner, name), 0)
+    digest = hashlib.sha1(path.encode(), usedforsecurity=False).hexdigest()
+    return f"strava:response:{runner.pk}:{name}:{version}:{digest}"
+
+
+def lookup(runner: "Runner", path: str) -> Entry | None:
+    return _cache().get(_key(runner, path))
+
+
+def store(runner: "Runner", path: str, data: Any, etag: str | None) -> None:
+    """
+    Store a response. Entries outlive their freshness window so a stale one
+    can still be revalidated by ETag.
+    """
+    entry = Entry(data=data, etag=etag, fetched_at=time.time())
+    _cache().set(_key(runner, path), entry, timeout=settings.STRAVA_RESPONSE_KEEP)
+
+
+def _bump(runner: "Runner", name: str) -> None:
+    cache = _cache()
+    key = _version_key(runner, name)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def invalidate(runner: "Runner", path: str) -> None:
+    """
+    Drop whatever a write to ``path`` makes stale.
+
+    Changing an activity changes both its own entry and any page of the
+    activity list it appears on; the list pages are dropped together by
+    moving on to a new version of their keys.
+    """
+    name = endpoint(path)
+    if name == ACTIVITY:
+        invalidate_activity(runner, int(path.rsplit("/", 1)[-1]))
+    elif name is not None:
+        _bump(runner, name)
+
+
+def invalidate_activity(runner: "Runner", activity_id: int) -> None:
+    _cache().delete(_key(runner, f"activities/{activity_id}"))
+    _bump(runner, ACTIVITY_LIST)
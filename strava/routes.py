@@ -0,0 +1,333 @@
+"""
+Route images, rendered once and kept in the default storage.
+
+A rendered route only changes when what it is drawn from does, so each one is
+stored under a name made from the activity, a hash of its source (the encoded
+polyline and anything else the drawing depends on), the theme and the size.
+Later requests read it back, or answer 304 from its ETag, instead of drawing
+it again.
+
+Images for pages come in a fixed set of variants: sizes, themes and formats.
+They all share one aspect ratio, so every variant drawn from a polyline is
+rendered together from a single decode and fit.
+"""
+
+import hashlib
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import HttpRequest, HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+import polyline
+import svgwrite
+from PIL import Image, ImageDraw
+
+from strava.line import Coordinates, Line, Size
+
+ROOT = "routes"
+
+CONTENT_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+    "webp": "image/webp",
+}
+
+# Raster routes are drawn at this multiple of their size and reduced, for
+# smooth edges.
+SUPERSAMPLE = 2
+
+
+@dataclass(frozen=True)
+class Variant:
+    size: Size
+    # Drawn from the activity's full polyline; otherwise from the summary one
+    # held locally, so a list of thumbnails needs nothing from Strava.
+    detailed: bool
+
+
+VARIANTS = {
+    "thumbnail": Variant((160, 80), detailed=False),
+    "card": Variant((640, 320), detailed=True),
+    "full": Variant((1280, 640), detailed=True),
+}
+
+THEMES = {
+    "dark": (255, 255, 255),
+    "light": (0, 0, 0),
+}
+
+FORMATS = ("png", "webp", "svg")
+
+# The activity page draws the route inline, at the card size.
+INLINE_SIZE = VARIANTS["card"].size
+
+# Below this a polyline has nothing to draw.
+MIN_POINTS = 2
+
+
+@dataclass(frozen=True)
+class Rendition:
+    name: str
+    content_type: str
+    modified: datetime
+    content: bytes | None = None
+
+    @property
+    def etag(self) -> str:
+        return quote_etag(hashlib.sha1(self.name.encode(), usedforsecurity=False).hexdigest())
+
+    def read(self) -> bytes:
+        if self.content is not None:
+            return self.content
+        with default_storage.open(self.name, "rb") as file:
+            return file.read()
+
+
+@dataclass(frozen=True)
+class Key:
+    """
+    Everything a rendering depends on. ``source`` is what it is drawn from,
+    usually the encoded polyline.
+    """
+
+    activity_id: int
+    source: str
+    theme: str
+    size: Size
+    format: str
+
+    @property
+    def name(self) -> str:
+        return stored_name(self.activity_id, digest(self.source), self.theme, self.size, self.format)
+
+
+def digest(source: str) -> str:
+    return hashlib.sha1(source.encode(), usedforsecurity=False).hexdigest()[:16]
+
+
+def stored_name(activity_id: int, source_digest: str, theme: str, size: Size, format: str) -> str:
+    width, height = size
+    return f"{ROOT}/{activity_id}/{source_digest}/{theme}-{width}x{height}.{format}"
+
+
+def stored(key: Key) -> Rendition | None:
+    return lookup(key.activity_id, digest(key.source), key.theme, key.size, key.format)
+
+
+def lookup(activity_id: int, source_digest: str, theme: str, size: Size, format: str) -> Rendition | None:
+    """
+    The stored rendering drawn from a source with ``source_digest``, for
+    callers that hold the digest but not the source; see Activity.route.
+    """
+    name = stored_name(activity_id, source_digest, theme, size, format)
+    if not default_storage.exists(name):
+        return None
+    modified = default_storage.get_modified_time(name)
+    return Rendition(name=name, content_type=CONTENT_TYPES[format], modified=modified)
+
+
+def store(key: Key, content: bytes) -> Rendition:
+    default_storage.save(key.name, ContentFile(content))
+    return Rendition(name=key.name, content_type=CONTENT_TYPES[key.format], modified=timezone.now(), content=content)
+
+
+def rendition(key: Key, render: Callable[[], bytes]) -> Rendition:
+    """
+    The stored rendering, calling ``render`` to make and store it only if
+    there is not one already.
+    """
+    return stored(key) or store(key, render())
+
+
+def variant(activity_id: int, encoded: str, name: str, theme: str, format: str) -> Rendition:
+    """
+    One variant of an activity's route. On a miss, every variant drawn from
+    the same polyline is rendered and stored at once.
+    """
+    key = Key(activity_id, encoded, theme, VARIANTS[name].size, format)
+    if rendition := stored(key):
+        return rendition
+    return render_variants(activity_id, encoded, VARIANTS[name].detailed)[key]
+
+
+def render_variants(activity_id: int, encoded: str, detailed: bool) -> dict[Key, Rendition]:
+    """
+    Render and store every variant drawn from ``encoded``, decoding and
+    fitting it once at the largest size and scaling that down for the rest.
+    """
+    sizes = sorted({v.size for v in VARIANTS.values() if v.detailed == detailed}, reverse=True)
+    largest = sizes[0]
+
+    line = Line(polyline.decode(encoded))
+    line.fit((largest[0] * SUPERSAMPLE, largest[1] * SUPERSAMPLE))
+
+    renditions = {}
+    for size in sizes:
+        factor = size[0] / largest[0]
+        raster = Line([(x * factor, y * factor) for x, y in line.coordinates])
+        raster.simplify()
+        vector = Line([(x / SUPERSAMPLE, y / SUPERSAMPLE) for x, y in raster.coordinates])
+
+        for theme, colour in THEMES.items():
+            for format in FORMATS:
+                if format == "svg":
+                    content = draw_svg(vector, size, "#{:02x}{:02x}{:02x}".format(*colour))
+                else:
+                    content = draw_raster(raster, size, colour, format)
+                key = Key(activity_id, encoded, theme, size, format)
+                renditions[key] = store(key, content)
+
+    return renditions
+
+
+def respond(request: HttpRequest, rendition: Rendition) -> HttpResponse:
+    """
+    Serve a rendition with validators and a long max-age, or a 304 if the
+    client already holds it.
+    """
+    last_modified = int(rendition.modified.timestamp())
+    response = get_conditional_response(request, etag=rendition.etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(rendition.read(), content_type=rendition.content_type)
+
+    response["ETag"] = rendition.etag
+    response["Last-Modified"] = http_date(last_modified)
+    patch_cache_control(response, private=True, max_age=settings.STRAVA_ROUTE_MAX_AGE)
+    return response
+
+
+def discard(activity_id: int) -> None:
+    """
+    Delete every stored rendering of an activity.
+    """
+    folder = f"{ROOT}/{activity_id}"
+    try:
+        digests, _ = default_storage.listdir(folder)
+    except FileNotFoundError:
+        return
+
+    for digest in digests:
+        _, files = default_storage.listdir(f"{folder}/{digest}")
+        for file in files:
+            default_storage.delete(f"{folder}/{digest}/{file}")
+
+
+def inline(encoded: str | None) -> dict | None:
+    """
+    The route as an SVG path to inline in a page, so it takes its colour from
+    the active theme rather than being baked in as an image. It carries the
+    digest of the polyline it was drawn from, so a stored copy can be checked
+    against the activity without drawing it again.
+    """
+    if not encoded:
+        return None
+
+    decoded = polyline.decode(encoded)
+    if len(decoded) < MIN_POINTS:
+        return None
+
+    line = fitted(decoded, INLINE_SIZE)
+
+    return {
+        "digest": digest(encoded),
+        "path": line.svg_path(),
+        "length": round(line.length),
+        "width": INLINE_SIZE[0],
+        "height": INLINE_SIZE[1],
+    }
+
+
+def is_current(route: dict | None, encoded: str | None) -> bool:
+    """
+    Whether ``route`` was drawn from ``encoded`` at the current inline size.
+    """
+    if route is None:
+        return not encoded
+    return (
+        encoded is not None
+        and route.get("digest") == digest(encoded)
+        and (route.get("width"), route.get("height")) == INLINE_SIZE
+    )
+
+
+def fitted(coordinates: Coordinates, size: Size) -> Line:
+    line = Line(coordinates)
+    line.fit(size)
+    line.simplify()
+    return line
+
+
+def render_svg(coordinates: Coordinates, size: Size, colour: str, animation_time: float) -> bytes:
+    return draw_svg(fitted(coordinates, size), size, colour, animation_time)
+
+
+def render_png(coordinates: Coordinates, size: Size, colour: tuple[int, int, int]) -> bytes:
+    line = fitted(coordinates, (size[0] * SUPERSAMPLE, size[1] * SUPERSAMPLE))
+    return draw_raster(line, size, colour, "png")
+
+
+def draw_svg(line: Line, size: Size, colour: str, animation_time: float | None = None) -> bytes:
+    """
+    The route as an SVG path; with ``animation_time`` it draws itself in.
+    """
+    dwg = svgwrite.Drawing(profile="full", size=size)
+
+    if animation_time is not None:
+        style = f"""
+#route {{
+    stroke-dasharray: {line.length};
+    stroke-dashoffset: {line.length};
+    animation: dash {animation_time * 0.5}s linear forwards;
+}}
+
+@keyframes dash {{
+    to {{
+        stroke-dashoffset: 0;
+    }}
+}}
+"""
+        dwg.add(dwg.style(style))
+
+    dwg.add(dwg.rect(size=size, fill="none"))
+    dwg.add(dwg.path(d=line, stroke=colour, fill="none", id="route"))
+
+    return dwg.tostring().encode()
+
+
+def draw_raster(line: Line, size: Size, colour: tuple[int, int, int], format: str) -> bytes:
+    """
+    Draw the route in one call onto a coverage mask at SUPERSAMPLE times the
+    size, then box-filter it down for smooth edges. ``line`` must already be
+    fitted to the larger size.
+
+    A PNG is saved as a palette image whose entries are ``colour`` at every
+    level of opacity, so the work is one byte a pixel throughout and the file
+    a quarter the size of an RGBA one. WebP has no palette mode, so it gets
+    the colour with the mask as its alpha.
+    """
+    mask = Image.new("L", (size[0] * SUPERSAMPLE, size[1] * SUPERSAMPLE), 0)
+
+    if len(line.coordinates) > 1:
+        ImageDraw.Draw(mask).line(line.coordinates, fill=255, width=SUPERSAMPLE, joint="curve")
+
+    if SUPERSAMPLE > 1:
+        mask = mask.reduce(SUPERSAMPLE)
+
+    buffer = BytesIO()
+    if format == "png":
+        im = mask.convert("P")
+        im.putpalette(list(colour) * 256)
+        im.save(buffer, "PNG", transparency=bytes(range(256)))
+    else:
+        im = Image.new("RGB", size, colour)
+        im.putalpha(mask)
+        im.save(buffer, format.upper(), lossless=True)
+    return buffer.getvalue()
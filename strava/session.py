@@ -0,0 +1,83 @@
+"""
+The HTTP session every call to Strava goes through.
+
+One session is shared by the whole process so connections are pooled and kept
+alive between calls, rather than paying for a fresh TCP and TLS handshake on
+every request. Async views get the same from an httpx client per event loop.
+"""
+
+import asyncio
+from functools import cache
+from weakref import WeakKeyDictionary
+
+from django.conf import settings
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+STRAVA_HOST = "https://www.strava.com"
+
+
+def _retry() -> Retry:
+    """
+    Retry transient failures only; anything Strava actually answered is left
+    for the caller to turn into a StravaError.
+    """
+    return Retry(
+        total=settings.STRAVA_HTTP_RETRIES,
+        connect=settings.STRAVA_HTTP_RETRIES,
+        read=settings.STRAVA_HTTP_RETRIES,
+        status=settings.STRAVA_HTTP_RETRIES,
+        backoff_factor=settings.STRAVA_HTTP_BACKOFF,
+        status_forcelist=(502, 503, 504),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def _adapter() -> HTTPAdapter:
+    return HTTPAdapter(
+        pool_connections=settings.STRAVA_HTTP_POOL_CONNECTIONS,
+        pool_maxsize=settings.STRAVA_HTTP_POOL_MAXSIZE,
+        pool_block=settings.STRAVA_HTTP_POOL_BLOCK,
+        max_retries=_retry(),
+    )
+
+
+@cache
+def get_session() -> requests.Session:
+    """
+    The process-wide session, built on first use.
+
+    ``STRAVA_HTTP_POOL_MAXSIZE`` caps the connections held open to Strava; with
+    ``STRAVA_HTTP_POOL_BLOCK`` set, callers past that limit wait for a free
+    connection instead of opening a throwaway one.
+    """
+    session = requests.Session()
+    session.mount(STRAVA_HOST, _adapter())
+    return session
+
+
+_async_clients: WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = WeakKeyDictionary()
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    The async client for the running event loop, built on first use.
+
+    Its connections belong to the loop that opened them, so each loop has its
+    own. Under ASGI that is one per worker; it is pooled to the same limits as
+    the session and retries failed connections, though not answered errors.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=settings.STRAVA_HTTP_POOL_MAXSIZE),
+            transport=httpx.AsyncHTTPTransport(retries=settings.STRAVA_HTTP_RETRIES),
+            timeout=30,
+        )
+        _async_clients[loop] = client
+    return client
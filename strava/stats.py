@@ -2,7 +2,7 @@
 Derived figures for the overview screen.
 
 Everything here is computed from the activity list Strava already gives us, so
-the dashboard needs no extra API calls beyond the one the activities page makes.
+the dashboard needs no extra API calls beyond fetching the period's activities.
 """
 
 from collections.abc import Iterable, Sequence
@@ -39,8 +39,16 @@ def clean_period(value: str | None) -> Period:
     return DEFAULT_PERIOD
 
 
+def period_start(period: Period) -> datetime:
+    """
+    The earliest start time that falls inside the period, which callers pass
+    to Strava as ``after`` so only the pages that matter are fetched.
+    """
+    return datetime.now(tz=UTC) - PERIODS[period]
+
+
 def in_period(activities: Iterable[SummaryActivityTriathlon], period: Period) -> list[SummaryActivityTriathlon]:
-    cutoff = datetime.now(tz=UTC) - PERIODS[period]
+    cutoff = period_start(period)
     return [a for a in activities if a.start_date is not None and a.start_date >= cutoff]
 
 
@@ -0,0 +1,18 @@
+"""
+The lanes tasks are queued in.
+
+Each lane is a queue named in ``TASK_QUEUES`` and consumed by its own
+``db_worker`` processes, so how many of a lane's tasks run at once is how many
+workers the Procfile gives it. A worker that takes more than one lane picks
+the highest priority ready task first. Anything not given a lane, such as
+renewing tokens, runs on the default queue at priority 0.
+"""
+
+# Work a runner has asked for and is waiting to see.
+INTERACTIVE = {"queue_name": "interactive", "priority": 50}
+
+# Handling Strava's webhook events as they arrive.
+WEBHOOK = {"queue_name": "webhook", "priority": 10}
+
+# Whole histories, which can take hours and may wait on the rate limit.
+BACKFILL = {"queue_name": "backfill", "priority": -50}
@@ -0,0 +1,19 @@
+import logging
+
+from django_tasks import task
+
+from strava.commands import BackfillEnrichment
+from strava.models import Runner
+from strava.tasks import BACKFILL
+
+logger = logging.getLogger(__name__)
+
+
+@task(**BACKFILL)
+def backfill_enrichment(runner_id: int, concurrency: int = 4) -> int:
+    logger.info("Backfilling enrichment for runner: %d", runner_id)
+    runner = Runner.objects.get(id=runner_id)
+    assert isinstance(runner, Runner)
+
+    backfill = BackfillEnrichment(runner, concurrency=concurrency)
+    return backfill().processed
@@ -0,0 +1,18 @@
+import logging
+
+from django_tasks import task
+
+from strava.commands import BackfillWeather
+from strava.models import Runner
+from strava.tasks import BACKFILL
+
+logger = logging.getLogger(__name__)
+
+
+@task(**BACKFILL)
+def backfill_weather(runner_id: int | None = None) -> int:
+    logger.info("Backfilling weather for runner: %s", runner_id)
+    runner = Runner.objects.get(id=runner_id) if runner_id is not None else None
+
+    backfill = BackfillWeather(runner)
+    return backfill()
@@ -0,0 +1,24 @@
+import logging
+
+from django_tasks import task
+
+from strava import ratelimit
+from strava.commands import EnrichActivity
+from strava.exceptions import StravaRateLimitError
+from strava.models import Runner
+from strava.tasks import INTERACTIVE
+
+logger = logging.getLogger(__name__)
+
+
+@task(**INTERACTIVE)
+def enrich_activity(runner_id: int, activity_id: int, weather: bool = False):
+    logger.info("Enriching activity for runner: %d, activity: %d", runner_id, activity_id)
+    runner = Runner.objects.get(id=runner_id)
+    assert isinstance(runner, Runner)
+
+    enrich = EnrichActivity(runner, activity_id, weather=weather)
+    try:
+        enrich()
+    except StravaRateLimitError as error:
+        ratelimit.defer(enrich_activity, error, runner_id, activity_id, weather)
@@ -0,0 +1,53 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from django_tasks import task
+
+from strava import ratelimit
+from strava.commands import ProcessEvents
+from strava.data_models import EventWebhook
+from strava.exceptions import StravaRateLimitError
+from strava.models import Event
+from strava.tasks import WEBHOOK
+from strava.transformers import webhook_data_to_event
+
+logger = logging.getLogger(__name__)
+
+
+def receive(webhook: EventWebhook) -> Event | None:
+    """
+    Record a delivery and queue the job for its object, unless it repeats one
+    already held or a job is already waiting for that object. Returns the
+    event if it was new.
+    """
+    event = webhook_data_to_event(webhook)
+    if not event.save_once():
+        return None
+
+    if event.is_first_pending():
+        job = process_events
+        if event.aspect_type == Event.ASPECT_TYPES["update"] and job.get_backend().supports_defer:
+            # Let the rest of a burst of edits arrive and be taken together.
+            job = job.using(run_after=timezone.now() + timedelta(seconds=settings.STRAVA_EVENT_DEBOUNCE))
+        job.enqueue(event.owner_id, event.object_type, event.object_id)
+    return event
+
+
+@task(**WEBHOOK)
+def process_events(owner_id: int, object_type: str, object_id: int) -> int:
+    """
+    Handle every event waiting for one object as a single job.
+
+    Events that arrive while it runs are claimed on the next pass; any after
+    its last pass find nothing pending ahead of them and queue a job of their
+    own.
+    """
+    events = Event.objects.filter(owner_id=owner_id, object_type=object_type, object_id=object_id)
+    try:
+        return ProcessEvents(events)()
+    except StravaRateLimitError as error:
+        ratelimit.defer(process_events, error, owner_id, object_type, object_id)
+        return 0
@@ -0,0 +1,13 @@
+import logging
+
+from django_tasks import task
+
+from strava.commands import RenewTokens
+
+logger = logging.getLogger(__name__)
+
+
+@task
+def renew_tokens() -> int:
+    logger.info("Renewing expiring tokens")
+    return RenewTokens()()
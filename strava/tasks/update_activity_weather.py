@@ -3,16 +3,11 @@ import logging
 from django_tasks import task
 
 from strava.commands.find_or_create_activity import FindOrCreateActivity
-from strava.data_models import ActivityType
-from strava.models import Event
+from strava.models import Activity, Event
 
 logger = logging.getLogger(__name__)
 
-valid_activity_types: list[str] = [
-    ActivityType.Run.value,
-    ActivityType.Ride.value,
-    ActivityType.Walk.value,
-]
+valid_activity_types: list[str] = Activity.WEATHER_TYPES
 
 
 @task
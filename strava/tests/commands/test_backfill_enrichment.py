@@ -0,0 +1,184 @@
+from datetime import UTC, datetime
+from unittest.mock import patch
+
+from django.core.management.base import CommandError
+from django.http import Http404
+
+import pytest
+from model_bakery import baker
+
+from strava import ratelimit
+from strava.commands.backfill_enrichment import BackfillEnrichment
+from strava.data_models import ActivityType
+from strava.exceptions import StravaRateLimitError
+from strava.models import Backfill, DetailedActivityTriathlon, Runner, SummaryActivityTriathlon
+
+
+@pytest.fixture
+def runner():
+    return baker.make(Runner, strava_id="123", access_expires="9999999999")
+
+
+@pytest.fixture
+def history():
+    return [
+        SummaryActivityTriathlon(id=3, start_date=datetime(2024, 3, 1, tzinfo=UTC)),
+        SummaryActivityTriathlon(id=2, start_date=datetime(2024, 2, 1, tzinfo=UTC)),
+        SummaryActivityTriathlon(id=1, start_date=datetime(2024, 1, 1, tzinfo=UTC)),
+    ]
+
+
+@pytest.fixture
+def detail():
+    return DetailedActivityTriathlon(
+        id=1, type=ActivityType.Run, name="Run", description="Legs heavy", distance=5000, average_speed=3
+    )
+
+
+@pytest.mark.django_db
+def test_backfill_enriches_every_activity_and_completes(runner, history):
+    with (
+        patch.object(Runner, "get_activities", return_value=iter(history)),
+        patch("strava.commands.backfill_enrichment.EnrichActivity.__call__", side_effect=[object(), None, object()]),
+    ):
+        checkpoint = BackfillEnrichment(runner, concurrency=1)()
+
+    assert checkpoint.processed == 3  # noqa: PLR2004
+    assert checkpoint.updated == 2  # noqa: PLR2004
+    assert checkpoint.before == datetime(2024, 1, 1, tzinfo=UTC)
+    assert checkpoint.completed_at is not None
+
+
+@pytest.mark.django_db
+def test_backfill_resumes_from_checkpoint(runner, history):
+    before = datetime(2024, 2, 15, tzinfo=UTC)
+    baker.make(Backfill, runner=runner, before=before, processed=10)
+
+    with (
+        patch.object(Runner, "get_activities", return_value=iter(history[1:])) as mock_get,
+        patch("strava.commands.backfill_enrichment.EnrichActivity.__call__", return_value=None),
+    ):
+        checkpoint = BackfillEnrichment(runner, concurrency=1)()
+
+    mock_get.assert_called_once_with(before=before, per_page=BackfillEnrichment.PER_PAGE)
+    assert checkpoint.processed == 12  # noqa: PLR2004
+
+
+@pytest.mark.django_db
+def test_backfill_does_nothing_once_complete(runner):
+    baker.make(Backfill, runner=runner, completed_at=datetime(2024, 1, 1, tzinfo=UTC))
+
+    with patch.object(Runner, "get_activities") as mock_get:
+        BackfillEnrichment(runner)()
+
+    mock_get.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_backfill_dry_run_reports_without_writing(runner, history, detail):
+    reports = []
+
+    with (
+        patch.object(Runner, "get_activities", return_value=iter(history[2:])),
+        patch.object(Runner, "activity", return_value=detail),
+        patch.object(Runner, "update_activity") as mock_update,
+    ):
+        BackfillEnrichment(runner, concurrency=1, dry_run=True, report=reports.append)()
+
+    mock_update.assert_not_called()
+    assert any(report.startswith("--- activities/1") for report in reports)
+    assert not Backfill.objects.filter(runner=runner).exists()
+
+
+@pytest.mark.django_db
+def test_backfill_dry_run_previews_a_completed_backfill(runner, history, detail):
+    completed_at = datetime(2024, 1, 1, tzinfo=UTC)
+    baker.make(Backfill, runner=runner, before=history[2].start_date, processed=3, completed_at=completed_at)
+
+    with (
+        patch.object(Runner, "get_activities", return_value=iter(history[2:])) as mock_get,
+        patch.object(Runner, "activity", return_value=detail),
+        patch.object(Runner, "update_activity") as mock_update,
+    ):
+        BackfillEnrichment(runner, concurrency=1, dry_run=True, report=lambda _: None)()
+
+    mock_get.assert_called_once_with(before=None, per_page=BackfillEnrichment.PER_PAGE)
+    mock_update.assert_not_called()
+    checkpoint = Backfill.objects.get(runner=runner)
+    assert checkpoint.processed == 3  # noqa: PLR2004
+    assert checkpoint.completed_at == completed_at
+
+
+@pytest.mark.django_db
+def test_backfill_waits_out_the_rate_limit(runner, history):
+    with (
+        patch.object(Runner, "get_activities", return_value=iter(history[2:])),
+        patch(
+            "strava.commands.backfill_enrichment.EnrichActivity.__call__",
+            side_effect=[StravaRateLimitError(30), object()],
+        ) as mock_enrich,
+        patch("strava.commands.backfill_enrichment.time.sleep") as mock_sleep,
+    ):
+        checkpoint = BackfillEnrichment(runner, concurrency=1)()
+
+    mock_sleep.assert_called_once_with(30)
+    assert mock_enrich.call_count == 2  # noqa: PLR2004
+    assert checkpoint.updated == 1
+
+
+@pytest.mark.django_db
+def test_backfill_waits_out_the_rate_limit_between_pages(runner, history):
+    def first_page(**kwargs):
+        yield history[0]
+        raise StravaRateLimitError(30)
+
+    with (
+        patch.object(Runner, "get_activities", side_effect=[first_page(), iter(history[1:])]) as mock_get,
+        patch("strava.commands.backfill_enrichment.EnrichActivity.__call__", return_value=object()),
+        patch("strava.commands.backfill_enrichment.time.sleep") as mock_sleep,
+    ):
+        checkpoint = BackfillEnrichment(runner, concurrency=1)()
+
+    mock_sleep.assert_called_once_with(30)
+    assert mock_get.call_args.kwargs["before"] == history[0].start_date
+    assert checkpoint.processed == 3  # noqa: PLR2004
+    assert checkpoint.completed_at is not None
+
+
+@pytest.mark.django_db
+def test_backfill_carries_on_past_an_invalid_activity(runner, history):
+    with (
+        patch.object(Runner, "get_activities", return_value=iter(history[1:])),
+        patch(
+            "strava.commands.backfill_enrichment.EnrichActivity.__call__",
+            side_effect=[Http404("invalid"), object()],
+        ),
+    ):
+        checkpoint = BackfillEnrichment(runner, concurrency=2)()
+
+    assert checkpoint.processed == 2  # noqa: PLR2004
+    assert checkpoint.updated == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("concurrency", [1, 2])
+def test_backfill_leaves_the_reserve_unspent(runner, history, settings, concurrency):
+    settings.STRAVA_RATE_LIMIT_BACKFILL_RESERVE = 0.3
+    reserves = []
+
+    with (
+        patch.object(Runner, "get_activities", return_value=iter(history)),
+        patch(
+            "strava.commands.backfill_enrichment.EnrichActivity.__call__",
+            side_effect=lambda: reserves.append(ratelimit._reserve.get()),
+        ),
+    ):
+        BackfillEnrichment(runner, concurrency=concurrency)()
+
+    assert reserves == [0.3] * 3
+
+
+@pytest.mark.django_db
+def test_backfill_command_requires_a_known_runner(call_command):
+    with pytest.raises(CommandError):
+        call_command("backfill_enrichment", "999")
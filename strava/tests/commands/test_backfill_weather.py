@@ -0,0 +1,108 @@
+from datetime import UTC, datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from model_bakery import baker
+
+from strava.commands.backfill_weather import BackfillWeather
+from strava.data_models import ActivityType
+from strava.models import Activity, ActivitySummary, Runner
+from weather.exceptions import WeatherUnavailableError
+from weather.models import Weather
+
+START = datetime.now(tz=UTC).replace(microsecond=0) - timedelta(days=1)
+
+
+@pytest.fixture
+def runner():
+    return baker.make(Runner, strava_id="123", access_expires="9999999999")
+
+
+def held(runner: Runner, strava_id: int, end_latlng: list[float] | None = None, **kwargs) -> Activity:
+    data = {"id": strava_id, "start_date": START.isoformat(), "elapsed_time": 1800}
+    if end_latlng:
+        data["end_latlng"] = end_latlng
+    baker.make(ActivitySummary, runner=runner, strava_id=strava_id, data=data)
+    return baker.make(Activity, runner=runner, strava_id=strava_id, type=ActivityType.Run.value, **kwargs)
+
+
+@pytest.mark.django_db
+def test_backfill_fetches_weather_at_the_end_of_each_activity(runner):
+    activity = held(runner, 1, end_latlng=[51.5, -0.1])
+    weather = baker.make(Weather)
+
+    with patch.object(Weather, "from_lat_long", return_value=weather) as mock_weather:
+        assert BackfillWeather(runner, throttle=0)() == 1
+
+    mock_weather.assert_called_once_with(51.5, -0.1, START + timedelta(seconds=1800))
+    activity.refresh_from_db()
+    assert activity.weather == weather
+
+
+@pytest.mark.django_db
+def test_backfill_skips_what_it_cannot_place(runner):
+    held(runner, 1)
+    held(runner, 2, end_latlng=[51.5, -0.1], weather=baker.make(Weather))
+    baker.make(Activity, runner=runner, strava_id=3, type=ActivityType.Run.value)
+    held(runner, 4, end_latlng=[51.5, -0.1])
+
+    with patch.object(Weather, "from_lat_long", side_effect=WeatherUnavailableError("none")) as mock_weather:
+        assert BackfillWeather(runner, throttle=0)() == 0
+
+    mock_weather.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_backfill_pauses_between_batches(runner):
+    for strava_id in range(1, 4):
+        held(runner, strava_id, end_latlng=[51.5, -0.1])
+
+    with (
+        patch.object(Weather, "from_lat_long", return_value=baker.make(Weather)),
+        patch("strava.commands.backfill_weather.time.sleep") as mock_sleep,
+    ):
+        assert BackfillWeather(runner, batch_size=2, throttle=30)() == 3  # noqa: PLR2004
+
+    mock_sleep.assert_called_once_with(30)
+
+
+@pytest.mark.django_db
+def test_backfill_passes_over_activities_beyond_the_providers_history(runner):
+    held(runner, 1, end_latlng=[51.5, -0.1])
+
+    with (
+        patch("strava.commands.backfill_weather.providers.OpenWeatherMap.history", timedelta(hours=1)),
+        patch.object(Weather, "from_lat_long") as mock_weather,
+    ):
+        assert BackfillWeather(runner, throttle=0)() == 0
+
+    mock_weather.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_backfill_uses_where_the_activity_ended_when_it_arrived(runner):
+    activity = baker.make(
+        Activity,
+        runner=runner,
+        strava_id=1,
+        type=ActivityType.Run.value,
+        end_date=START,
+        end_latitude=51.5,
+        end_longitude=-0.1,
+    )
+    weather = baker.make(Weather)
+
+    with patch.object(Weather, "from_lat_long", return_value=weather) as mock_weather:
+        assert BackfillWeather(runner, throttle=0)() == 1
+
+    mock_weather.assert_called_once_with(51.5, -0.1, START)
+    activity.refresh_from_db()
+    assert activity.weather == weather
+
+
+@pytest.mark.django_db
+def test_backfill_leaves_out_activities_beyond_the_providers_history(runner):
+    baker.make(Activity, runner=runner, strava_id=1, type=ActivityType.Run.value, end_date=START - timedelta(days=6))
+    recent = baker.make(Activity, runner=runner, strava_id=2, type=ActivityType.Run.value, end_date=START)
+
+    assert list(BackfillWeather(runner).pending()) == [recent]
@@ -0,0 +1,127 @@
+from unittest.mock import patch
+
+import pytest
+from model_bakery import baker
+
+from strava import routes
+from strava.animals import speed_index
+from strava.commands.enrich_activity import EnrichActivity
+from strava.commands.update_comparison import UpdateComparison
+from strava.commands.update_triathlon_score import UpdateTriathlonScore
+from strava.data_models import ActivityType, PolylineMap
+from strava.models import Activity, Animal, DetailedActivityTriathlon, Runner
+from weather.models import Weather
+
+
+@pytest.fixture
+def runner():
+    return baker.make(Runner, strava_id="123", access_expires="9999999999")
+
+
+@pytest.fixture
+def animals():
+    baker.make(Animal, name="Test Snail", avg_speed=0.01, max_speed=0.05)
+    baker.make(Animal, name="Test Cheetah", avg_speed=60, max_speed=110)
+
+
+@pytest.fixture
+def activity_data():
+    return DetailedActivityTriathlon(
+        id=1,
+        type=ActivityType.Run,
+        name="Morning Run",
+        description="Legs heavy",
+        distance=5000,
+        average_speed=3,
+    )
+
+
+@pytest.mark.django_db
+def test_enrich_fetches_once_and_writes_once(runner, animals, activity_data):
+    with (
+        patch.object(Runner, "activity", return_value=activity_data) as mock_activity,
+        patch.object(Runner, "update_activity") as mock_update,
+    ):
+        EnrichActivity(runner, 1)()
+
+    mock_activity.assert_called_once_with(1, fresh=True)
+    mock_update.assert_called_once()
+    update = mock_update.call_args.args[1]
+    assert update.description.startswith("Legs heavy")
+    assert UpdateComparison.MARKER_STRING in update.description
+    assert UpdateTriathlonScore.MARKER_STRING in update.description
+
+
+@pytest.mark.django_db
+def test_enrich_reads_the_animals_once(runner, animals, activity_data):
+    with (
+        patch.object(Runner, "activity", return_value=activity_data),
+        patch("strava.commands.update_comparison.speed_index", wraps=speed_index) as mock_index,
+    ):
+        EnrichActivity(runner, 1).plan()
+
+    mock_index.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_enrich_picks_the_same_animals_each_time(runner, animals, activity_data):
+    baker.make(Animal, name="Test Tortoise", avg_speed=0.2, max_speed=0.3)
+    baker.make(Animal, name="Test Horse", avg_speed=40, max_speed=70)
+
+    with patch.object(Runner, "activity", return_value=activity_data):
+        _, first = EnrichActivity(runner, 1).plan()
+        activity_data.name, activity_data.description = first.name, first.description
+        original, again = EnrichActivity(runner, 1).plan()
+
+    assert again == original
+
+
+@pytest.mark.django_db
+def test_enrich_skips_write_when_unchanged(runner, activity_data):
+    settings = runner.enrichment
+    settings.animal_comparison = False
+    settings.triathlon_score = False
+    settings.save()
+    activity_data.distance = 0
+
+    with (
+        patch.object(Runner, "activity", return_value=activity_data),
+        patch.object(Runner, "update_activity") as mock_update,
+    ):
+        assert EnrichActivity(runner, 1)() is None
+
+    mock_update.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_enrich_adds_weather_without_refetching(runner, activity_data):
+    weather = baker.make(Weather, detailed_status="Sunny")
+    baker.make(Activity, runner=runner, strava_id=1, type=ActivityType.Run.value, weather=weather)
+
+    with (
+        patch.object(Runner, "activity", return_value=activity_data) as mock_activity,
+        patch.object(Runner, "update_activity") as mock_update,
+    ):
+        EnrichActivity(runner, 1, weather=True)()
+
+    mock_activity.assert_called_once()
+    update = mock_update.call_args.args[1]
+    assert "Sunny" in update.description
+    assert Activity.MARKER_STRING in update.description
+
+
+@pytest.mark.django_db
+def test_enrich_redraws_a_changed_route(runner, activity_data):
+    record = baker.make(Activity, runner=runner, strava_id=1, type=ActivityType.Run.value)
+    record.set_route("_piFps|U_ulLnnqC_mqNvxq`@")
+    record.save()
+    activity_data.map = PolylineMap(id="1", polyline="_piFps|U_ulLnnqC")
+
+    with (
+        patch.object(Runner, "activity", return_value=activity_data),
+        patch.object(Runner, "update_activity"),
+    ):
+        EnrichActivity(runner, 1)()
+
+    record.refresh_from_db()
+    assert routes.is_current(record.route, "_piFps|U_ulLnnqC")
@@ -4,10 +4,12 @@ from unittest.mock import patch
 import pytest
 from model_bakery import baker
 
+from strava import routes
 from strava.commands.find_or_create_activity import FindOrCreateActivity
-from strava.data_models import ActivityType, DetailedActivity, LatLng
+from strava.data_models import ActivityType, DetailedActivity, LatLng, PolylineMap
 from strava.mixins import TimeMixin
 from strava.models import Activity, DetailedActivityTriathlon, Runner
+from weather.exceptions import WeatherUnavailableError
 from weather.models import Weather
 
 
@@ -93,9 +95,21 @@ def test_find_or_create_creates_new_activity(mock_weather, runner, activity_data
     assert result == created
     assert created.weather == weather  # type: ignore[attr-defined]
     assert created.type == activity_data.type.value  # type: ignore[attr-defined]
+    assert (created.end_date, created.end_latitude, created.end_longitude) == (activity_data.end_date, 51.5, -0.1)
     mock_weather.assert_called_once_with(51.5, -0.1)
 
 
+@pytest.mark.django_db
+@patch("strava.models.Weather.from_lat_long", side_effect=WeatherUnavailableError("OWM is down"))
+def test_find_or_create_without_weather_when_unavailable(mock_weather, runner, activity_data):
+    runner.activity = lambda activity_id: activity_data
+
+    created = FindOrCreateActivity(runner, 12345)()
+
+    assert created.weather is None  # type: ignore[attr-defined]
+    mock_weather.assert_called_once()
+
+
 @pytest.mark.django_db
 def test_find_or_create_no_end_latlng(runner, activity_data):
     activity_data.end_latlng = None
@@ -106,3 +120,15 @@ def test_find_or_create_no_end_latlng(runner, activity_data):
     assert result == created
     assert created.weather is None  # type: ignore[attr-defined]
     assert created.type == activity_data.type.value  # type: ignore[attr-defined]
+
+
+@pytest.mark.django_db
+def test_find_or_create_stores_route(runner, activity_data):
+    activity_data.end_latlng = None
+    activity_data.map = PolylineMap(id="1", polyline="_piFps|U_ulLnnqC_mqNvxq`@")
+    runner.activity = lambda activity_id: activity_data
+
+    created = FindOrCreateActivity(runner, 12345)()
+
+    assert created.route["path"].startswith("M ")
+    assert routes.is_current(created.route, "_piFps|U_ulLnnqC_mqNvxq`@")
@@ -0,0 +1,286 @@
+from datetime import UTC, datetime, timedelta
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+import pytest
+from model_bakery import baker
+
+from strava.commands.enrich_activity import EnrichActivity
+from strava.commands.process_events import ProcessEvents
+from strava.data_models import ActivityType
+from strava.exceptions import StravaNotFoundError, StravaRateLimitError
+from strava.models import Activity, ActivitySummary, DetailedActivityTriathlon, Event, Runner
+from weather.models import Weather
+
+
+@pytest.fixture(autouse=True)
+def no_debounce(settings):
+    # Events here are made just before they are drained.
+    settings.STRAVA_EVENT_DEBOUNCE = 0
+
+
+@pytest.fixture
+def runner():
+    return baker.make(Runner, strava_id=123, access_expires="9999999999")
+
+
+@pytest.fixture
+def activity_data():
+    return DetailedActivityTriathlon(id=456, type=ActivityType.Run, name="Run", distance=5000, average_speed=3)
+
+
+def event(runner: Runner, aspect_type: str = "update", object_id: int = 456, **kwargs) -> Event:
+    kwargs.setdefault("event_time", datetime(2025, 6, 1, 8, tzinfo=UTC))
+    return baker.make(
+        Event, owner=runner, object_type="activity", object_id=object_id, aspect_type=aspect_type, **kwargs
+    )
+
+
+@pytest.mark.django_db
+def test_events_move_through_each_state(runner, activity_data):
+    first, second = event(runner, "create"), event(runner)
+
+    with (
+        patch.object(Runner, "activity", return_value=activity_data) as mock_activity,
+        patch.object(Runner, "update_activity") as mock_update,
+    ):
+        assert ProcessEvents()() == 2  # noqa: PLR2004
+
+    mock_activity.assert_called_once_with(456, fresh=True)
+    mock_update.assert_called_once()
+    for processed in (first, second):
+        processed.refresh_from_db()
+        assert processed.processed
+        assert processed.state == Event.STATES["written"]
+        assert processed.attempts == 1
+        assert processed.received_at <= processed.fetched_at <= processed.enriched_at <= processed.written_at
+        assert processed.latency is not None
+
+
+@pytest.mark.django_db
+@override_settings(STRAVA_EVENT_MAX_ATTEMPTS=2, STRAVA_EVENT_LEASE=60)
+def test_failed_events_are_retried_after_their_lease(runner):
+    failing = event(runner)
+
+    with patch.object(Runner, "activity", side_effect=StravaNotFoundError("activities/456")) as mock_activity:
+        ProcessEvents()()
+        failing.refresh_from_db()
+        assert failing.state == Event.STATES["failed"]
+        assert not failing.processed
+        assert "activities/456" in failing.error
+
+        # Still leased, so not retried straight away.
+        assert ProcessEvents()() == 0
+
+        Event.objects.update(claimed_at=timezone.now() - timedelta(seconds=61))
+        ProcessEvents()()
+
+    assert mock_activity.call_count == 2  # noqa: PLR2004
+    failing.refresh_from_db()
+    assert failing.attempts == 2  # noqa: PLR2004
+    assert failing.processed
+
+
+@pytest.mark.django_db
+def test_rate_limit_hands_events_back(runner):
+    waiting = event(runner)
+
+    with (
+        patch.object(Runner, "activity", side_effect=StravaRateLimitError(60)),
+        pytest.raises(StravaRateLimitError),
+    ):
+        ProcessEvents()()
+
+    waiting.refresh_from_db()
+    assert waiting.claimed_at is None
+    assert waiting.attempts == 0
+    assert waiting.state == Event.STATES["received"]
+
+
+@pytest.mark.django_db
+def test_claim_takes_a_batch_of_unclaimed_events(runner):
+    for object_id in range(3):
+        event(runner, object_id=object_id)
+    event(runner, object_id=9, claimed_at=timezone.now())
+    event(runner, object_id=10, processed=True)
+
+    batch = ProcessEvents(batch_size=2).claim()
+
+    assert [e.object_id for e in batch] == [0, 1]
+    assert Event.objects.filter(claimed_at__isnull=False).count() == 3  # noqa: PLR2004
+
+
+@pytest.mark.django_db
+def test_process_events_command(runner, activity_data):
+    event(runner)
+
+    with (
+        patch.object(Runner, "activity", return_value=activity_data),
+        patch.object(Runner, "update_activity"),
+    ):
+        call_command("process_events", "--batch-size", "10")
+
+    assert Event.objects.get().processed
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(("updates", "echo"), [({}, True), ({"title": "Run"}, True), ({"title": "Renamed"}, False)])
+def test_updates_echoing_our_write_are_ignored(runner, activity_data, updates, echo):
+    event(runner, "create")
+    with (
+        patch.object(Runner, "activity", return_value=activity_data),
+        patch.object(Runner, "update_activity"),
+    ):
+        ProcessEvents()()
+
+    assert Event.objects.get().sent["name"] == "Run"
+    following = event(runner, updates=updates, event_time=datetime(2025, 6, 1, 9, tzinfo=UTC))
+
+    with (
+        patch.object(Runner, "activity", return_value=activity_data) as mock_activity,
+        patch.object(Runner, "update_activity"),
+    ):
+        ProcessEvents()()
+
+    following.refresh_from_db()
+    assert following.processed
+    assert following.state == (Event.STATES["ignored"] if echo else Event.STATES["written"])
+    assert mock_activity.called is not echo
+
+
+@pytest.mark.django_db
+def test_delete_drops_the_activity_without_asking_strava(runner):
+    alone, shared = baker.make(Weather), baker.make(Weather)
+    baker.make(Activity, runner=runner, strava_id=456, weather=alone)
+    baker.make(Activity, runner=runner, strava_id=457, weather=shared)
+    baker.make(Activity, runner=runner, strava_id=458, weather=shared)
+    baker.make(ActivitySummary, runner=runner, strava_id=456)
+    event(runner, "update")
+    event(runner, "delete")
+    event(runner, "delete", object_id=457)
+
+    with patch.object(Runner, "activity") as mock_activity:
+        assert ProcessEvents()() == 3  # noqa: PLR2004
+
+    mock_activity.assert_not_called()
+    assert set(Activity.objects.values_list("strava_id", flat=True)) == {458}
+    assert not ActivitySummary.objects.exists()
+    assert list(Weather.objects.all()) == [shared]
+    assert set(Event.objects.values_list("state", flat=True)) == {Event.STATES["written"]}
+
+
+@pytest.mark.django_db
+def test_deauthorisation_revokes_the_runner(runner):
+    baker.make(Activity, runner=runner, strava_id=456, weather=baker.make(Weather))
+    baker.make(ActivitySummary, runner=runner, strava_id=456)
+    baker.make(
+        Event,
+        owner=runner,
+        object_type="athlete",
+        object_id=123,
+        aspect_type="update",
+        updates={"authorized": "false"},
+        event_time=datetime(2025, 6, 1, 8, tzinfo=UTC),
+    )
+
+    with patch.object(Runner, "activity") as mock_activity:
+        ProcessEvents()()
+
+    mock_activity.assert_not_called()
+    runner.refresh_from_db()
+    assert runner.access_token == runner.refresh_token == ""
+    assert not runner.activities.exists()
+    assert not runner.activity_summaries.exists()
+    assert not Weather.objects.exists()
+    assert Event.objects.get().processed
+
+
+@pytest.mark.django_db
+def test_unrouted_events_are_ignored(runner):
+    baker.make(
+        Event,
+        owner=runner,
+        object_type="athlete",
+        object_id=123,
+        aspect_type="create",
+        event_time=datetime(2025, 6, 1, 8, tzinfo=UTC),
+    )
+
+    with patch.object(Runner, "activity") as mock_activity:
+        ProcessEvents()()
+
+    mock_activity.assert_not_called()
+    assert Event.objects.get().state == Event.STATES["ignored"]
+
+
+@pytest.mark.django_db
+def test_unexpected_errors_fail_the_group(runner, activity_data):
+    failing, other = event(runner), event(runner, object_id=789)
+
+    def activity(activity_id, fresh=False):
+        if activity_id == failing.object_id:
+            raise ValueError("No weather")
+        return activity_data
+
+    with patch.object(Runner, "activity", side_effect=activity), patch.object(Runner, "update_activity"):
+        ProcessEvents()()
+
+    failing.refresh_from_db()
+    other.refresh_from_db()
+    assert failing.state == Event.STATES["failed"]
+    assert failing.error == "No weather"
+    assert other.state == Event.STATES["written"]
+
+
+@pytest.mark.django_db
+def test_rate_limit_hands_back_the_rest_of_the_batch(runner, activity_data):
+    done, limited, waiting = event(runner, object_id=1), event(runner, object_id=2), event(runner, object_id=3)
+
+    def activity(activity_id, fresh=False):
+        if activity_id == limited.object_id:
+            raise StravaRateLimitError(60)
+        return activity_data
+
+    with (
+        patch.object(Runner, "activity", side_effect=activity),
+        patch.object(Runner, "update_activity"),
+        pytest.raises(StravaRateLimitError),
+    ):
+        ProcessEvents()()
+
+    done.refresh_from_db()
+    assert done.processed
+    for handed_back in (limited, waiting):
+        handed_back.refresh_from_db()
+        assert handed_back.claimed_at is None
+        assert handed_back.attempts == 0
+
+
+@pytest.mark.django_db
+def test_draining_leaves_recent_updates_to_their_job(runner, settings):
+    settings.STRAVA_EVENT_DEBOUNCE = 30
+    created, updated = event(runner, "create", object_id=1), event(runner, object_id=2)
+
+    assert [e.pk for e in ProcessEvents().claimable()] == [created.pk]
+    assert list(ProcessEvents(Event.objects.filter(object_id=2)).claimable()) == [updated]
+
+
+@pytest.mark.django_db
+def test_updates_echoing_a_write_made_elsewhere_are_ignored(runner, activity_data):
+    with (
+        patch.object(Runner, "activity", return_value=activity_data),
+        patch.object(Runner, "update_activity"),
+    ):
+        # As the update button or a backfill would.
+        EnrichActivity(runner, 456)()
+
+    following = event(runner, updates={})
+    with patch.object(Runner, "activity") as mock_activity:
+        ProcessEvents()()
+
+    following.refresh_from_db()
+    assert following.state == Event.STATES["ignored"]
+    mock_activity.assert_not_called()
@@ -0,0 +1,41 @@
+import time
+from unittest.mock import patch
+
+import pytest
+from model_bakery import baker
+
+from strava.commands.renew_tokens import RenewTokens
+from strava.exceptions import StravaError
+from strava.models import Runner
+
+
+@pytest.mark.django_db
+@patch.object(Runner, "do_refresh_token")
+def test_renews_only_expiring_tokens(mock_refresh):
+    baker.make(Runner, refresh_token="a", access_expires=str(int(time.time()) + 600))
+    baker.make(Runner, refresh_token="b", access_expires=str(int(time.time()) + 20000))
+
+    assert RenewTokens(within=3600)() == 1
+    mock_refresh.assert_called_once()
+
+
+@pytest.mark.django_db
+@patch.object(Runner, "do_refresh_token", side_effect=StravaError("revoked"))
+def test_failed_renewal_does_not_stop_the_rest(mock_refresh):
+    baker.make(Runner, refresh_token="a", access_expires="0")
+    baker.make(Runner, refresh_token="b", access_expires="0")
+
+    assert RenewTokens()() == 0
+    assert mock_refresh.call_count == 2  # noqa: PLR2004
+
+
+@pytest.mark.django_db
+@patch.object(Runner, "do_refresh_token")
+def test_renew_tokens_command(mock_refresh, call_command, django_capture_on_commit_callbacks):
+    baker.make(Runner, refresh_token="a", access_expires="0")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        output = call_command("renew_tokens")
+
+    assert "Queued token renewal" in output
+    mock_refresh.assert_called_once()
@@ -0,0 +1,81 @@
+from datetime import UTC, datetime, timedelta
+from unittest.mock import patch
+
+from django.utils import timezone
+
+import pytest
+from asgiref.sync import async_to_sync
+from model_bakery import baker
+
+from strava.commands.sync_activities import SyncActivities
+from strava.models import ActivitySummary, Runner, SummaryActivityTriathlon
+
+START = datetime(2025, 6, 1, 8, tzinfo=UTC)
+
+
+def summary(strava_id: int, start_date: datetime = START, name: str = "Run") -> SummaryActivityTriathlon:
+    return SummaryActivityTriathlon.model_validate({"id": strava_id, "name": name, "start_date": start_date})
+
+
+@pytest.fixture
+def runner():
+    return baker.make(Runner, strava_id="123", access_expires="9999999999")
+
+
+@pytest.mark.django_db
+def test_first_sync_fetches_everything(runner):
+    with patch.object(Runner, "get_activities", return_value=[summary(1), summary(2)]) as mock_get:
+        assert SyncActivities(runner)() == 2  # noqa: PLR2004
+
+    assert mock_get.call_args.kwargs["after"] is None
+    assert set(ActivitySummary.objects.values_list("strava_id", flat=True)) == {1, 2}
+    assert runner.activities_synced_at is not None
+
+
+@pytest.mark.django_db
+def test_fresh_list_is_not_synced(runner):
+    runner.activities_synced_at = timezone.now()
+
+    with patch.object(Runner, "get_activities") as mock_get:
+        assert SyncActivities(runner)() == 0
+
+    mock_get.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_sync_starts_after_newest_activity(runner):
+    baker.make(ActivitySummary, runner=runner, strava_id=1, start_date=START)
+    baker.make(ActivitySummary, runner=runner, strava_id=2, start_date=START - timedelta(days=1))
+
+    with patch.object(Runner, "get_activities", return_value=[]) as mock_get:
+        SyncActivities(runner)()
+
+    assert mock_get.call_args.kwargs["after"] == START
+
+
+@pytest.mark.django_db
+def test_sync_resumes_from_edited_activity(runner):
+    baker.make(ActivitySummary, runner=runner, strava_id=1, start_date=START, data={"name": "Old"})
+    runner.activities_resync_after = START - timedelta(seconds=1)
+
+    with patch.object(Runner, "get_activities", return_value=[summary(1, name="New")]) as mock_get:
+        SyncActivities(runner)()
+
+    assert mock_get.call_args.kwargs["after"] == START - timedelta(seconds=1)
+    assert ActivitySummary.objects.get(strava_id=1).data["name"] == "New"
+    runner.refresh_from_db()
+    assert runner.activities_resync_after is None
+
+
+@pytest.mark.django_db
+def test_acall_saves_every_page(runner):
+    async def activities(**kwargs):
+        for activity in (summary(1), summary(2)):
+            yield activity
+
+    with patch.object(Runner, "aget_activities", side_effect=activities):
+        assert async_to_sync(SyncActivities(runner).acall)() == 2  # noqa: PLR2004
+
+    assert set(ActivitySummary.objects.values_list("strava_id", flat=True)) == {1, 2}
+    runner.refresh_from_db()
+    assert runner.activities_synced_at is not None
@@ -3,11 +3,15 @@ from io import StringIO
 from unittest import mock
 from unittest.mock import MagicMock
 
+from django.core.cache import caches
 from django.core.management import call_command as _call_command
 from django.test import override_settings
 
 import pytest
 
+from strava.animals import index_at
+from strava.session import get_session
+
 
 @pytest.fixture
 def call_command():
@@ -31,12 +35,33 @@ def use_strava_settings() -> Generator[None]:
         yield
 
 
+@pytest.fixture(autouse=True)
+def clear_strava_cache(settings) -> Generator[None]:
+    # Rate limit counts would otherwise carry over from one test to the next.
+    caches[settings.STRAVA_CACHE].clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def clear_speed_index() -> Generator[None]:
+    # Animals made by one test are rolled back without a signal.
+    index_at.cache_clear()
+    yield
+    index_at.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def route_storage(settings) -> None:
+    # A fresh, in-memory default storage for every test.
+    settings.STORAGES = {**settings.STORAGES, "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"}}
+
+
 @pytest.fixture
 def mock_create(scope="module") -> Generator[mock.Mock]:
     mock_response = mock.Mock()
     mock_response.status_code = 201
     mock_response.json.return_value = {"id": 123}
-    with mock.patch("requests.post", return_value=mock_response) as mock_post:
+    with mock.patch.object(get_session(), "post", return_value=mock_response) as mock_post:
         yield mock_post
 
 
@@ -50,7 +75,7 @@ def mock_list(mock_callback_url, scope="module") -> Generator[mock.Mock]:
     mock_response = mock.Mock()
     mock_response.status_code = 200
     mock_response.json.return_value = [{"id": 123, "callback_url": mock_callback_url}]
-    with mock.patch("requests.get", return_value=mock_response) as mock_get:
+    with mock.patch.object(get_session(), "get", return_value=mock_response) as mock_get:
         yield mock_get
 
 
@@ -59,7 +84,7 @@ def mock_list_empty(scope="module") -> Generator[mock.Mock]:
     mock_response = mock.Mock()
     mock_response.status_code = 200
     mock_response.json.return_value = []
-    with mock.patch("requests.get", return_value=mock_response) as mock_get:
+    with mock.patch.object(get_session(), "get", return_value=mock_response) as mock_get:
         yield mock_get
 
 
@@ -68,7 +93,7 @@ def mock_list_exception(scope="module") -> Generator[mock.Mock]:
     mock_response = mock.Mock()
     mock_response.status_code = 500
     mock_response.json.return_value = {"error": "Internal Server Error"}
-    with mock.patch("requests.get", return_value=mock_response) as mock_get:
+    with mock.patch.object(get_session(), "get", return_value=mock_response) as mock_get:
         mock_get.side_effect = Exception("Mocked exception for testing")
         yield mock_get
 
@@ -77,7 +102,7 @@ def mock_list_exception(scope="module") -> Generator[mock.Mock]:
 def mock_delete(scope="module") -> Generator[mock.Mock]:
     mock_response = mock.Mock()
     mock_response.status_code = 204
-    with mock.patch("requests.delete", return_value=mock_response) as mock_delete:
+    with mock.patch.object(get_session(), "delete", return_value=mock_response) as mock_delete:
         yield mock_delete
 
 
@@ -86,12 +111,21 @@ def mock_delete_exception(scope="module") -> Generator[mock.Mock]:
     mock_response = mock.Mock()
     mock_response.status_code = 404
     mock_response.json.return_value = {"error": "Not Found"}
-    with mock.patch("requests.delete", return_value=mock_response) as mock_delete:
+    with mock.patch.object(get_session(), "delete", return_value=mock_response) as mock_delete:
         mock_delete.side_effect = Exception("Mocked exception for testing")
         yield mock_delete
 
 
 @pytest.fixture
 def mock_strava_request(scope="module") -> Generator[mock.Mock]:
-    with mock.patch("strava.models.requests.request", return_value=MagicMock()) as mock_request:
+    # Real headers, since what is cached from a response has to pickle.
+    with mock.patch.object(get_session(), "request", return_value=MagicMock(headers={})) as mock_request:
         yield mock_request
+
+
+@pytest.fixture
+def mock_async_strava_request() -> Generator[mock.AsyncMock]:
+    client = MagicMock()
+    client.get = mock.AsyncMock()
+    with mock.patch("strava.models.get_async_client", return_value=client):
+        yield client.get
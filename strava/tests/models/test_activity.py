@@ -31,3 +31,15 @@ def test_add_weather_integration():
 
         mock_activity.assert_called_once()
         mock_update.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_deleting_shared_weather_keeps_the_activities():
+    weather = baker.make(Weather)
+    activities = baker.make(Activity, weather=weather, _quantity=2)
+
+    weather.delete()
+
+    for activity in activities:
+        activity.refresh_from_db()
+        assert activity.weather is None
@@ -1,4 +1,5 @@
 import time
+from datetime import UTC, datetime, timedelta
 from http import HTTPStatus
 from unittest.mock import MagicMock, patch
 
@@ -6,7 +7,9 @@ from django.contrib.auth.models import User
 from django.http import Http404
 from django.test import RequestFactory
 
+import httpx
 import pytest
+from asgiref.sync import async_to_sync
 from model_bakery import baker
 from pydantic import ValidationError
 
@@ -16,8 +19,9 @@ from strava.exceptions import (
     StravaNotAuthenticatedError,
     StravaNotFoundError,
     StravaPaidFeatureError,
+    StravaRateLimitError,
 )
-from strava.models import DetailedActivityTriathlon, Runner, SummaryActivityTriathlon
+from strava.models import ActivitySummary, DetailedActivityTriathlon, Runner, SummaryActivityTriathlon
 
 
 @pytest.mark.django_db
@@ -157,6 +161,52 @@ def test_auth_code_does_not_refresh_if_not_expired(mock_refresh):
     mock_refresh.assert_not_called()
 
 
+@pytest.mark.django_db
+@patch.object(Runner, "do_refresh_token")
+def test_auth_code_refreshes_within_skew(mock_refresh, settings):
+    settings.STRAVA_TOKEN_REFRESH_SKEW = 300
+    runner = baker.make(Runner, access_token="token", access_expires=str(int(time.time()) + 60))
+
+    runner.auth_code
+
+    mock_refresh.assert_called_once()
+
+
+@pytest.mark.django_db
+@patch.object(Runner, "do_refresh_token")
+def test_refresh_token_if_expiring_adopts_concurrent_refresh(mock_refresh):
+    runner = baker.make(Runner, access_token="old", access_expires="0", refresh_token="refresh")
+    # Another worker refreshed the row after this instance was loaded.
+    Runner.objects.filter(pk=runner.pk).update(
+        access_token="new", access_expires=str(int(time.time()) + 10000), refresh_token="new-refresh"
+    )
+
+    assert runner.auth_code == "new"
+    assert runner.refresh_token == "new-refresh"
+    mock_refresh.assert_not_called()
+
+
+@pytest.mark.django_db
+@patch.object(Runner, "do_refresh_token")
+def test_refresh_token_if_expiring_forced(mock_refresh):
+    runner = baker.make(Runner, access_expires=str(int(time.time()) + 10000), refresh_token="refresh")
+
+    runner.refresh_token_if_expiring(force=True)
+
+    mock_refresh.assert_called_once()
+
+
+@pytest.mark.django_db
+@patch.object(Runner, "do_refresh_token")
+def test_auth_code_without_refresh_token_needs_authenticating(mock_refresh):
+    runner = baker.make(Runner, access_token="", access_expires="0", refresh_token="")
+
+    with pytest.raises(StravaNotAuthenticatedError):
+        runner.auth_code
+
+    mock_refresh.assert_not_called()
+
+
 def test_strava_api_url():
     path = "athlete"
     expected_url = f"https://www.strava.com/api/v3/{path}"
@@ -196,6 +246,7 @@ def test__make_call_authorized(mock_strava_request):
         (HTTPStatus.UNAUTHORIZED, StravaNotAuthenticatedError),
         (HTTPStatus.PAYMENT_REQUIRED, StravaPaidFeatureError),
         (HTTPStatus.NOT_FOUND, StravaNotFoundError),
+        (HTTPStatus.TOO_MANY_REQUESTS, StravaRateLimitError),
         (HTTPStatus.INTERNAL_SERVER_ERROR, StravaError),
     ],
 )
@@ -258,6 +309,52 @@ def test_get_activities_invalid(mock_strava_request):
         assert list(runner.get_activities()) == []
 
 
+def _page(data):
+    response = MagicMock(headers={})
+    response.status_code = HTTPStatus.OK
+    response.json.return_value = data
+    return response
+
+
+@pytest.mark.django_db
+def test_get_activities_pages_until_short_page(mock_strava_request):
+    mock_strava_request.side_effect = [_page([{"id": 1}, {"id": 2}]), _page([{"id": 3}])]
+    runner: Runner = baker.make(Runner, access_expires="9999999999")
+
+    activities = list(runner.get_activities(per_page=2))
+
+    assert [a.id for a in activities] == [1, 2, 3]
+    assert mock_strava_request.call_count == 2  # noqa: PLR2004
+    urls = [call.args[1] for call in mock_strava_request.call_args_list]
+    assert "page=1" in urls[0]
+    assert "page=2" in urls[1]
+
+
+@pytest.mark.django_db
+def test_get_activities_is_lazy(mock_strava_request):
+    mock_strava_request.side_effect = [_page([{"id": 1}]), _page([{"id": 2}])]
+    runner: Runner = baker.make(Runner, access_expires="9999999999")
+
+    first = next(iter(runner.get_activities(per_page=1)))
+
+    assert first.id == 1
+    mock_strava_request.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_get_activities_passes_range(mock_strava_request):
+    mock_strava_request.return_value = _page([])
+    runner: Runner = baker.make(Runner, access_expires="9999999999")
+    before = datetime(2025, 1, 2, tzinfo=UTC)
+    after = datetime(2025, 1, 1, tzinfo=UTC)
+
+    assert list(runner.get_activities(before=before, after=after)) == []
+
+    url = mock_strava_request.call_args.args[1]
+    assert f"before={int(before.timestamp())}" in url
+    assert f"after={int(after.timestamp())}" in url
+
+
 @pytest.mark.django_db
 def test_activity(mock_strava_request):
     data = {"name": "Test Activity"}
@@ -269,6 +366,19 @@ def test_activity(mock_strava_request):
     assert activity.name == data["name"]
 
 
+@pytest.mark.django_db
+def test_fresh_activity_skips_the_cache(mock_strava_request):
+    mock_strava_request.return_value.json.return_value = {"name": "Before"}
+    mock_strava_request.return_value.status_code = HTTPStatus.OK
+    runner: Runner = baker.make(Runner, access_expires="9999999999")
+    runner.activity(1)
+
+    mock_strava_request.return_value.json.return_value = {"name": "Edited on Strava"}
+
+    assert runner.activity(1).name == "Before"
+    assert runner.activity(1, fresh=True).name == "Edited on Strava"
+
+
 @pytest.mark.django_db
 def test_activity_invalid(mock_strava_request):
     mock_strava_request.return_value.json.return_value = {"key": "value"}
@@ -313,3 +423,109 @@ def test_get_distance_antipodal():
     point2 = (0.0, 180.0)
     expected_km = 6373.0 * 3.141592653589793
     assert Runner.get_distance(point1, point2) == pytest.approx(expected_km, rel=1e-3)
+
+
+@pytest.mark.django_db
+def test_cached_activities_newest_first():
+    runner: Runner = baker.make(Runner, strava_id="123")
+    start = datetime(2025, 6, 1, tzinfo=UTC)
+    baker.make(ActivitySummary, runner=runner, strava_id=1, start_date=start, data={"id": 1})
+    baker.make(ActivitySummary, runner=runner, strava_id=2, start_date=start + timedelta(days=1), data={"id": 2})
+
+    assert [a.id for a in runner.cached_activities()] == [2, 1]
+    assert [a.id for a in runner.cached_activities(after=start + timedelta(hours=1))] == [2]
+
+
+@pytest.mark.django_db
+def test_invalidate_activity_create_marks_stale():
+    runner: Runner = baker.make(Runner, strava_id="123", activities_synced_at=datetime.now(tz=UTC))
+    assert not runner.activities_stale()
+
+    runner.invalidate_activity(1, "create")
+
+    runner.refresh_from_db()
+    assert runner.activities_stale()
+    assert runner.activities_resync_after is None
+
+
+@pytest.mark.django_db
+def test_invalidate_activity_update_moves_cursor_back():
+    runner: Runner = baker.make(Runner, strava_id="123")
+    start = datetime(2025, 6, 1, tzinfo=UTC)
+    baker.make(ActivitySummary, runner=runner, strava_id=1, start_date=start)
+
+    runner.invalidate_activity(1, "update")
+
+    runner.refresh_from_db()
+    assert runner.activities_resync_after == start - timedelta(seconds=1)
+
+
+@pytest.mark.django_db
+def test_invalidate_activity_delete_drops_summary():
+    runner: Runner = baker.make(Runner, strava_id="123")
+    baker.make(ActivitySummary, runner=runner, strava_id=1)
+
+    runner.invalidate_activity(1, "delete")
+
+    assert not ActivitySummary.objects.filter(strava_id=1).exists()
+
+
+def strava_response(status_code: int, json=None, headers=None) -> httpx.Response:
+    return httpx.Response(status_code, json=json, headers=headers, request=httpx.Request("GET", "https://example.com"))
+
+
+@pytest.mark.django_db
+def test_aactivity(mock_async_strava_request):
+    mock_async_strava_request.return_value = strava_response(HTTPStatus.OK, {"id": 1, "name": "Run"})
+    runner: Runner = baker.make(Runner, access_expires="9999999999", access_token="token")
+
+    activity = async_to_sync(runner.aactivity)(1)
+
+    assert activity.name == "Run"
+    url, kwargs = mock_async_strava_request.call_args.args[0], mock_async_strava_request.call_args.kwargs
+    assert url == Runner._strava_api_url("activities/1")
+    assert kwargs["headers"]["Authorization"] == "Bearer token"
+
+
+@pytest.mark.django_db
+def test_amake_call_shares_the_response_cache(mock_async_strava_request, mock_strava_request):
+    mock_async_strava_request.return_value = strava_response(HTTPStatus.OK, {"id": 1}, {"ETag": '"v1"'})
+    runner: Runner = baker.make(Runner, access_expires="9999999999")
+
+    async_to_sync(runner.aget_details)()
+    runner.get_details()
+    async_to_sync(runner.aget_details)()
+
+    mock_async_strava_request.assert_called_once()
+    mock_strava_request.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_aget_activities_pages_until_short_page(mock_async_strava_request):
+    mock_async_strava_request.side_effect = [
+        strava_response(HTTPStatus.OK, [{"id": 1}, {"id": 2}]),
+        strava_response(HTTPStatus.OK, [{"id": 3}]),
+    ]
+    runner: Runner = baker.make(Runner, access_expires="9999999999")
+
+    async def collect():
+        return [activity.id async for activity in runner.aget_activities(per_page=2)]
+
+    assert async_to_sync(collect)() == [1, 2, 3]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "status_code, exception_type",
+    [
+        (HTTPStatus.UNAUTHORIZED, StravaNotAuthenticatedError),
+        (HTTPStatus.NOT_FOUND, StravaNotFoundError),
+        (HTTPStatus.TOO_MANY_REQUESTS, StravaRateLimitError),
+    ],
+)
+def test_amake_call_errors(mock_async_strava_request, status_code, exception_type):
+    mock_async_strava_request.return_value = strava_response(status_code, {})
+    runner: Runner = baker.make(Runner, access_expires="9999999999")
+
+    with pytest.raises(exception_type):
+        async_to_sync(runner.amake_call)("activities/1")
@@ -0,0 +1,92 @@
+from unittest.mock import patch
+
+from django.core.cache import caches
+
+import pytest
+from model_bakery import baker
+
+from strava import animals
+from strava.animals import VERSION_KEY, SpeedIndex, speed_index
+from strava.models import Animal
+
+
+def make_index(*speeds: float) -> SpeedIndex:
+    animals = tuple(Animal(name=f"Animal {speed}", avg_speed=speed, max_speed=speed) for speed in speeds)
+    return SpeedIndex(animals=animals, speeds=speeds)
+
+
+def test_nearest_either_side():
+    index = make_index(1, 5, 10, 20)
+
+    assert index.nearest_slower(7).max_speed == 5  # noqa: PLR2004
+    assert index.nearest_faster(7).max_speed == 10  # noqa: PLR2004
+
+
+def test_nearest_excludes_equal_speeds():
+    index = make_index(1, 5, 10)
+
+    assert index.nearest_slower(5).max_speed == 1
+    assert index.nearest_faster(5).max_speed == 10  # noqa: PLR2004
+
+
+def test_nothing_beyond_the_ends():
+    index = make_index(5, 10)
+
+    assert index.nearest_slower(5) is None
+    assert index.random_slower(1) is None
+    assert index.nearest_faster(10) is None
+    assert index.random_faster(20) is None
+
+
+def test_random_neighbours_stay_on_their_side():
+    index = make_index(1, 2, 3, 10, 20, 30)
+
+    for _ in range(50):
+        assert index.random_slower(5).max_speed < 5  # noqa: PLR2004
+        assert index.random_faster(5).max_speed > 5  # noqa: PLR2004
+
+
+@pytest.mark.django_db
+def test_speed_index_is_loaded_once():
+    speed_index()
+
+    with patch.object(SpeedIndex, "load") as mock_load:
+        speed_index()
+        speed_index()
+
+    mock_load.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_speed_index_reloads_after_animal_changes():
+    before = speed_index()
+
+    animal = baker.make(Animal, name="Test Snail", avg_speed=0.01, max_speed=0.001)
+    assert speed_index() is not before
+    assert speed_index().nearest_faster(0) == animal
+
+    animal.delete()
+    assert speed_index().nearest_faster(0) != animal
+
+
+@pytest.mark.django_db
+def test_speed_index_reloads_after_another_process_changes_animals(settings):
+    before = speed_index()
+
+    # As import_animals or the admin would, from another process.
+    caches[settings.STRAVA_CACHE].set(VERSION_KEY, 5)
+
+    assert speed_index() is not before
+
+
+@pytest.mark.django_db
+def test_deferring_invalidates_once(settings):
+    cache = caches[settings.STRAVA_CACHE]
+    cache.set(VERSION_KEY, 0)
+
+    with animals.deferring():
+        baker.make(Animal, name="Test Snail", avg_speed=0.01, max_speed=0.001)
+        baker.make(Animal, name="Test Slug", avg_speed=0.01, max_speed=0.002)
+        assert cache.get(VERSION_KEY) == 0
+
+    assert cache.get(VERSION_KEY) == 1
@@ -1,5 +1,5 @@
-from datetime import datetime
-from unittest.mock import patch
+from datetime import UTC, datetime
+from unittest.mock import ANY, patch
 
 import pytest
 from model_bakery import baker
@@ -9,10 +9,10 @@ from strava.tasks.create_event import create_event as create_event_func
 
 
 @pytest.mark.django_db
-@patch("strava.tasks.create_event.update_activity_weather")
-@patch("strava.tasks.create_event.update_triathlon_score")
-def test_create_event_success(mock_update_triathlon, mock_update_weather, db):
-    runner = baker.make(Runner, strava_id=123)
+@patch("strava.commands.process_events.EnrichActivity")
+def test_create_event_success(mock_enrich, db, django_capture_on_commit_callbacks):
+    mock_enrich.return_value.sent = None
+    runner = baker.make(Runner, strava_id=123, activities_synced_at=datetime.now(tz=UTC))
     kwargs = {
         "event_time": int(datetime.now().timestamp()),
         "owner_id": runner.strava_id,
@@ -22,9 +22,51 @@ def test_create_event_success(mock_update_triathlon, mock_update_weather, db):
         "updates": {"key": "value"},
         "subscription_id": 123,
     }
-    create_event_func.func(**kwargs)
+    with django_capture_on_commit_callbacks(execute=True):
+        create_event_func.func(**kwargs)
 
     event = Event.objects.get(owner=runner, object_id=kwargs["object_id"])
-    assert event is not None
-    mock_update_weather.enqueue.assert_called_once_with(event.pk)
-    mock_update_triathlon.enqueue.assert_called_once_with(event.owner.pk, event.object_id)
+    assert event.processed
+    mock_enrich.assert_called_once_with(event.owner, event.object_id, weather=True, progress=ANY)
+
+    runner.refresh_from_db()
+    assert runner.activities_synced_at is None
+
+
+@pytest.mark.django_db
+@patch("strava.commands.process_events.EnrichActivity")
+def test_create_event_update_skips_weather(mock_enrich, db, django_capture_on_commit_callbacks):
+    mock_enrich.return_value.sent = None
+    runner = baker.make(Runner, strava_id=123)
+    with django_capture_on_commit_callbacks(execute=True):
+        create_event_func.func(
+            event_time=int(datetime.now().timestamp()),
+            owner_id=runner.strava_id,
+            object_type="activity",
+            object_id=456,
+            aspect_type="update",
+            updates={"title": "New"},
+            subscription_id=123,
+        )
+
+    mock_enrich.assert_called_once_with(runner, 456, weather=False, progress=ANY)
+
+
+@pytest.mark.django_db
+@patch("strava.commands.process_events.EnrichActivity")
+def test_create_event_ignores_repeated_delivery(mock_enrich, db, django_capture_on_commit_callbacks):
+    mock_enrich.return_value.sent = None
+    runner = baker.make(Runner, strava_id=123)
+    kwargs = {
+        "event_time": int(datetime.now().timestamp()),
+        "owner_id": runner.strava_id,
+        "object_type": "activity",
+        "object_id": 456,
+        "aspect_type": "update",
+        "subscription_id": 123,
+    }
+    with django_capture_on_commit_callbacks(execute=True):
+        assert create_event_func.func(**kwargs) is not None
+        assert create_event_func.func(**kwargs) is None
+
+    mock_enrich.assert_called_once_with(runner, 456, weather=False, progress=ANY)
@@ -66,3 +66,55 @@ def test_svg_path():
 def test_str():
     line = Line([(0, 0), (1, 1)])
     assert str(line) == line.svg_path()
+
+
+@pytest.mark.parametrize("size", [(640, 480), (640, 320), (100, 400)])
+def test_fit_matches_each_step_in_turn(size):
+    coordinates = [(51.5, -0.12), (51.52, -0.1), (51.49, -0.09), (51.51, -0.15)]
+
+    stepwise = Line(list(coordinates))
+    stepwise.rotate()
+    stepwise.normalize()
+    p = round((size[0] / 100) * 5)
+    stepwise.scale((size[0] - p, size[1] - p))
+    stepwise.center(size)
+
+    line = Line(list(coordinates))
+    line.fit(size)
+
+    assert line.coordinates == pytest.approx(stepwise.coordinates)
+
+
+def test_fit_single_point():
+    line = Line([(1, 1), (1, 1)])
+    line.fit((10, 10))
+    assert line.coordinates == [(5, 5), (5, 5)]
+
+
+def test_simplify_straight_line():
+    line = Line([(0, 0), (1, 0.1), (2, -0.1), (3, 0), (4, 0)])
+    line.simplify()
+    assert line.coordinates == [(0, 0), (4, 0)]
+
+
+def test_simplify_keeps_corners():
+    line = Line([(0, 0), (1, 0), (2, 0), (2, 1), (2, 2)])
+    line.simplify()
+    assert line.coordinates == [(0, 0), (2, 0), (2, 2)]
+
+
+def test_simplify_keeps_turnaround():
+    line = Line([(0, 0), (5, 0), (10, 0), (5, 0.2), (0, 0.1)])
+    line.simplify()
+    assert (10, 0) in line.coordinates
+
+
+def test_simplify_tolerance():
+    coordinates = [(0, 0), (1, 1), (2, 0)]
+    line = Line(list(coordinates))
+    line.simplify(tolerance=2)
+    assert line.coordinates == [(0, 0), (2, 0)]
+
+    line = Line(list(coordinates))
+    line.simplify(tolerance=0.5)
+    assert line.coordinates == coordinates
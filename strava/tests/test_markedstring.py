@@ -1,4 +1,5 @@
-from strava.utils import MarkedString
+from strava.data_models import UpdatableActivity
+from strava.utils import ActivityPatch, MarkedString, MarkerRegistry
 
 
 def test_marked_string_str():
@@ -43,3 +44,76 @@ def test_replace_or_append_append():
     ms = MarkedString("baz", "!")
     text = "Hello friend."
     assert ms.replace_or_append(text) == "Hello friend. !baz!"
+
+
+def test_activity_patch_applies_every_edit():
+    patch = ActivityPatch()
+    patch.put("description", MarkedString("new", "!"))
+    patch.remove("description", "#")
+    patch.put("description", MarkedString("added", "$"))
+    patch.put("name", MarkedString("sun", "*"))
+
+    update = patch.apply(UpdatableActivity(name="Run", description="Legs !old! #gone# heavy"))
+
+    assert update.description == "Legs !new!  heavy $added$"
+    assert update.name == "Run *sun*"
+
+
+def test_activity_patch_only_edits_the_first_segment():
+    patch = ActivityPatch()
+    patch.put("description", MarkedString("new", "!"))
+
+    update = patch.apply(UpdatableActivity(description="!a! !b!"))
+
+    assert update.description == "!new! !b!"
+
+
+def test_activity_patch_leaves_untouched_fields():
+    patch = ActivityPatch()
+    patch.remove("description", "#")
+
+    original = UpdatableActivity(description="No markers")
+
+    assert patch.apply(original) == original
+
+
+def test_replace_in_text_without_segment_appends_nothing():
+    ms = MarkedString("baz", "!")
+    assert ms.replace_in_text("Hello friend.") == "Hello friend."
+
+
+def test_segments_end_on_the_line_they_start():
+    ms = MarkedString("", "#")
+    text = "one #a\ntwo# three #b#"
+    assert ms.remove_from_text(text) == "one #a\ntwob#"
+
+
+def test_markers_sharing_characters_are_told_apart():
+    registry = MarkerRegistry()
+    weather = registry.register("\ufe00\ufe01")
+    score = registry.register("\ufe01\ufe02")
+    text = f"{weather}\ufe02 rain{weather} {score}tri{score}"
+
+    assert registry.rebuild(text, {score: None}) == f"{weather}\ufe02 rain{weather} "
+    assert [marker for _, _, marker in registry.segments(text)] == [weather, score]
+
+
+def test_an_unclosed_marker_hides_nothing():
+    registry = MarkerRegistry()
+    weather, score, comparison = registry.register("W"), registry.register("T"), registry.register("C")
+    text = f"Run {weather}broken {score}tri%: 0.5.{score} {comparison}cat{comparison}"
+
+    assert [marker for _, _, marker in registry.segments(text)] == [score, comparison]
+    assert registry.rebuild(text, {score: MarkedString("tri%: 0.6.", score)}) == (
+        f"Run {weather}broken {score}tri%: 0.6.{score} {comparison}cat{comparison}"
+    )
+    assert registry.rebuild(text, {comparison: None}) == f"Run {weather}broken {score}tri%: 0.5.{score} "
+
+
+def test_a_closed_segment_takes_markers_inside_it():
+    registry = MarkerRegistry()
+    outer, inner = registry.register("O"), registry.register("I")
+
+    assert list(registry.segments("O I x I O")) == [(0, 9, outer)]
+    assert list(registry.segments("O I x O I")) == [(0, 7, outer)]
+    assert list(registry.segments("I O I x")) == [(0, 5, inner)]
@@ -5,8 +5,8 @@ from django.http import HttpResponseRedirect
 
 import pytest
 
-from strava.exceptions import StravaNotAuthenticatedError
-from strava.middleware import NotAuthenticated
+from strava.exceptions import StravaNotAuthenticatedError, StravaRateLimitError
+from strava.middleware import NotAuthenticated, RateLimited
 
 
 @pytest.fixture
@@ -57,3 +57,17 @@ def test_process_exception_ignores_other_exceptions(request_factory, mocker):
     assert response is None
     mock_logout.assert_not_called()
     mock_reverse.assert_not_called()
+
+
+def test_rate_limited_returns_retry_after(request_factory):
+    middleware = RateLimited(mock.MagicMock())
+    response = middleware.process_exception(request_factory.get("/"), StravaRateLimitError(42.4))
+
+    assert response.status_code == 503  # noqa: PLR2004
+    assert response["Retry-After"] == "42"
+
+
+def test_rate_limited_ignores_other_exceptions(request_factory):
+    middleware = RateLimited(mock.MagicMock())
+
+    assert middleware.process_exception(request_factory.get("/"), Exception("Other")) is None
@@ -0,0 +1,85 @@
+from datetime import UTC, datetime, timedelta
+from unittest.mock import ANY, patch
+
+from django.utils import timezone
+
+import pytest
+from model_bakery import baker
+
+from strava.data_models import EventWebhook
+from strava.models import Event, Runner
+from strava.tasks.process_events import process_events, receive
+
+EVENT_TIME = int(datetime(2025, 6, 1, 8, tzinfo=UTC).timestamp())
+
+
+@pytest.fixture
+def runner():
+    return baker.make(Runner, strava_id=123)
+
+
+def webhook(aspect_type: str = "update", event_time: int = EVENT_TIME, object_id: int = 456) -> EventWebhook:
+    return EventWebhook(
+        object_type="activity",
+        object_id=object_id,
+        aspect_type=aspect_type,
+        owner_id=123,
+        subscription_id=1,
+        event_time=event_time,
+    )
+
+
+@pytest.mark.django_db
+@patch("strava.tasks.process_events.process_events")
+def test_receive_ignores_repeated_deliveries(mock_process_events, runner):
+    mock_process_events.get_backend.return_value.supports_defer = False
+    assert receive(webhook()) is not None
+    assert receive(webhook()) is None
+
+    assert Event.objects.count() == 1
+    mock_process_events.enqueue.assert_called_once_with(123, "activity", 456)
+
+
+@pytest.mark.django_db
+@patch("strava.tasks.process_events.process_events")
+def test_receive_queues_one_job_per_object(mock_process_events, runner):
+    mock_process_events.get_backend.return_value.supports_defer = False
+    receive(webhook(event_time=EVENT_TIME))
+    receive(webhook(event_time=EVENT_TIME + 1))
+    receive(webhook(event_time=EVENT_TIME, object_id=789))
+
+    assert Event.objects.count() == 3  # noqa: PLR2004
+    assert [c.args for c in mock_process_events.enqueue.call_args_list] == [
+        (123, "activity", 456),
+        (123, "activity", 789),
+    ]
+
+
+@pytest.mark.django_db
+@patch("strava.commands.process_events.EnrichActivity")
+def test_process_events_coalesces_pending_events(mock_enrich, runner):
+    mock_enrich.return_value.sent = None
+    with patch("strava.tasks.process_events.process_events"):
+        receive(webhook("create", EVENT_TIME))
+        receive(webhook("update", EVENT_TIME + 1))
+        receive(webhook("update", EVENT_TIME + 2))
+
+    assert process_events.func(123, "activity", 456) == 3  # noqa: PLR2004
+
+    mock_enrich.assert_called_once_with(runner, 456, weather=True, progress=ANY)
+    assert not Event.objects.filter(processed=False).exists()
+
+
+@pytest.mark.django_db
+@patch("strava.tasks.process_events.process_events")
+def test_receive_delays_updates_to_take_a_burst_together(mock_process_events, runner, settings):
+    settings.STRAVA_EVENT_DEBOUNCE = 30
+    mock_process_events.get_backend.return_value.supports_defer = True
+
+    receive(webhook("update"))
+    receive(webhook("create", object_id=789))
+
+    run_after = mock_process_events.using.call_args.kwargs["run_after"]
+    assert timezone.now() < run_after <= timezone.now() + timedelta(seconds=30)
+    mock_process_events.using.return_value.enqueue.assert_called_once_with(123, "activity", 456)
+    mock_process_events.enqueue.assert_called_once_with(123, "activity", 789)
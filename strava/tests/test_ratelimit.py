@@ -0,0 +1,99 @@
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.test import override_settings
+
+import pytest
+from model_bakery import baker
+
+from strava import ratelimit
+from strava.exceptions import StravaRateLimitError
+from strava.models import Runner
+from strava.tasks.enrich_activity import enrich_activity
+
+# Ten minutes into a quarter hour, and into the day.
+NOW = 1_750_000_200.0
+
+
+def test_window_resets_on_the_quarter_hour():
+    assert ratelimit.SHORT.started(NOW) % (15 * 60) == 0
+    assert ratelimit.SHORT.resets_in(NOW) == pytest.approx(15 * 60 - NOW % (15 * 60))
+
+
+def test_acquire_counts_calls():
+    ratelimit.acquire(NOW)
+    ratelimit.acquire(NOW)
+
+    assert ratelimit.usage(ratelimit.SHORT, NOW)[0] == 2  # noqa: PLR2004
+    assert ratelimit.usage(ratelimit.DAILY, NOW)[0] == 2  # noqa: PLR2004
+
+
+@override_settings(STRAVA_RATE_LIMIT_HEADROOM=0)
+def test_acquire_refuses_once_spent():
+    ratelimit.record({"X-RateLimit-Limit": "100,1000", "X-RateLimit-Usage": "100,150"}, NOW)
+
+    with pytest.raises(StravaRateLimitError) as excinfo:
+        ratelimit.acquire(NOW)
+
+    assert excinfo.value.retry_after == pytest.approx(ratelimit.SHORT.resets_in(NOW))
+
+
+@override_settings(STRAVA_RATE_LIMIT_HEADROOM=0.1)
+def test_acquire_keeps_headroom():
+    ratelimit.record({"X-RateLimit-Limit": "100,1000", "X-RateLimit-Usage": "90,150"}, NOW)
+
+    with pytest.raises(StravaRateLimitError):
+        ratelimit.acquire(NOW)
+
+
+@override_settings(STRAVA_RATE_LIMIT_HEADROOM=0)
+def test_reserving_leaves_a_share_for_other_work():
+    ratelimit.record({"X-RateLimit-Limit": "100,1000", "X-RateLimit-Usage": "70,150"}, NOW)
+
+    with ratelimit.reserving(0.3), pytest.raises(StravaRateLimitError):
+        ratelimit.acquire(NOW)
+
+    ratelimit.acquire(NOW)
+
+
+def test_usage_resets_with_the_window():
+    ratelimit.record({"X-RateLimit-Limit": "100,1000", "X-RateLimit-Usage": "100,150"}, NOW)
+
+    assert ratelimit.usage(ratelimit.SHORT, NOW + 15 * 60)[0] == 0
+
+
+def test_record_ignores_missing_headers():
+    ratelimit.record({}, NOW)
+
+    assert ratelimit.usage(ratelimit.SHORT, NOW) == (0, 200)
+
+
+def test_defer_reenqueues_for_the_reset():
+    task = MagicMock()
+    task.get_backend.return_value.supports_defer = True
+
+    ratelimit.defer(task, StravaRateLimitError(60), 1, 2)
+
+    assert task.using.call_args.kwargs["run_after"] is not None
+    task.using.return_value.enqueue.assert_called_once_with(1, 2)
+
+
+def test_defer_raises_without_backend_support():
+    task = MagicMock()
+    task.get_backend.return_value.supports_defer = False
+
+    with pytest.raises(StravaRateLimitError):
+        ratelimit.defer(task, StravaRateLimitError(60))
+
+
+@pytest.mark.django_db
+@patch("strava.tasks.enrich_activity.EnrichActivity")
+@patch("strava.tasks.enrich_activity.ratelimit.defer")
+def test_enrich_activity_defers_when_rate_limited(mock_defer, mock_enrich):
+    runner = baker.make(Runner)
+    error = StravaRateLimitError(timedelta(minutes=5).total_seconds())
+    mock_enrich.return_value.side_effect = error
+
+    enrich_activity.func(runner.pk, 1, True)
+
+    mock_defer.assert_called_once_with(enrich_activity, error, runner.pk, 1, True)
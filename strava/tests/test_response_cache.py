@@ -0,0 +1,107 @@
+from http import HTTPStatus
+from unittest.mock import MagicMock, patch
+
+import pytest
+from model_bakery import baker
+
+from strava import response_cache
+from strava.data_models import UpdatableActivity
+from strava.models import Runner
+
+
+def _response(status_code=HTTPStatus.OK, data=None, etag=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = data if data is not None else {"name": "Run"}
+    response.headers = {"ETag": etag} if etag else {}
+    return response
+
+
+@pytest.fixture
+def runner():
+    return baker.make(Runner, strava_id="123", access_expires="9999999999")
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("athlete", response_cache.ATHLETE),
+        ("athlete/activities", response_cache.ACTIVITY_LIST),
+        ("athlete/activities?page=2", response_cache.ACTIVITY_LIST),
+        ("activities/42", response_cache.ACTIVITY),
+        ("activities/42/streams", None),
+        ("oauth/token", None),
+    ],
+)
+def test_endpoint(path, expected):
+    assert response_cache.endpoint(path) == expected
+
+
+@pytest.mark.django_db
+def test_fresh_response_is_served_from_cache(runner, mock_strava_request):
+    mock_strava_request.return_value = _response()
+
+    runner.activity(1)
+    runner.activity(1)
+
+    mock_strava_request.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_runners_do_not_share_entries(runner, mock_strava_request):
+    other = baker.make(Runner, strava_id="456", access_expires="9999999999")
+    mock_strava_request.return_value = _response()
+
+    runner.activity(1)
+    other.activity(1)
+
+    assert mock_strava_request.call_count == 2  # noqa: PLR2004
+
+
+@pytest.mark.django_db
+def test_stale_response_is_revalidated_by_etag(runner, mock_strava_request, settings):
+    settings.STRAVA_RESPONSE_TTL = {**settings.STRAVA_RESPONSE_TTL, "activities": 0}
+    mock_strava_request.side_effect = [
+        _response(data={"name": "Run"}, etag='W/"abc"'),
+        _response(status_code=HTTPStatus.NOT_MODIFIED),
+    ]
+
+    runner.activity(1)
+    activity = runner.activity(1)
+
+    assert activity.name == "Run"
+    assert mock_strava_request.call_args.kwargs["headers"]["If-None-Match"] == 'W/"abc"'
+
+
+@pytest.mark.django_db
+def test_update_activity_invalidates_the_activity(runner, mock_strava_request):
+    mock_strava_request.return_value = _response()
+
+    runner.activity(1)
+    runner.update_activity(1, UpdatableActivity(name="New"))
+    runner.activity(1)
+
+    assert [call.args[0] for call in mock_strava_request.call_args_list] == ["GET", "PUT", "GET"]
+
+
+@pytest.mark.django_db
+def test_update_activity_invalidates_the_activity_list(runner, mock_strava_request):
+    mock_strava_request.return_value = _response(data=[])
+
+    list(runner.get_activities())
+    with patch.object(Runner, "_make_call", return_value={}):
+        runner.update_activity(1, UpdatableActivity(name="New"))
+    list(runner.get_activities())
+
+    assert mock_strava_request.call_count == 2  # noqa: PLR2004
+
+
+@pytest.mark.django_db
+def test_webhook_invalidation_drops_the_activity(runner, mock_strava_request):
+    mock_strava_request.return_value = _response()
+
+    runner.activity(1)
+    runner.invalidate_activity(1, "update")
+    runner.activity(1)
+
+    assert mock_strava_request.call_count == 2  # noqa: PLR2004
@@ -0,0 +1,99 @@
+from http import HTTPStatus
+from io import BytesIO
+from unittest.mock import Mock, patch
+
+from django.core.files.storage import default_storage
+from django.test import RequestFactory
+
+from PIL import Image
+
+from strava import routes
+
+KEY = routes.Key(101, "_piFps|U_ulLnnqC_mqNvxq`@", "dark", (640, 480), "png")
+
+
+def test_rendition_renders_once():
+    render = Mock(return_value=b"image")
+
+    first = routes.rendition(KEY, render)
+    second = routes.rendition(KEY, render)
+
+    render.assert_called_once()
+    assert first.name == second.name
+    assert second.read() == b"image"
+
+
+def test_key_changes_with_source():
+    other = routes.Key(101, "other", "dark", (640, 480), "png")
+    assert other.name != KEY.name
+    assert other.name.startswith("routes/101/")
+
+
+def test_respond_sets_validators():
+    rendition = routes.rendition(KEY, lambda: b"image")
+
+    response = routes.respond(RequestFactory().get("/"), rendition)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.content == b"image"
+    assert response["Content-Type"] == "image/png"
+    assert response["ETag"] == rendition.etag
+    assert "Last-Modified" in response
+    assert "private" in response["Cache-Control"]
+    assert "max-age=" in response["Cache-Control"]
+
+
+def test_respond_not_modified():
+    rendition = routes.rendition(KEY, lambda: b"image")
+
+    response = routes.respond(RequestFactory().get("/", headers={"If-None-Match": rendition.etag}), rendition)
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response["ETag"] == rendition.etag
+
+
+def test_discard():
+    routes.rendition(KEY, lambda: b"image")
+    kept = routes.rendition(routes.Key(102, "other", "dark", (640, 480), "png"), lambda: b"image")
+
+    routes.discard(101)
+
+    assert not default_storage.exists(KEY.name)
+    assert default_storage.exists(kept.name)
+
+
+def test_discard_nothing_stored():
+    routes.discard(999)
+
+
+def test_render_png_palette_with_alpha():
+    content = routes.render_png([(0, 0), (1, 1), (2, 0)], (64, 48), (255, 255, 255))
+
+    im = Image.open(BytesIO(content))
+    assert im.size == (64, 48)
+    assert im.mode == "P"
+
+    alpha = im.convert("RGBA").getchannel("A")
+    assert alpha.getextrema() == (0, 255)
+    # Anti-aliased edges land somewhere between transparent and opaque.
+    assert any(alpha.histogram()[1:255])
+
+
+def test_variant_renders_its_siblings_together():
+    with patch("strava.routes.render_variants", wraps=routes.render_variants) as mock_render:
+        card = routes.variant(101, KEY.source, "card", "dark", "webp")
+        full = routes.variant(101, KEY.source, "full", "light", "svg")
+        thumbnail = routes.variant(101, KEY.source, "thumbnail", "dark", "png")
+
+    # Card and full share the detailed polyline; the thumbnail is drawn apart.
+    assert mock_render.call_count == 2  # noqa: PLR2004
+    assert card.content_type == "image/webp"
+    assert full.content_type == "image/svg+xml"
+    assert Image.open(BytesIO(thumbnail.read())).size == routes.VARIANTS["thumbnail"].size
+
+
+def test_render_variants_stores_every_theme_and_format():
+    renditions = routes.render_variants(101, KEY.source, detailed=True)
+
+    assert len(renditions) == 2 * len(routes.THEMES) * len(routes.FORMATS)
+    assert all(default_storage.exists(r.name) for r in renditions.values())
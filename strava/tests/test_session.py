@@ -0,0 +1,32 @@
+import httpx
+from asgiref.sync import async_to_sync
+
+from strava.session import STRAVA_HOST, get_async_client, get_session
+
+
+def test_get_session_is_shared():
+    assert get_session() is get_session()
+
+
+def test_get_session_pools_strava_connections(settings):
+    adapter = get_session().get_adapter(f"{STRAVA_HOST}/api/v3/athlete")
+
+    assert adapter._pool_maxsize == settings.STRAVA_HTTP_POOL_MAXSIZE
+    assert adapter._pool_block == settings.STRAVA_HTTP_POOL_BLOCK
+    assert adapter.max_retries.total == settings.STRAVA_HTTP_RETRIES
+
+
+def test_get_session_does_not_retry_answered_errors():
+    adapter = get_session().get_adapter(f"{STRAVA_HOST}/api/v3/athlete")
+
+    assert 429 not in adapter.max_retries.status_forcelist  # noqa: PLR2004
+    assert not adapter.max_retries.raise_on_status
+
+
+def test_get_async_client_is_shared_within_a_loop():
+    async def clients():
+        return get_async_client(), get_async_client()
+
+    first, second = async_to_sync(clients)()
+    assert first is second
+    assert isinstance(first, httpx.AsyncClient)
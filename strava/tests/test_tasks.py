@@ -0,0 +1,33 @@
+import pytest
+from django_tasks import default_task_backend
+
+from strava.tasks import BACKFILL, INTERACTIVE, WEBHOOK
+from strava.tasks.backfill_enrichment import backfill_enrichment
+from strava.tasks.backfill_weather import backfill_weather
+from strava.tasks.create_event import create_event
+from strava.tasks.enrich_activity import enrich_activity
+from strava.tasks.process_events import process_events
+
+
+@pytest.mark.parametrize(
+    "task, lane",
+    [
+        (enrich_activity, INTERACTIVE),
+        (process_events, WEBHOOK),
+        (create_event, WEBHOOK),
+        (backfill_enrichment, BACKFILL),
+        (backfill_weather, BACKFILL),
+    ],
+)
+def test_task_runs_in_its_lane(task, lane):
+    assert task.queue_name == lane["queue_name"]
+    assert task.priority == lane["priority"]
+
+
+def test_lanes_are_configured():
+    for lane in (INTERACTIVE, WEBHOOK, BACKFILL):
+        assert lane["queue_name"] in default_task_backend.queues
+
+
+def test_interactive_work_goes_before_background_work():
+    assert INTERACTIVE["priority"] > WEBHOOK["priority"] > BACKFILL["priority"]
@@ -2,7 +2,7 @@ import json
 import urllib.parse
 from datetime import UTC, datetime, timedelta
 from http import HTTPStatus
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
 from django.http import Http404
 from django.urls import reverse
@@ -11,8 +11,9 @@ import pytest
 from model_bakery import baker
 from pytest_django.asserts import assertInHTML
 
-from strava.data_models import DetailedActivity, SummaryAthlete
-from strava.models import Runner, RunnerSettings, SummaryActivityTriathlon
+from strava import routes
+from strava.data_models import DetailedActivity, EventWebhook, SummaryAthlete
+from strava.models import Activity, ActivitySummary, Runner, RunnerSettings, SummaryActivityTriathlon
 
 
 @pytest.fixture
@@ -27,6 +28,14 @@ def detailed_activity():
     )
 
 
+def pages(activities):
+    async def aget_activities(*args, **kwargs):
+        for activity in activities:
+            yield activity
+
+    return aget_activities
+
+
 @pytest.fixture
 def user(django_user_model):
     return django_user_model.objects.create_user(username="testuser", password="testpass")
@@ -94,13 +103,14 @@ def test_refresh_token(mock_do_refresh_token, auth_client, runner):
     response = auth_client.get(reverse("strava:refresh_token", kwargs={"strava_id": runner.strava_id}))
     assert response.status_code == HTTPStatus.FOUND
     assert response["Location"] == reverse("strava:activities")
+    mock_do_refresh_token.assert_called_once()
 
 
 @pytest.mark.django_db
-@patch("strava.views.Runner.get_activities")
-@patch("strava.views.Runner.get_details")
+@patch("strava.views.Runner.aget_activities")
+@patch("strava.views.Runner.aget_details")
 def test_activities_no_activities(mock_get_details, mock_get_activities, auth_client, runner):
-    mock_get_activities.return_value = []
+    mock_get_activities.side_effect = pages([])
     mock_get_details.return_value = SummaryAthlete.model_validate(
         {"name": "Test Runner", "strava_id": runner.strava_id}
     )
@@ -111,11 +121,11 @@ def test_activities_no_activities(mock_get_details, mock_get_activities, auth_cl
 
 
 @pytest.mark.django_db
-@patch("strava.views.Runner.get_activities")
-@patch("strava.views.Runner.get_details")
+@patch("strava.views.Runner.aget_activities")
+@patch("strava.views.Runner.aget_details")
 def test_activities(mock_get_details, mock_get_activities, auth_client, runner):
     activity = SummaryActivityTriathlon.model_validate({"id": 101, "name": "Test Activity", "distance": 1000})
-    mock_get_activities.return_value = [activity]
+    mock_get_activities.side_effect = pages([activity])
     mock_get_details.return_value = SummaryAthlete.model_validate(
         {"name": "Test Runner", "strava_id": runner.strava_id}
     )
@@ -128,21 +138,23 @@ def test_activities(mock_get_details, mock_get_activities, auth_client, runner):
 
 
 @pytest.mark.django_db
-@patch("strava.views.Runner.get_activities")
-@patch("strava.views.Runner.get_details")
+@patch("strava.views.Runner.aget_activities")
+@patch("strava.views.Runner.aget_details")
 def test_dashboard(mock_get_details, mock_get_activities, auth_client, runner):
-    mock_get_activities.return_value = [
-        SummaryActivityTriathlon.model_validate(
-            {
-                "id": 101,
-                "name": "Test Activity",
-                "type": "Run",
-                "distance": 5000,
-                "moving_time": 1800,
-                "start_date": datetime.now(tz=UTC),
-            }
-        )
-    ]
+    mock_get_activities.side_effect = pages(
+        [
+            SummaryActivityTriathlon.model_validate(
+                {
+                    "id": 101,
+                    "name": "Test Activity",
+                    "type": "Run",
+                    "distance": 5000,
+                    "moving_time": 1800,
+                    "start_date": datetime.now(tz=UTC),
+                }
+            )
+        ]
+    )
     mock_get_details.return_value = SummaryAthlete.model_validate(
         {"name": "Test Runner", "strava_id": runner.strava_id}
     )
@@ -160,20 +172,22 @@ def test_dashboard(mock_get_details, mock_get_activities, auth_client, runner):
 
 
 @pytest.mark.django_db
-@patch("strava.views.Runner.get_activities")
-@patch("strava.views.Runner.get_details")
+@patch("strava.views.Runner.aget_activities")
+@patch("strava.views.Runner.aget_details")
 def test_dashboard_period_filters_by_date(mock_get_details, mock_get_activities, auth_client, runner):
-    mock_get_activities.return_value = [
-        SummaryActivityTriathlon.model_validate(
-            {
-                "id": 101,
-                "name": "Old Activity",
-                "type": "Run",
-                "distance": 5000,
-                "start_date": datetime.now(tz=UTC) - timedelta(days=20),
-            }
-        )
-    ]
+    mock_get_activities.side_effect = pages(
+        [
+            SummaryActivityTriathlon.model_validate(
+                {
+                    "id": 101,
+                    "name": "Old Activity",
+                    "type": "Run",
+                    "distance": 5000,
+                    "start_date": datetime.now(tz=UTC) - timedelta(days=20),
+                }
+            )
+        ]
+    )
     mock_get_details.return_value = SummaryAthlete.model_validate(
         {"name": "Test Runner", "strava_id": runner.strava_id}
     )
@@ -183,6 +197,20 @@ def test_dashboard_period_filters_by_date(mock_get_details, mock_get_activities,
     assert auth_client.get(reverse("strava:dashboard"), {"period": "all"}).context["summary"].count == 1
 
 
+@pytest.mark.django_db
+@patch("strava.views.Runner.aget_activities")
+def test_dashboard_served_from_local_activities(mock_get_activities, auth_client, runner):
+    mock_get_activities.side_effect = pages(
+        [SummaryActivityTriathlon.model_validate({"id": 101, "name": "Run", "start_date": datetime.now(tz=UTC)})]
+    )
+
+    auth_client.get(reverse("strava:dashboard"))
+    response = auth_client.get(reverse("strava:dashboard"))
+
+    assert response.context["summary"].count == 1
+    mock_get_activities.assert_called_once()
+
+
 @pytest.mark.django_db
 @patch("strava.views.Runner.get_details")
 def test_settings_shows_defaults(mock_get_details, auth_client, runner):
@@ -227,7 +255,7 @@ def test_activities_no_runner(auth_client):
     assert response["Location"] == login_url
 
 
-@patch("strava.views.Runner.activity")
+@patch("strava.views.Runner.aactivity")
 def test_activity(mock_activity, auth_client, runner):
     activity = DetailedActivity.model_validate({"id": 101, "name": "Test Activity", "distance": 1000})
     mock_activity.return_value = activity
@@ -238,7 +266,24 @@ def test_activity(mock_activity, auth_client, runner):
     assertInHTML(activity.name, response.content.decode("utf-8"))
 
 
-@patch("strava.views.Runner.activity")
+@patch("strava.views.Runner.aactivity")
+def test_activity_stores_route(mock_activity, auth_client, runner, detailed_activity):
+    mock_activity.return_value = detailed_activity
+    record = baker.make(Activity, runner=runner, strava_id=101)
+    url = reverse("strava:activity", kwargs={"activityid": 101})
+
+    auth_client.get(url)
+    record.refresh_from_db()
+    assert record.route is not None
+
+    with patch("strava.models.routes.inline") as mock_inline:
+        response = auth_client.get(url)
+
+    mock_inline.assert_not_called()
+    assert record.route["path"] in response.content.decode()
+
+
+@patch("strava.views.Runner.aactivity")
 def test_activity_not_found(mock_activity, auth_client, runner):
     mock_activity.side_effect = Http404("Activity not found")
     response = auth_client.get(reverse("strava:activity", kwargs={"activityid": 101}))
@@ -294,6 +339,82 @@ def test_activity_png_light(mock_activity, auth_client, runner, detailed_activit
     assert response.content[:8] == b"\x89PNG\r\n\x1a\n"
 
 
+@patch("strava.views.Runner.activity")
+def test_activity_png_rendered_once(mock_activity, auth_client, runner, detailed_activity):
+    mock_activity.return_value = detailed_activity
+    url = reverse("strava:activity_png", kwargs={"activityid": 101})
+
+    with patch("strava.views.routes.render_png", wraps=routes.render_png) as mock_render:
+        first = auth_client.get(url)
+        second = auth_client.get(url)
+        not_modified = auth_client.get(url, headers={"If-None-Match": first["ETag"]})
+
+    mock_render.assert_called_once()
+    assert second.content == first.content
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        reverse("strava:activity_png", kwargs={"activityid": 101}),
+        reverse("strava:activity_svg", kwargs={"activityid": 101}),
+        reverse("strava:activity_route", args=[101, "card", "dark", "webp"]),
+    ],
+)
+@patch("strava.views.Runner.activity")
+def test_held_activity_route_served_without_strava(mock_activity, auth_client, runner, detailed_activity, url):
+    mock_activity.return_value = detailed_activity
+    record = baker.make(Activity, runner=runner, strava_id=101)
+    record.set_route(detailed_activity.map.polyline)
+    record.save()
+
+    first = auth_client.get(url)
+    mock_activity.reset_mock()
+    second = auth_client.get(url)
+    not_modified = auth_client.get(url, headers={"If-None-Match": first["ETag"]})
+
+    mock_activity.assert_not_called()
+    assert second.content == first.content
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@patch("strava.views.Runner.activity")
+def test_activity_route(mock_activity, auth_client, runner, detailed_activity):
+    mock_activity.return_value = detailed_activity
+    url = reverse("strava:activity_route", args=[101, "card", "dark", "webp"])
+
+    response = auth_client.get(url)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response["Content-Type"] == "image/webp"
+    assert response.content[8:12] == b"WEBP"
+
+
+@patch("strava.views.Runner.activity")
+def test_activity_route_thumbnail_from_summary(mock_activity, auth_client, runner):
+    baker.make(
+        ActivitySummary,
+        runner=runner,
+        strava_id=101,
+        data={"id": 101, "map": {"id": "1", "summary_polyline": "_piFps|U_ulLnnqC_mqNvxq`@"}},
+    )
+    url = reverse("strava:activity_route", args=[101, "thumbnail", "light", "png"])
+
+    response = auth_client.get(url)
+
+    assert response.status_code == HTTPStatus.OK
+    mock_activity.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "variant, theme, format", [("huge", "dark", "png"), ("card", "pink", "png"), ("card", "dark", "gif")]
+)
+def test_activity_route_unknown(auth_client, runner, variant, theme, format):
+    response = auth_client.get(reverse("strava:activity_route", args=[101, variant, theme, format]))
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
 @patch("strava.views.Runner.activity")
 def test_activity_png_invalid_theme(mock_activity, auth_client, runner, detailed_activity):
     mock_activity.return_value = detailed_activity
@@ -312,18 +433,34 @@ def test_activity_png_no_polyline(mock_activity, auth_client, runner):
     assert response.status_code == HTTPStatus.NOT_FOUND
 
 
-@patch("strava.views.create_event")
-def test_webhook_post(mock_create_event, client):
-    mock_enqueue = MagicMock()
-    mock_create_event.enqueue = mock_enqueue
-    payload = {"foo": "bar"}
+@patch("strava.views.receive")
+def test_webhook_post(mock_receive, client):
+    payload = {
+        "object_type": "activity",
+        "object_id": 1,
+        "aspect_type": "create",
+        "owner_id": 123,
+        "subscription_id": 1,
+        "event_time": 1620000000,
+    }
     response = client.post(
         reverse("strava:webhook"),
         data=json.dumps(payload),
         content_type="application/json",
     )
     assert response.status_code == HTTPStatus.OK
-    mock_enqueue.assert_called_once_with(**payload)
+    mock_receive.assert_called_once_with(EventWebhook.model_validate(payload))
+
+
+@patch("strava.views.receive")
+def test_webhook_post_invalid(mock_receive, client):
+    response = client.post(
+        reverse("strava:webhook"),
+        data=json.dumps({"foo": "bar"}),
+        content_type="application/json",
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    mock_receive.assert_not_called()
 
 
 def test_webhook_get_valid_token(client):
@@ -5,6 +5,7 @@ from django.urls import reverse
 
 import pytest
 
+from strava.session import get_session
 from strava.webhook import WebhookManager
 
 
@@ -37,7 +38,7 @@ def test_list_subscriptions_failure(manager):
     mock_response = mock.Mock()
     mock_response.status_code = 400
     mock_response.text = "Bad Request"
-    with mock.patch("requests.get", return_value=mock_response):
+    with mock.patch.object(get_session(), "get", return_value=mock_response):
         with pytest.raises(Exception) as excinfo:
             manager.list_subscriptions()
         assert "Bad Request" in str(excinfo.value)
@@ -57,7 +58,7 @@ def test_delete_subscription_failure(manager):
     mock_response = mock.Mock()
     mock_response.status_code = 400
     mock_response.text = "Bad Request"
-    with mock.patch("requests.delete", return_value=mock_response):
+    with mock.patch.object(get_session(), "delete", return_value=mock_response):
         with pytest.raises(Exception) as excinfo:
             manager.delete_subscription(123)
         assert "Bad Request" in str(excinfo.value)
@@ -67,7 +68,7 @@ def test_create_subscription_failure(manager):
     mock_response = mock.Mock()
     mock_response.status_code = 400
     mock_response.text = "Bad Request"
-    with mock.patch("requests.post", return_value=mock_response):
+    with mock.patch.object(get_session(), "post", return_value=mock_response):
         with pytest.raises(Exception) as excinfo:
             manager.create_subscription()
         assert "Bad Request" in str(excinfo.value)
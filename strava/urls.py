@@ -14,6 +14,7 @@ urlpatterns = [
     path("activity/<int:activityid>/update", views.trigger_update_activity, name="trigger_update_activity"),
     path("img/<int:activityid>.png", views.activity_png, name="activity_png"),
     path("img/<int:activityid>.svg", views.activity_svg, name="activity_svg"),
+    path("img/<int:activityid>/<str:variant>/<str:theme>.<str:format>", views.activity_route, name="activity_route"),
     path("auth", views.auth, name="auth"),
     path("callback", views.auth_callback, name="auth_callback"),
     path("refresh/<int:strava_id>", views.refresh_token, name="refresh_token"),
@@ -1,4 +1,99 @@
 import re
+from collections.abc import Iterable, Iterator, Mapping
+from functools import cache
+
+from strava.data_models import UpdatableActivity
+
+
+class MarkerRegistry:
+    """
+    Every marker that delimits a segment we write into Strava text.
+
+    A text is scanned for all of them at once, left to right, with a single
+    compiled pattern, so each edit to it is one linear pass however many
+    segments it touches. Scanning them together also settles markers that
+    share characters: where one marker ends and another begins is decided by
+    whichever the scan meets first, not by each searching the text alone.
+    """
+
+    markers: set[str]
+
+    def __init__(self):
+        self.markers = set()
+
+    def register(self, marker: str) -> str:
+        self.markers.add(marker)
+        return marker
+
+    def scanner(self, extra: Iterable[str] = ()) -> re.Pattern[str]:
+        return _scanner(frozenset(self.markers.union(extra)))
+
+    def segments(self, text: str, extra: Iterable[str] = ()) -> Iterator[tuple[int, int, str]]:
+        """
+        ``(start, end, marker)`` of each marked segment in ``text``. A segment
+        runs from a marker to the next occurrence of the same one on the same
+        line; anything between, other markers included, is its content.
+
+        A marker that is never closed, say because its closing half was edited
+        away, marks no segment and hides nothing: markers after it are only
+        taken as its content once it closes.
+        """
+        opened: dict[str, re.Match[str]] = {}
+        closed: list[tuple[int, int, str]] = []
+        position = 0
+        for match in self.scanner(extra).finditer(text):
+            if "\n" in text[position : match.start()]:
+                yield from closed
+                opened, closed = {}, []
+            position = match.end()
+
+            marker = match.group()
+            if (opening := opened.get(marker)) is None:
+                opened[marker] = match
+                continue
+
+            # Whatever was opened or closed since this marker opened is its content.
+            start = opening.start()
+            opened = {other: o for other, o in opened.items() if o.start() < start}
+            closed = [segment for segment in closed if segment[0] < start]
+            closed.append((start, match.end(), marker))
+        yield from closed
+
+    def rebuild(
+        self, text: str, edits: Mapping[str, "MarkedString | None"], append: bool = True, joiner: str = " "
+    ) -> str:
+        """
+        ``text`` with the first segment of each edited marker replaced, or
+        removed where its edit is None. With ``append``, replacements whose
+        marker was not found are added to the end in the order given.
+        """
+        parts: list[str] = []
+        found: set[str] = set()
+        position = 0
+        for start, end, marker in self.segments(text, edits):
+            if marker not in edits or marker in found:
+                continue
+            found.add(marker)
+            value = edits[marker]
+            parts.append(text[position:start])
+            parts.append("" if value is None else str(value))
+            position = end
+        parts.append(text[position:])
+
+        if append:
+            parts.extend(
+                f"{joiner}{value}" for marker, value in edits.items() if value is not None and marker not in found
+            )
+        return "".join(parts)
+
+
+@cache
+def _scanner(markers: frozenset[str]) -> re.Pattern[str]:
+    # Longest first, so a marker is never cut short by another it starts with.
+    return re.compile("|".join(re.escape(marker) for marker in sorted(filter(None, markers), key=len, reverse=True)))
+
+
+MARKERS = MarkerRegistry()
 
 
 class MarkedString(str):
@@ -13,14 +108,45 @@ class MarkedString(str):
         return f"{self.marker}{super().__str__()}{self.marker}"
 
     def remove_from_text(self, text: str) -> str:
-        pattern = rf"{re.escape(self.marker)}.*?{re.escape(self.marker)}"
-        return re.sub(pattern, "", text, count=1)
+        return MARKERS.rebuild(text, {self.marker: None})
 
     def replace_in_text(self, text: str) -> str:
-        pattern = rf"{re.escape(self.marker)}.*?{re.escape(self.marker)}"
-        return re.sub(pattern, str(self), text, count=1)
+        return MARKERS.rebuild(text, {self.marker: self}, append=False)
 
     def replace_or_append(self, text: str, joiner: str = " ") -> str:
-        if self.marker in text:
-            return self.replace_in_text(text)
-        return f"{text}{joiner}{self}"
+        return MARKERS.rebuild(text, {self.marker: self}, joiner=joiner)
+
+
+class ActivityPatch:
+    """
+    Marker edits to an activity's name and description, collected from every
+    enrichment and applied together.
+
+    Each field is rebuilt in one pass however many edits it has, and applying
+    a patch that changes nothing gives back an equal activity, so callers can
+    skip the write altogether.
+    """
+
+    FIELDS = ("name", "description")
+
+    edits: dict[str, dict[str, MarkedString | None]]
+
+    def __init__(self):
+        self.edits = {field: {} for field in self.FIELDS}
+
+    def put(self, field: str, value: MarkedString) -> None:
+        """
+        Replace the marked segment in ``field``, or append it if there is none.
+        """
+        self.edits[field][value.marker] = value
+
+    def remove(self, field: str, marker: str) -> None:
+        self.edits[field][marker] = None
+
+    def apply(self, activity: UpdatableActivity) -> UpdatableActivity:
+        changes = {
+            field: MARKERS.rebuild(getattr(activity, field) or "", edits)
+            for field, edits in self.edits.items()
+            if edits
+        }
+        return activity.model_copy(update=changes)
@@ -1,6 +1,5 @@
-import json
+import asyncio
 from datetime import UTC, datetime
-from io import BytesIO
 
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_not_required
@@ -10,23 +9,19 @@ from django.urls import reverse_lazy as reverse
 from django.views.decorators.csrf import csrf_exempt
 
 import polyline
-import svgwrite
-from PIL import Image, ImageDraw
+from asgiref.sync import sync_to_async
+from pydantic import ValidationError
 
-from strava import stats
-from strava.data_models import SummaryActivity
+from strava import routes, stats
+from strava.animals import SpeedIndex, speed_index
+from strava.commands import SyncActivities
+from strava.data_models import EventWebhook, SummaryActivity
 from strava.exceptions import StravaNotAuthenticatedError
 from strava.forms import RunnerSettingsForm
-from strava.line import Line
-from strava.models import Activity, Animal, Runner, SummaryActivityTriathlon
-from strava.tasks.create_event import create_event
-from strava.tasks.update_comparison import update_comparison
-from strava.tasks.update_triathlon_score import update_triathlon_score
-
-ROUTE_VIEWBOX = (640, 320)
-
-# Below this a polyline has nothing to draw.
-MIN_ROUTE_POINTS = 2
+from strava.line import Size
+from strava.models import Activity, Runner, SummaryActivityTriathlon
+from strava.tasks.enrich_activity import enrich_activity
+from strava.tasks.process_events import receive
 
 
 def _get_runner(request: HttpRequest) -> Runner:
@@ -56,29 +51,6 @@ def _enriched_map(runner: Runner, activities: list[SummaryActivityTriathlon]) ->
     return {record.strava_id: record for record in records}
 
 
-def _route(activity) -> dict | None:
-    """
-    The activity's route as an inline SVG path, so it takes its colour from the
-    active theme rather than being baked in as an image.
-    """
-    if not activity.map or not activity.map.polyline:
-        return None
-
-    decoded = [(float(lat), float(lng)) for lat, lng in polyline.decode(activity.map.polyline)]
-    if len(decoded) < MIN_ROUTE_POINTS:
-        return None
-
-    line = Line(decoded)
-    line.fit(ROUTE_VIEWBOX)
-
-    return {
-        "path": line.svg_path(),
-        "length": round(line.length),
-        "width": ROUTE_VIEWBOX[0],
-        "height": ROUTE_VIEWBOX[1],
-    }
-
-
 @login_not_required
 def index(request: HttpRequest) -> HttpResponseRedirect | HttpResponse:
     if request.user.is_authenticated:
@@ -106,18 +78,22 @@ def auth_callback(request: HttpRequest) -> HttpResponseRedirect | HttpResponse:
 
 def refresh_token(request: HttpRequest, strava_id: int) -> HttpResponseRedirect:
     runner: Runner = get_object_or_404(Runner, strava_id=strava_id)
-    runner.do_refresh_token()
+    runner.refresh_token_if_expiring(force=True)
 
     return HttpResponseRedirect(reverse("strava:activities"))
 
 
-def dashboard(request: HttpRequest) -> HttpResponseRedirect | HttpResponse:
-    runner = _get_runner(request)
+async def dashboard(request: HttpRequest) -> HttpResponseRedirect | HttpResponse:
+    runner = await sync_to_async(_get_runner)(request)
     period = stats.clean_period(request.GET.get("period"))
-    in_range = stats.in_period(runner.get_activities(), period)
-    records = _enriched_map(runner, in_range)
+    await SyncActivities(runner).acall()
 
-    return render(
+    def summarise() -> stats.Summary:
+        in_range = stats.in_period(runner.cached_activities(after=stats.period_start(period)), period)
+        records = _enriched_map(runner, in_range)
+        return stats.summarise(in_range, set(records))
+
+    return await sync_to_async(render)(
         request,
         "strava/dashboard.html",
         {
@@ -125,15 +101,22 @@ def dashboard(request: HttpRequest) -> HttpResponseRedirect | HttpResponse:
             "period": period,
             "periods": list(stats.PERIODS),
             "human_period": stats.HUMAN_PERIODS[period],
-            "summary": stats.summarise(in_range, set(records)),
+            "summary": await sync_to_async(summarise)(),
         },
     )
 
 
-def activities(request: HttpRequest) -> HttpResponseRedirect | HttpResponse:
-    runner = _get_runner(request)
-    all_activities = list(runner.get_activities())
-    records = _enriched_map(runner, all_activities)
+async def activities(request: HttpRequest) -> HttpResponseRedirect | HttpResponse:
+    runner = await sync_to_async(_get_runner)(request)
+    # Bringing the list up to date and fetching the athlete are independent
+    # calls to Strava, so they are made together.
+    _, details = await asyncio.gather(SyncActivities(runner).acall(), runner.aget_details())
+
+    def load() -> tuple[list[SummaryActivityTriathlon], dict[int, Activity]]:
+        all_activities = list(runner.cached_activities())
+        return all_activities, _enriched_map(runner, all_activities)
+
+    all_activities, records = await sync_to_async(load)()
 
     sport = (request.GET.get("sport") or "").lower()
     sports = sorted({a.type.value for a in all_activities if a.type is not None})
@@ -143,14 +126,14 @@ def activities(request: HttpRequest) -> HttpResponseRedirect | HttpResponse:
 
     refreshlink = reverse("strava:refresh_token", kwargs={"strava_id": int(runner.strava_id)})
 
-    return render(
+    return await sync_to_async(render)(
         request,
         "strava/activities.html",
         {
             "nav": "activities",
             "authlink": reverse("strava:auth"),
             "refreshlink": refreshlink,
-            "runner": runner.get_details(),
+            "runner": details,
             "rows": [stats.ActivityRow(a, records.get(a.id)) for a in shown],
             "sports": sports,
             "sport": sport,
@@ -158,13 +141,25 @@ def activities(request: HttpRequest) -> HttpResponseRedirect | HttpResponse:
     )
 
 
-def activity(request: HttpRequest, activityid) -> HttpResponseRedirect | HttpResponse:
-    runner = _get_runner(request)
-    activity = runner.activity(activityid)
-    record = Activity.objects.filter(runner=runner, strava_id=activityid).select_related("weather").first()
+async def activity(request: HttpRequest, activityid) -> HttpResponseRedirect | HttpResponse:
+    runner = await sync_to_async(_get_runner)(request)
+    activity, record = await asyncio.gather(
+        runner.aactivity(activityid),
+        Activity.objects.filter(runner=runner, strava_id=activityid).select_related("weather").afirst(),
+    )
     speed_kph = (activity.average_speed or 0) * 3.6
 
-    return render(
+    def draw() -> tuple[dict | None, SpeedIndex]:
+        # Activities we hold keep their route drawn; it is only drawn again
+        # when the polyline has changed since.
+        encoded = activity.map.polyline if activity.map else None
+        if record and record.set_route(encoded):
+            record.save(update_fields=["route"])
+        return (record.route if record else routes.inline(encoded)), speed_index()
+
+    route, animals = await sync_to_async(draw)()
+
+    return await sync_to_async(render)(
         request,
         "strava/activity.html",
         {
@@ -172,12 +167,12 @@ def activity(request: HttpRequest, activityid) -> HttpResponseRedirect | HttpRes
             "activity": activity,
             "sport": stats.sport_label(activity),
             "weather": record.weather if record else None,
-            "route": _route(activity),
+            "route": route,
             "speed_kph": speed_kph,
             # The nearest animal either side, so the panel is stable — the line
             # written to Strava picks a random pair from the same two sets.
-            "slower": Animal.objects.filter(max_speed__lt=speed_kph).order_by("-max_speed").first(),
-            "faster": Animal.objects.filter(max_speed__gt=speed_kph).order_by("max_speed").first(),
+            "slower": animals.nearest_slower(speed_kph),
+            "faster": animals.nearest_faster(speed_kph),
         },
     )
 
@@ -209,8 +204,7 @@ def settings(request: HttpRequest) -> HttpResponseRedirect | HttpResponse:
 
 def trigger_update_activity(request: HttpRequest, activityid: int) -> HttpResponseRedirect | HttpResponse:
     runner = _get_runner(request)
-    update_triathlon_score.enqueue(runner.pk, activityid)
-    update_comparison.enqueue(runner.pk, activityid)
+    enrich_activity.enqueue(runner.pk, activityid)
 
     response = HttpResponse(status=204)
     response["HX-Refresh"] = "true"
@@ -219,83 +213,99 @@ def trigger_update_activity(request: HttpRequest, activityid: int) -> HttpRespon
 
 def activity_svg(request: HttpRequest, activityid: int) -> HttpResponseRedirect | HttpResponse:
     runner = _get_runner(request)
+    size = (640, 480)
+    if rendition := _stored_route(runner, activityid, "animated", size, "svg"):
+        return routes.respond(request, rendition)
+
     activity: SummaryActivity = runner.activity(activityid)
     if not activity.map or not activity.map.polyline:
         raise Http404("Activity does not have a map or polyline data.")
 
-    decoded_line = [(float(lat), float(lng)) for lat, lng in polyline.decode(activity.map.polyline)]
-    line = Line(decoded_line)
-
-    route_colour = "#b9cded"
-    size = (640, 480)
-
-    line.fit(size)
-
+    encoded = activity.map.polyline
     animation_time: float = (activity.distance / 1000) if activity.distance else 0
 
-    style = f"""
-#route {{
-    stroke-dasharray: {line.length};
-    stroke-dashoffset: {line.length};
-    animation: dash {animation_time * 0.5}s linear forwards;
-}}
-
-@keyframes dash {{
-    to {{
-        stroke-dashoffset: 0;
-    }}
-}}
-"""
+    def render() -> bytes:
+        decoded_line = [(float(lat), float(lng)) for lat, lng in polyline.decode(encoded)]
+        return routes.render_svg(decoded_line, size, "#b9cded", animation_time)
 
-    dwg = svgwrite.Drawing(profile="full", size=size)
-    dwg.add(dwg.style(style))
-    dwg.add(dwg.rect(size=size, fill="none"))
-    dwg.add(dwg.path(d=line, stroke=route_colour, fill="none", id="route"))
-
-    response = HttpResponse(content_type="image/svg+xml")
-    response.write(dwg.tostring())
-
-    return response
+    # Keyed by the polyline alone, like the other renderings, so it can be
+    # found again from the digest on Activity.route.
+    rendition = routes.rendition(routes.Key(activityid, encoded, "animated", size, "svg"), render)
+    return routes.respond(request, rendition)
 
 
 def activity_png(request: HttpRequest, activityid: int) -> HttpResponseBadRequest | HttpResponseRedirect | HttpResponse:
-    match request.GET.get("theme", "dark"):
+    theme = request.GET.get("theme", "dark")
+    match theme:
         case "dark":
-            line_colour = (255, 255, 255, 255)
+            line_colour = (255, 255, 255)
         case "light":
-            line_colour = (0, 0, 0, 255)
+            line_colour = (0, 0, 0)
         case _:
             return HttpResponseBadRequest("Invalid theme specified.")
 
     runner = _get_runner(request)
+    size = (640, 480)
+    if rendition := _stored_route(runner, activityid, theme, size, "png"):
+        return routes.respond(request, rendition)
+
     activity = runner.activity(activityid)
     if not activity.map or not activity.map.polyline:
         raise Http404("Activity does not have a map or polyline data.")
 
-    decoded_line = [(float(lat), float(lng)) for lat, lng in polyline.decode(activity.map.polyline)]
-    line = Line(decoded_line)
+    encoded = activity.map.polyline
+
+    def render() -> bytes:
+        decoded_line = [(float(lat), float(lng)) for lat, lng in polyline.decode(encoded)]
+        return routes.render_png(decoded_line, size, line_colour)
+
+    rendition = routes.rendition(routes.Key(activityid, encoded, theme, size, "png"), render)
+    return routes.respond(request, rendition)
 
-    scale = 4
-    base_size = (640, 480)
-    high_res_size = (base_size[0] * scale, base_size[1] * scale)
 
-    im = Image.new("RGBA", high_res_size, color=(0, 0, 0, 0))
-    draw = ImageDraw.Draw(im)
+def activity_route(request: HttpRequest, activityid: int, variant: str, theme: str, format: str) -> HttpResponse:
+    if variant not in routes.VARIANTS or theme not in routes.THEMES or format not in routes.FORMATS:
+        raise Http404("No such route image.")
 
-    line.fit(im.size)
+    runner = _get_runner(request)
+    if routes.VARIANTS[variant].detailed and (
+        rendition := _stored_route(runner, activityid, theme, routes.VARIANTS[variant].size, format)
+    ):
+        return routes.respond(request, rendition)
 
-    prev = None
-    for p in line.coordinates:
-        if prev is not None:
-            draw.line(prev + p, fill=line_colour, width=scale)
-        prev = p
+    encoded = _route_polyline(runner, activityid, routes.VARIANTS[variant].detailed)
+    if not encoded:
+        raise Http404("Activity does not have a map or polyline data.")
 
-    im = im.resize(base_size, resample=Image.Resampling.LANCZOS)
+    return routes.respond(request, routes.variant(activityid, encoded, variant, theme, format))
 
-    buffer = BytesIO()
-    im.save(buffer, "PNG")
 
-    return HttpResponse(buffer.getvalue(), content_type="image/png")
+def _stored_route(runner: Runner, activityid: int, theme: str, size: Size, format: str) -> routes.Rendition | None:
+    """
+    The rendering already stored for an activity we hold, found from the
+    digest of the polyline its route was last drawn from, so serving it asks
+    nothing of Strava.
+    """
+    route = Activity.objects.filter(runner=runner, strava_id=activityid).values_list("route", flat=True).first()
+    if not route or not route.get("digest"):
+        return None
+    return routes.lookup(activityid, route["digest"], theme, size, format)
+
+
+def _route_polyline(runner: Runner, activityid: int, detailed: bool) -> str | None:
+    """
+    The polyline to draw a route from. Summary polylines come from the local
+    activity list when it has the activity, so they cost no call to Strava.
+    """
+    if not detailed:
+        summary = runner.activity_summaries.filter(strava_id=activityid).values_list("data", flat=True).first()
+        if summary and (encoded := (summary.get("map") or {}).get("summary_polyline")):
+            return encoded
+
+    activity = runner.activity(activityid)
+    if not activity.map:
+        return None
+    return activity.map.polyline if detailed else activity.map.summary_polyline or activity.map.polyline
 
 
 @login_not_required
@@ -303,11 +313,17 @@ def activity_png(request: HttpRequest, activityid: int) -> HttpResponseBadReques
 def webhook(request: HttpRequest) -> HttpResponse | JsonResponse:
     """
     This is the endpoint that Strava will call when there is a webhook event.
+
+    Strava wants an answer within two seconds, so a delivery is only recorded
+    here, and the work it causes is left to a job queued for its object.
     """
     match request.method:
         case "POST":
-            payload = json.loads(request.body)
-            create_event.enqueue(**payload)
+            try:
+                webhook = EventWebhook.model_validate_json(request.body)
+            except ValidationError:
+                return HttpResponseBadRequest()
+            receive(webhook)
 
             return HttpResponse(status=200)
         case "GET":
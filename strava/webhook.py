@@ -4,9 +4,8 @@ from http import HTTPStatus
 from django.conf import settings
 from django.urls import reverse
 
-import requests
-
 from strava.exceptions import StravaWebhookError
+from strava.session import get_session
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +36,7 @@ class WebhookManager:
 
         logger.info(f"Creating Strava subscription with callback URL: {data['callback_url']}")
 
-        response = requests.post(url, data=data)
+        response = get_session().post(url, data=data)
         if response.status_code != HTTPStatus.CREATED:
             raise StravaWebhookError(response.text)
 
@@ -53,7 +52,7 @@ class WebhookManager:
             "client_secret": settings.STRAVA_SECRET,
         }
 
-        response = requests.get(url, params=params)
+        response = get_session().get(url, params=params)
         if response.status_code != HTTPStatus.OK:
             raise StravaWebhookError(response.text)
 
@@ -69,6 +68,6 @@ class WebhookManager:
             "client_secret": settings.STRAVA_SECRET,
         }
 
-        response = requests.delete(url, params=params)
+        response = get_session().delete(url, params=params)
         if response.status_code != HTTPStatus.NO_CONTENT:
             raise StravaWebhookError(response.text)
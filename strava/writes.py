@@ -0,0 +1,40 @@
+"""
+What we last wrote to each activity, whichever process wrote it.
+
+Every write is followed by an update webhook telling us about it. Keeping the
+write in the cache shared by the web and worker processes for
+STRAVA_EVENT_ECHO_WINDOW seconds lets that webhook be recognised as our own
+and ignored, rather than enriching the activity all over again.
+"""
+
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import caches
+
+from strava.data_models import UpdatableActivity
+
+
+@dataclass(frozen=True)
+class Write:
+    name: str
+    description: str
+    written_at: float
+
+
+def _cache():
+    return caches[settings.STRAVA_CACHE]
+
+
+def _key(athlete_id: int, activity_id: int) -> str:
+    return f"strava:write:{athlete_id}:{activity_id}"
+
+
+def record(athlete_id: int, activity_id: int, data: UpdatableActivity) -> None:
+    write = Write(name=data.name or "", description=data.description or "", written_at=time.time())
+    _cache().set(_key(athlete_id, activity_id), write, timeout=settings.STRAVA_EVENT_ECHO_WINDOW)
+
+
+def last(athlete_id: int, activity_id: int) -> Write | None:
+    return _cache().get(_key(athlete_id, activity_id))
@@ -0,0 +1,15 @@
+from django import template
+from django.urls import reverse
+
+from strava.routes import VARIANTS
+
+register = template.Library()
+
+
+@register.simple_tag
+def route_srcset(activity_id: int, theme: str = "dark", format: str = "webp") -> str:
+    """Every size of an activity's route image, for an img srcset."""
+    return ", ".join(
+        f"{reverse('strava:activity_route', args=[activity_id, name, theme, format])} {variant.size[0]}w"
+        for name, variant in VARIANTS.items()
+    )
@@ -0,0 +1,18 @@
+from django.template import Context, Template
+
+from template_tags.templatetags.routes import route_srcset
+
+
+def test_route_srcset():
+    assert route_srcset(101) == (
+        "/img/101/thumbnail/dark.webp 160w, /img/101/card/dark.webp 640w, /img/101/full/dark.webp 1280w"
+    )
+
+
+def test_route_srcset_theme_and_format():
+    assert route_srcset(101, "light", "png").startswith("/img/101/thumbnail/light.png 160w")
+
+
+def test_route_srcset_tag():
+    rendered = Template("{% load routes %}{% route_srcset 7 'light' %}").render(Context())
+    assert "/img/7/card/light.webp 640w" in rendered
@@ -0,0 +1,40 @@
+"""
+Geohash encoding, for grouping nearby observations.
+
+A geohash names a cell of a grid over the globe; each extra character splits
+the cell into 32, so points that share a prefix are close together. Six
+characters is a cell of roughly 1.2km by 0.6km.
+"""
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode(latitude: float, longitude: float, precision: int = 6) -> str:
+    """
+    The geohash of the cell ``precision`` characters deep that holds the point.
+    """
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        # Bits alternate between longitude and latitude, longitude first.
+        value, bounds = (longitude, lng_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        if value >= middle:
+            bits = bits << 1 | 1
+            bounds[0] = middle
+        else:
+            bits <<= 1
+            bounds[1] = middle
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:  # noqa: PLR2004
+            chars.append(BASE32[bits])
+            bits = bit_count = 0
+
+    return "".join(chars)
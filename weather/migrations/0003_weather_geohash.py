@@ -0,0 +1,22 @@
+# Generated by Django 5.2.16 on 2026-10-18 16:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0002_weather_humidity_weather_wind_direction_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weather',
+            name='geohash',
+            field=models.CharField(blank=True, default='', max_length=12),
+        ),
+        migrations.AddIndex(
+            model_name='weather',
+            index=models.Index(fields=['geohash', '-timestamp'], name='weather_geohash_recent'),
+        ),
+    ]
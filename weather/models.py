@@ -1,17 +1,20 @@
+from datetime import datetime, timedelta
 from enum import StrEnum
-from typing import Self
+from typing import ClassVar, Self
 
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
-import pyowm
-from pyowm.weatherapi25.weather import Weather as PyOWMWeather
+from weather import geohash, providers
 
 
 class Weather(models.Model):
     latitude = models.FloatField()
     longitude = models.FloatField()
     timestamp = models.DateTimeField()
+    # The cell of WEATHER_GEOHASH_PRECISION that the observation was made for.
+    geohash = models.CharField(max_length=12, blank=True, default="")
 
     status = models.CharField(max_length=100)
     detailed_status = models.CharField(max_length=200)
@@ -25,6 +28,11 @@ class Weather(models.Model):
 
     other_data = models.JSONField(default=dict)
 
+    class Meta:
+        indexes: ClassVar[list[models.Index]] = [
+            models.Index(fields=["geohash", "-timestamp"], name="weather_geohash_recent"),
+        ]
+
     def __str__(self) -> str:
         return self.detailed_status
 
@@ -126,31 +134,32 @@ class Weather(models.Model):
                 return ""
 
     @classmethod
-    def from_lat_long(cls, latitude: float, longitude: float) -> Self:
-        """
-        Fetches the weather data for the given latitude and longitude.
-        """
-        owm = pyowm.OWM(settings.OWM_API_KEY).weather_manager()
-        observation = owm.weather_at_coords(latitude, longitude)
-        if not observation:
-            raise ValueError(f"No weather data found for coordinates: {latitude}, {longitude}")
-        weather: PyOWMWeather = observation.weather
-
-        temperature = weather.temperature("celsius")
-
-        weather_instance = cls.objects.create(
-            latitude=latitude,
-            longitude=longitude,
-            timestamp=weather.reference_time("iso"),
-            status=weather.status,
-            detailed_status=weather.detailed_status.capitalize(),
-            temperature=temperature["temp"],
-            temperature_feels_like=temperature["feels_like"],
-            humidity=weather.humidity,
-            wind_speed=weather.wnd.get("speed", 0.0),
-            wind_direction=weather.wnd.get("deg", 0.0),
-            wind_gust=weather.wnd.get("gust", 0.0),
-            other_data=weather.to_dict(),
-        )
-
-        return weather_instance
+    def from_lat_long(cls, latitude: float, longitude: float, when: datetime | None = None) -> Self:
+        """
+        The weather at the given latitude and longitude, now or at ``when``.
+
+        An observation made in the same geohash cell within WEATHER_REUSE_WINDOW
+        seconds of the time is shared rather than fetched again, so a group
+        finishing together in one place makes one call between them.
+        """
+        cell = geohash.encode(latitude, longitude, settings.WEATHER_GEOHASH_PRECISION)
+        if observed := cls.observed(cell, when or timezone.now()):
+            return observed
+        return cls.fetch(latitude, longitude, cell, when)
+
+    @classmethod
+    def observed(cls, cell: str, when: datetime) -> Self | None:
+        window = timedelta(seconds=settings.WEATHER_REUSE_WINDOW)
+        nearby = cls.objects.filter(geohash=cell, timestamp__range=(when - window, when + window))
+        # A cell sees a handful of observations an hour, so the nearest is picked here.
+        return min(nearby, key=lambda weather: abs(weather.timestamp - when), default=None)
+
+    @classmethod
+    def fetch(cls, latitude: float, longitude: float, cell: str = "", when: datetime | None = None) -> Self:
+        """
+        Fetches the weather data for the given latitude and longitude from the
+        configured provider.
+        """
+        source = providers.provider()
+        fields = source.current(latitude, longitude) if when is None else source.historical(latitude, longitude, when)
+        return cls.objects.create(latitude=latitude, longitude=longitude, geohash=cell, **fields)
@@ -0,0 +1,95 @@
+"""
+Where observations come from.
+
+``WEATHER_PROVIDER`` names the class to use. A provider gives the fields of a
+Weather for a place, either as it is now or as it was at a time in the past,
+and leaves storing them to the model.
+"""
+
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Any, ClassVar
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+import pyowm
+from pyowm.commons.exceptions import PyOWMError
+from pyowm.weatherapi25.weather import Weather as PyOWMWeather
+
+from weather.exceptions import WeatherUnavailableError
+
+
+class Provider(ABC):
+    # How far back ``historical`` reaches, or None if it has no limit.
+    history: ClassVar[timedelta | None] = None
+
+    @classmethod
+    def reaches(cls, when: datetime) -> bool:
+        return cls.history is None or when >= timezone.now() - cls.history
+
+    @abstractmethod
+    def current(self, latitude: float, longitude: float) -> dict[str, Any]:
+        """
+        The weather now.
+        """
+
+    @abstractmethod
+    def historical(self, latitude: float, longitude: float, when: datetime) -> dict[str, Any]:
+        """
+        The weather at ``when``, for activities uploaded too late to be given
+        the weather now.
+        """
+
+
+class OpenWeatherMap(Provider):
+    # The One Call time machine only goes back five days.
+    history = timedelta(days=5)
+
+    def __init__(self):
+        self.manager = pyowm.OWM(settings.OWM_API_KEY).weather_manager()
+
+    def current(self, latitude: float, longitude: float) -> dict[str, Any]:
+        try:
+            observation = self.manager.weather_at_coords(latitude, longitude)
+        except PyOWMError as error:
+            raise WeatherUnavailableError(f"No weather data for {latitude}, {longitude}: {error}") from error
+        if not observation:
+            raise WeatherUnavailableError(f"No weather data found for coordinates: {latitude}, {longitude}")
+        return self.fields(observation.weather)
+
+    def historical(self, latitude: float, longitude: float, when: datetime) -> dict[str, Any]:
+        if not self.reaches(when):
+            raise WeatherUnavailableError(f"No weather data from before {timezone.now() - self.history}")
+        try:
+            one_call = self.manager.one_call_history(latitude, longitude, dt=int(when.timestamp()))
+        except PyOWMError as error:
+            raise WeatherUnavailableError(f"No weather data for {latitude}, {longitude} at {when}: {error}") from error
+        if not one_call or not one_call.current:
+            raise WeatherUnavailableError(f"No weather data found for coordinates: {latitude}, {longitude} at {when}")
+        return self.fields(one_call.current)
+
+    @staticmethod
+    def fields(weather: PyOWMWeather) -> dict[str, Any]:
+        temperature = weather.temperature("celsius")
+        return {
+            "timestamp": weather.reference_time("iso"),
+            "status": weather.status,
+            "detailed_status": weather.detailed_status.capitalize(),
+            "temperature": temperature["temp"],
+            "temperature_feels_like": temperature["feels_like"],
+            "humidity": weather.humidity,
+            "wind_speed": weather.wnd.get("speed", 0.0),
+            "wind_direction": weather.wnd.get("deg", 0.0),
+            "wind_gust": weather.wnd.get("gust", 0.0),
+            "other_data": weather.to_dict(),
+        }
+
+
+def provider_class() -> type[Provider]:
+    return import_string(settings.WEATHER_PROVIDER)
+
+
+def provider() -> Provider:
+    return provider_class()()
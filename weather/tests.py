@@ -1,10 +1,15 @@
+from datetime import UTC, datetime, timedelta
 from unittest import mock
 
 from django.test import override_settings
+from django.utils import timezone
 
 import pytest
 from model_bakery import baker
+from pyowm.commons.exceptions import APIResponseError
 
+from weather import geohash
+from weather.exceptions import WeatherUnavailableError
 from weather.models import Weather
 
 
@@ -16,7 +21,7 @@ def weather():
 @pytest.mark.django_db
 @override_settings(OWM_API_KEY="fake-key")
 @mock.patch("weather.models.Weather.objects.create")
-@mock.patch("weather.models.pyowm.OWM")
+@mock.patch("weather.providers.pyowm.OWM")
 def test_get_weather_returns_expected_string(mock_owm_class, mock_create):
     mock_owm_instance = mock.Mock(name="OWMInstance")
     mock_weather_manager = mock.Mock(name="WeatherManager")
@@ -81,7 +86,7 @@ def test_emoji(weather_icon, expected_emoji, name):
 
 @pytest.mark.django_db
 @override_settings(OWM_API_KEY="fake-key")
-@mock.patch("weather.models.pyowm.OWM")
+@mock.patch("weather.providers.pyowm.OWM")
 def test_from_lat_long_invalid_observation(mock_owm_class):
     mock_owm_instance = mock.Mock(name="OWMInstance")
     mock_weather_manager = mock.Mock(name="WeatherManager")
@@ -93,6 +98,17 @@ def test_from_lat_long_invalid_observation(mock_owm_class):
         Weather.from_lat_long(0.0, 0.0)
 
 
+@pytest.mark.django_db
+@override_settings(OWM_API_KEY="fake-key")
+@mock.patch("weather.providers.pyowm.OWM")
+def test_from_lat_long_provider_error(mock_owm_class):
+    mock_weather_manager = mock_owm_class.return_value.weather_manager.return_value
+    mock_weather_manager.weather_at_coords.side_effect = APIResponseError("Unavailable")
+
+    with pytest.raises(WeatherUnavailableError, match=r"No weather data for 0.0, 0.0"):
+        Weather.from_lat_long(0.0, 0.0)
+
+
 def test_weather_str(weather):
     assert str(weather) == weather.detailed_status
 
@@ -164,3 +180,91 @@ def test_weather_wind(weather):
     assert "18.4km/h" in wind
     assert "E" in wind
     assert "25.6km/h" in wind
+
+
+def test_geohash_encode():
+    assert geohash.encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert geohash.encode(57.64911, 10.40744, 6) == "u4pruy"
+
+
+@pytest.mark.django_db
+@override_settings(WEATHER_GEOHASH_PRECISION=6, WEATHER_REUSE_WINDOW=3600)
+@mock.patch("weather.models.Weather.fetch")
+def test_from_lat_long_reuses_nearby_recent_weather(mock_fetch):
+    nearby = baker.make(Weather, geohash="u4pruy", timestamp=timezone.now() - timedelta(minutes=10))
+
+    assert Weather.from_lat_long(57.64911, 10.40744) == nearby
+    mock_fetch.assert_not_called()
+
+
+@pytest.mark.django_db
+@override_settings(WEATHER_GEOHASH_PRECISION=6, WEATHER_REUSE_WINDOW=3600)
+@mock.patch("weather.models.Weather.fetch")
+def test_from_lat_long_fetches_when_nothing_recent_nearby(mock_fetch):
+    baker.make(Weather, geohash="u4pruy", timestamp=timezone.now() - timedelta(hours=2))
+    baker.make(Weather, geohash="gcpvj0", timestamp=timezone.now())
+
+    Weather.from_lat_long(57.64911, 10.40744)
+
+    mock_fetch.assert_called_once_with(57.64911, 10.40744, "u4pruy", None)
+
+
+@pytest.mark.django_db
+@override_settings(WEATHER_REUSE_WINDOW=3600)
+@mock.patch("weather.models.Weather.fetch")
+def test_from_lat_long_reuses_an_observation_from_the_time(mock_fetch):
+    when = timezone.now() - timedelta(days=2)
+    then = baker.make(Weather, geohash=geohash.encode(51.5, -0.1), timestamp=when + timedelta(minutes=20))
+    baker.make(Weather, geohash=geohash.encode(51.5, -0.1), timestamp=timezone.now())
+
+    assert Weather.from_lat_long(51.5, -0.1, when) == then
+    mock_fetch.assert_not_called()
+
+
+@pytest.mark.django_db
+@override_settings(WEATHER_REUSE_WINDOW=3600)
+@mock.patch("weather.models.Weather.fetch")
+def test_from_lat_long_reuses_the_nearest_observation(mock_fetch):
+    when = datetime(2024, 5, 1, 10, 0, tzinfo=UTC)
+    cell = geohash.encode(51.5, -0.1)
+    nearest = baker.make(Weather, geohash=cell, timestamp=when + timedelta(minutes=5))
+    baker.make(Weather, geohash=cell, timestamp=when + timedelta(minutes=59))
+    baker.make(Weather, geohash=cell, timestamp=when - timedelta(minutes=30))
+
+    assert Weather.from_lat_long(51.5, -0.1, when) == nearest
+    mock_fetch.assert_not_called()
+
+
+@pytest.mark.django_db
+@override_settings(OWM_API_KEY="fake-key", WEATHER_PROVIDER="weather.providers.OpenWeatherMap")
+@mock.patch("weather.providers.pyowm.OWM")
+def test_historical_weather_is_fetched_for_the_time(mock_owm_class):
+    mock_weather_manager = mock_owm_class.return_value.weather_manager.return_value
+    mock_weather = mock_weather_manager.one_call_history.return_value.current
+    mock_weather.status = "Clear"
+    mock_weather.detailed_status = "clear sky"
+    mock_weather.temperature.return_value = {"temp": 12.0, "feels_like": 11.0}
+    mock_weather.reference_time.return_value = "2024-05-01 08:30:00+00:00"
+    mock_weather.humidity = 60
+    mock_weather.wnd = {"speed": 2.0}
+    mock_weather.to_dict.return_value = {}
+    when = timezone.now() - timedelta(days=2)
+
+    weather = Weather.from_lat_long(51.5, -0.1, when)
+
+    mock_weather_manager.one_call_history.assert_called_once_with(51.5, -0.1, dt=int(when.timestamp()))
+    mock_weather_manager.weather_at_coords.assert_not_called()
+    assert weather.detailed_status == "Clear sky"
+    assert weather.geohash == geohash.encode(51.5, -0.1)
+
+
+@pytest.mark.django_db
+@override_settings(OWM_API_KEY="fake-key", WEATHER_PROVIDER="weather.providers.OpenWeatherMap")
+@mock.patch("weather.providers.pyowm.OWM")
+def test_historical_weather_beyond_the_history_is_not_asked_for(mock_owm_class):
+    mock_weather_manager = mock_owm_class.return_value.weather_manager.return_value
+
+    with pytest.raises(WeatherUnavailableError):
+        Weather.from_lat_long(51.5, -0.1, timezone.now() - timedelta(days=6))
+
+    mock_weather_manager.one_call_history.assert_not_called()